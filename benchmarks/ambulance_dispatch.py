@@ -0,0 +1,60 @@
+"""
+k ta eng yaqin bo'sh tez yordam mashinasi: xotiradagi to'r indeksi, to'liq Python skani va SQL saralash.
+
+    python -m benchmarks.ambulance_dispatch
+"""
+import random
+
+from benchmarks.common import test_database, measure, report
+
+from django.db.models import F
+
+from quickcare_app.dispatch import AmbulanceIndex, haversine_km
+from quickcare_app.models import Ambulance
+
+SIZES = [1000, 5000, 20000]
+K = 5
+# Toshkent atrofi
+LAT, LON = (41.15, 41.45), (69.05, 69.45)
+
+
+def main():
+    rng = random.Random(42)
+    queries = [(rng.uniform(*LAT), rng.uniform(*LON)) for _ in range(200)]
+    rows = []
+    created = 0
+    for size in SIZES:
+        Ambulance.objects.bulk_create(
+            Ambulance(plate_number=f"B{i:06d}", latitude=rng.uniform(*LAT), longitude=rng.uniform(*LON))
+            for i in range(created, size)
+        )
+        created = size
+
+        index = AmbulanceIndex()
+        index.reload()
+        points = list(Ambulance.objects.values_list("pk", "latitude", "longitude"))
+        it = iter(queries * 1000)
+
+        def grid():
+            index.nearest(*next(it), K)
+
+        def scan():
+            lat, lon = next(it)
+            sorted((haversine_km(lat, lon, a, b), pk) for pk, a, b in points)[:K]
+
+        def sql():
+            lat, lon = next(it)
+            list(
+                Ambulance.objects.filter(status="available")
+                .annotate(d=(F("latitude") - lat) ** 2 + (F("longitude") - lon) ** 2)
+                .order_by("d").values_list("pk", flat=True)[:K]
+            )
+
+        rows.append((size, measure(grid, repeat=200), measure(scan, repeat=20), measure(sql, repeat=20)))
+
+    report(f"k={K} eng yaqin mashina (median ms)", rows, ["units", "grid index", "python scan", "sql order_by"])
+
+
+if __name__ == "__main__":
+    with test_database():
+        main()
@@ -0,0 +1,56 @@
+"""
+GPS nuqtalarini yozish: har bir nuqta uchun Ambulance.move_to va buferlangan bulk yozish.
+
+    python -m benchmarks.ambulance_telemetry
+"""
+import datetime
+import random
+
+from benchmarks.common import test_database, measure, report
+
+from django.test import override_settings
+from django.utils import timezone
+
+from quickcare_app.models import Ambulance
+from quickcare_app.telemetry import Fix, TelemetryBuffer
+
+UNITS = 200
+FIXES_PER_UNIT = 10
+
+
+def main():
+    rng = random.Random(42)
+    ambulances = Ambulance.objects.bulk_create(
+        Ambulance(plate_number=f"B{i:05d}", latitude=41.3, longitude=69.2) for i in range(UNITS)
+    )
+    now = timezone.now()
+    fixes = [
+        (ambulance.pk, Fix(rng.uniform(41.2, 41.4), rng.uniform(69.1, 69.4), now + datetime.timedelta(seconds=i), None))
+        for i in range(FIXES_PER_UNIT)
+        for ambulance in ambulances
+    ]
+    by_pk = {ambulance.pk: ambulance for ambulance in ambulances}
+
+    def per_fix():
+        for pk, fix in fixes:
+            by_pk[pk].move_to(fix.latitude, fix.longitude)
+
+    buffer = TelemetryBuffer()
+
+    def batched():
+        # Har bir so'rovda bitta mashinalar to'plami (UNITS ta nuqta)
+        for start in range(0, len(fixes), UNITS):
+            buffer.record(fixes[start:start + UNITS])
+        buffer.flush()
+
+    with override_settings(TELEMETRY_FLUSH_SIZE=500, TELEMETRY_FLUSH_SECONDS=3600):
+        rows = [
+            ("move_to per fix", len(fixes), measure(per_fix, repeat=3)),
+            ("telemetry buffer", len(fixes), measure(batched, repeat=3)),
+        ]
+    report("GPS nuqtalarini yozish (median ms)", rows, ["path", "fixes", "median ms"])
+
+
+if __name__ == "__main__":
+    with test_database():
+        main()
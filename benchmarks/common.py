@@ -0,0 +1,47 @@
+"""
+Benchmarklar uchun umumiy yordamchi funksiyalar.
+
+Ishga tushirish (loyiha ildizidan):
+    python -m benchmarks.queue_cancel
+"""
+import os
+import statistics
+import time
+from contextlib import contextmanager
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment, teardown_test_environment  # noqa: E402
+
+
+@contextmanager
+def test_database():
+    """Vaqtinchalik test bazasini yaratib, oxirida o'chirib tashlaydi"""
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def measure(fn, repeat=20):
+    """fn ni repeat marta chaqirib, median vaqtni millisekundlarda qaytaradi"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def report(title, rows, headers):
+    print(f"\n{title}")
+    print(" | ".join(f"{h:>14}" for h in headers))
+    for row in rows:
+        print(" | ".join(f"{v:>14.3f}" if isinstance(v, float) else f"{v:>14}" for v in row))
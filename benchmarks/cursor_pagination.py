@@ -0,0 +1,78 @@
+"""
+Bildirishnomalar ro'yxati: PageNumberPagination va kursorli sahifalash (1-sahifa va 10 000-sahifa).
+
+    python -m benchmarks.cursor_pagination
+"""
+import datetime
+
+from benchmarks.common import test_database, measure, report
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.pagination import Cursor, PageNumberPagination
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from quickcare_app.models import Patient, Notification
+from quickcare_app.pagination import NotificationPagination
+from quickcare_app.views import NotificationViewSet
+
+ROWS = 100_000
+DEEP_PAGE = 10_000
+URL = "/api/v1/notifications/"
+
+
+class PageNumberNotificationViewSet(NotificationViewSet):
+    pagination_class = PageNumberPagination
+
+    def get_queryset(self):
+        return super().get_queryset().order_by("-sent_at", "-id")
+
+
+def cursor_for_page(recipient, page):
+    """page-sahifaga olib boruvchi kursor (oldingi sahifaning oxirgi qatori)"""
+    paginator = NotificationPagination()
+    paginator.base_url = "http://testserver" + URL
+    last = Notification.objects.filter(recipient=recipient).order_by("-sent_at", "-id")[
+        (page - 1) * paginator.page_size - 1
+    ]
+    position = paginator._get_position_from_instance(last, ("-sent_at", "-id"))
+    return paginator.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+
+def main():
+    user = get_user_model().objects.create(username="bench")
+    recipient = Patient.objects.create(
+        user=user, full_name="Bench", phone_number="+998900000000", birth_date=datetime.date(1990, 1, 1)
+    )
+    Notification.objects.bulk_create(
+        (Notification(recipient=recipient, message=f"Xabar {i}") for i in range(ROWS)), batch_size=5000
+    )
+
+    factory = APIRequestFactory()
+    urls = {
+        "page-number": (PageNumberNotificationViewSet, {1: URL, DEEP_PAGE: f"{URL}?page={DEEP_PAGE}"}),
+        "cursor": (NotificationViewSet, {1: URL, DEEP_PAGE: cursor_for_page(recipient, DEEP_PAGE)}),
+    }
+
+    rows = []
+    for name, (viewset, pages) in urls.items():
+        view = viewset.as_view({"get": "list"})
+        for page, url in pages.items():
+            def fetch():
+                request = factory.get(url)
+                force_authenticate(request, user=user)
+                response = view(request)
+                assert response.status_code == 200, response.data
+                return response
+
+            with CaptureQueriesContext(connection) as ctx:
+                fetch()
+            rows.append((name, page, len(ctx.captured_queries), measure(fetch, repeat=20)))
+
+    report(f"Bildirishnomalar ro'yxati ({ROWS} qator)", rows, ["pagination", "page", "queries", "median ms"])
+
+
+if __name__ == "__main__":
+    with test_database():
+        main()
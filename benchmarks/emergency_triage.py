@@ -0,0 +1,65 @@
+"""
+Triaj navbati: kutilayotgan holatlar ko'p bo'lganda navbatdagisini olish.
+Indeksli so'rov + band qilish UPDATE (Emergency.next_pending) va indekssiz tartib bilan taqqoslash.
+
+    python -m benchmarks.emergency_triage
+"""
+import datetime
+import random
+
+from benchmarks.common import test_database, measure, report
+
+from django.db.models import F
+
+from quickcare_app.models import Emergency, Patient
+
+SIZES = [10000, 50000]
+POPS = 200
+
+
+def main():
+    rng = random.Random(42)
+    patient = Patient.objects.create(
+        full_name="Bemor", phone_number="+998900000000", birth_date=datetime.date(1990, 1, 1)
+    )
+    rows = []
+    created = 0
+    for size in SIZES:
+        Emergency.objects.bulk_create(
+            (
+                Emergency(
+                    patient=patient, description="Favqulodda chaqiruv", ambulance_requested=False,
+                    severity=rng.randint(1, 4),
+                )
+                for _ in range(created, size)
+            ),
+            batch_size=2000,
+        )
+        created = size
+
+        def next_pending():
+            Emergency.next_pending()
+
+        def sql_unindexed():
+            # Indekssiz tartib (ifoda bo'yicha saralash): butun jadval skan qilinadi
+            list(
+                Emergency.objects.filter(status=Emergency.Status.PENDING)
+                .order_by(F('severity') + 0, 'created_at', 'id').values_list('pk', flat=True)[:1]
+            )
+
+        rows.append((
+            size,
+            measure(next_pending, repeat=POPS),
+            measure(sql_unindexed, repeat=10),
+        ))
+
+    report(
+        "Navbatdagi favqulodda holat (median ms)",
+        rows,
+        ["pending", "indexed SQL + UPDATE", "unindexed SQL"],
+    )
+
+
+if __name__ == "__main__":
+    with test_database():
+        main()
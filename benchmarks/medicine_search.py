@@ -0,0 +1,69 @@
+"""
+Dori qidiruvi 100k dorida: hozirgi SearchFilter (?search=, LIKE '%so'z%'), FTS5 va xotiradagi trigram indeksi.
+
+    python -m benchmarks.medicine_search
+"""
+import random
+
+from benchmarks.common import test_database, measure, report
+
+from rest_framework.filters import SearchFilter
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from quickcare_app.models import Medicine
+from quickcare_app.search import FTS5Search, TrigramSearch
+from quickcare_app.views import MedicineViewSet
+
+SIZE = 100_000
+SYLLABLES = ["pa", "ra", "tse", "ta", "mol", "ib", "u", "pro", "fen", "a", "mok", "si", "lin", "ni", "me", "sul",
+             "ke", "to", "ro", "di", "klo", "na", "ts", "fa", "lek", "met", "for", "min", "lo", "sar", "o", "pra", "zol"]
+FORMS = ["forte", "retard", "sirop", "kapsula", "tabletka", "inyeksiya", ""]
+BRANDS = 5000
+
+
+def main():
+    rng = random.Random(42)
+    # Har bir savdo nomi ~20 dorida (shakli va dozasi bilan): prefiks so'rovlari haqiqiy katalogdagidek tanlab oladi
+    brands = sorted({"".join(rng.choice(SYLLABLES) for _ in range(rng.randint(3, 5))) for _ in range(BRANDS)})
+    Medicine.objects.bulk_create(
+        (Medicine(
+            name=f"{rng.choice(brands).capitalize()} {rng.choice(FORMS)} {rng.randint(1, 100) * 10}mg #{i}",
+            description=f"{rng.choice(brands)} analogi",
+        ) for i in range(SIZE)),
+        batch_size=5000,
+    )
+    picks = rng.sample([brand for brand in brands if len(brand) >= 8], 20)
+    queries = {
+        "prefix": [brand[:5] for brand in picks],
+        "two words": [f"{brand} forte" for brand in picks],
+        # Bitta harf tushib qolgan
+        "typo": [brand[:3] + brand[4:] for brand in picks],
+    }
+
+    fts5, trigram = FTS5Search(), TrigramSearch()
+    fts5.rebuild()
+    trigram.reload()
+
+    view = MedicineViewSet()
+    factory = APIRequestFactory()
+
+    def search_filter(query):
+        request = Request(factory.get("/", {"search": query}))
+        return list(SearchFilter().filter_queryset(request, Medicine.objects.all(), view)[:20].values_list("pk"))
+
+    rows = []
+    for kind, terms in queries.items():
+        it = iter(terms * 100)
+        rows.append((
+            kind,
+            measure(lambda: search_filter(next(it)), repeat=10),
+            measure(lambda: fts5.search(next(it), 20), repeat=20),
+            measure(lambda: trigram.search(next(it), 20), repeat=20),
+        ))
+    report(f"{SIZE} dori, top-20 (median ms)", rows, ["query", "SearchFilter", "fts5", "trigram"])
+
+
+if __name__ == "__main__":
+    with test_database():
+        main()
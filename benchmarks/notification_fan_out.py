@@ -0,0 +1,50 @@
+"""
+Ko'p bemorga bildirishnoma: har bir qator uchun send_notification va bitta Notification.fan_out.
+
+    python -m benchmarks.notification_fan_out
+"""
+import datetime
+
+from benchmarks.common import test_database, measure, report
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from quickcare_app.models import Patient, Notification
+
+SIZES = [50, 500]
+MESSAGE = "📢 Navbatingiz bir pog‘ona oldinga siljidi."
+
+
+def per_row(patients):
+    with transaction.atomic():
+        for patient in patients:
+            Notification.send_notification(patient, MESSAGE)
+
+
+def fan_out(patients):
+    with transaction.atomic():
+        Notification.fan_out((patient, MESSAGE) for patient in patients)
+
+
+def main():
+    patients = Patient.objects.bulk_create(
+        Patient(full_name=f"Bemor {i}", phone_number=f"+99890{i:07d}", birth_date=datetime.date(1990, 1, 1))
+        for i in range(max(SIZES))
+    )
+    rows = []
+    for size in SIZES:
+        recipients = patients[:size]
+        for name, fn in (("per-row", per_row), ("fan_out", fan_out)):
+            # queries_log cheklangan deque: oldingi o'lchovlar to'ldirib qo'ymasligi uchun
+            connection.queries_log.clear()
+            with CaptureQueriesContext(connection) as ctx:
+                fn(recipients)
+            rows.append((name, size, len(ctx.captured_queries), measure(lambda: fn(recipients), repeat=10)))
+
+    report("Bildirishnoma + outbox yozish", rows, ["path", "recipients", "queries", "median ms"])
+
+
+if __name__ == "__main__":
+    with test_database():
+        main()
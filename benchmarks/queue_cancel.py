@@ -0,0 +1,56 @@
+"""
+Queue.cancel_queue narxi navbat uzunligiga bog'liq emasligini ko'rsatadi.
+
+    python -m benchmarks.queue_cancel
+"""
+import datetime
+
+from benchmarks.common import test_database, measure, report
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from quickcare_app.models import Department, Room, Doctor, Patient, Queue
+
+SIZES = [10, 100, 1000, 5000]
+
+
+def build_queue(doctor, size):
+    patients = Patient.objects.bulk_create(
+        Patient(
+            full_name=f"Bemor {doctor.pk}-{i}",
+            phone_number=f"+9989{doctor.pk:03d}{i:05d}",
+            birth_date=datetime.date(1990, 1, 1),
+        )
+        for i in range(size)
+    )
+    Queue.objects.bulk_create(
+        Queue(patient=patient, doctor=doctor, position=i + 1) for i, patient in enumerate(patients)
+    )
+
+
+def main():
+    department = Department.objects.create(name="Bench", description="")
+    room = Room.objects.create(room_number=1, department=department)
+    rows = []
+    for size in SIZES:
+        doctor = Doctor.objects.create(
+            full_name=f"Shifokor {size}", specialization="Bench",
+            phone=f"+998{size:09d}", department=department, room=room,
+        )
+        build_queue(doctor, size)
+
+        def cancel_first():
+            entry = Queue.objects.filter(doctor=doctor, status="waiting").order_by("position").first()
+            entry.cancel_queue()
+
+        with CaptureQueriesContext(connection) as ctx:
+            cancel_first()
+        rows.append((size, len(ctx.captured_queries), measure(cancel_first, repeat=min(20, size - 1))))
+
+    report("Queue.cancel_queue (navbat boshidagi bemor)", rows, ["queue size", "queries", "median ms"])
+
+
+if __name__ == "__main__":
+    with test_database():
+        main()
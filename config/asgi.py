@@ -13,4 +13,13 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Django sozlangandan keyin import qilinadi
+from quickcare_app.live import live_queue_router  # noqa: E402
+from quickcare_app.telemetry import telemetry_buffer  # noqa: E402
+
+application = live_queue_router(django_application)
+
+# GPS telemetriyasini qabul qiluvchi server jarayoni: navbat muddatida va to'xtashda yoziladi
+telemetry_buffer.start()
@@ -87,6 +87,15 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Yozish qulfini kutish (soniya). Navbat yozuvi bildirishnomalar va outbox bilan bitta tranzaksiyada,
+        # standart 5 soniya ko'p parallel yozuvchida "database is locked" xatosiga olib keladi
+        'OPTIONS': {
+            'timeout': 20,
+        },
+        # Parallel so'rovlar testi har bir oqimda alohida ulanish ochadi, shuning uchun test bazasi faylda
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
     }
 }
 
@@ -146,6 +155,37 @@ REST_FRAMEWORK = {
 }
 
 
+# Bildirishnoma kanallari transportlari (quickcare_app.delivery); shlyuzlar ulanmaguncha logga yoziladi
+NOTIFICATION_TRANSPORTS = {
+    'sms': 'quickcare_app.delivery.LogTransport',
+    'telegram': 'quickcare_app.delivery.LogTransport',
+    'email': 'quickcare_app.delivery.LogTransport',
+}
+
+# Bir bemorga shu oyna (soniya) ichida yuborilgan, hali yetkazilmagan bir turdagi bildirishnomalar
+# bittaga birlashtiriladi (faqat oxirgi holat). Ro'yxatda yo'q turlar (masalan, emergency_alert) birlashtirilmaydi
+NOTIFICATION_COALESCE_WINDOWS = {
+    'queue_update': 60,
+}
+
+# O'qilgan bildirishnomalar saqlanadigan kunlar (purge_notifications); ko'rsatilmagan turlar — 90 kun
+NOTIFICATION_RETENTION_DAYS = {
+    'queue_update': 30,
+    'appointment_reminder': 90,
+    'general': 90,
+    'emergency_alert': 365,
+}
+
+# Tez yordam GPS telemetriyasi (quickcare_app.telemetry): xotirada har bir mashinaning so'nggi nuqtalari,
+# tarix jadvaliga esa shuncha nuqta to'planganda yoki shuncha soniya o'tganda bitta bulk insert
+TELEMETRY_RECENT_FIXES = 120
+TELEMETRY_FLUSH_SIZE = 500
+TELEMETRY_FLUSH_SECONDS = 5
+
+# Dori qidiruvi (quickcare_app.search): "auto" — SQLite FTS5 jadvallari bo'lsa FTS5, aks holda xotiradagi
+# trigram indeksi; "fts5" yoki "trigram" — majburan
+MEDICINE_SEARCH_BACKEND = 'auto'
+
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=1),
@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+# Django sozlangandan keyin import qilinadi
+from quickcare_app.telemetry import telemetry_buffer  # noqa: E402
+
+# GPS telemetriyasini qabul qiluvchi server jarayoni: navbat muddatida va to'xtashda yoziladi
+telemetry_buffer.start()
@@ -1,9 +1,13 @@
 from django.contrib import admin
-from .models import Doctor, Patient, Notification, Queue, Emergency, Room, Department, Reply, Review, Pharmacy
+from .models import (
+    Doctor, Patient, Notification, NotificationDelivery, Queue, Emergency, Room, Department, Reply, Review, Pharmacy,
+    StockReservation, InventoryMovement, InventorySnapshot, LowStockEntry, StockAlert,
+)
 
 admin.site.register(Doctor)
 admin.site.register(Patient)
 admin.site.register(Notification)
+admin.site.register(NotificationDelivery)
 admin.site.register(Queue)
 admin.site.register(Emergency)
 admin.site.register(Room)
@@ -11,3 +15,8 @@ admin.site.register(Department)
 admin.site.register(Review)
 admin.site.register(Reply)
 admin.site.register(Pharmacy)
+admin.site.register(StockReservation)
+admin.site.register(InventoryMovement)
+admin.site.register(InventorySnapshot)
+admin.site.register(LowStockEntry)
+admin.site.register(StockAlert)
@@ -0,0 +1,92 @@
+"""
+Bildirishnomalarni kanal transportlari orqali yetkazish (NotificationDelivery outbox'i uchun).
+
+Transportlar settings.NOTIFICATION_TRANSPORTS orqali ulanadi:
+
+    NOTIFICATION_TRANSPORTS = {
+        "sms": "quickcare_app.delivery.LogTransport",
+        "telegram": "myproject.gateways.TelegramTransport",
+    }
+
+Transport send(delivery) metodini amalga oshiradi. Vaqtinchalik xatoda DeliveryError
+(vazifa backoff bilan qayta uriniladi), qayta urinishdan foyda bo'lmasa PermanentDeliveryError ko'taradi.
+"""
+import logging
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRANSPORT = "quickcare_app.delivery.LogTransport"
+
+
+class DeliveryError(Exception):
+    """Vaqtinchalik xato: vazifa keyinroq qayta uriniladi"""
+
+
+class PermanentDeliveryError(DeliveryError):
+    """Qayta urinishdan foyda yo'q (masalan, manzil noto'g'ri)"""
+
+
+class BaseTransport:
+    def send(self, delivery):
+        raise NotImplementedError
+
+
+class LogTransport(BaseTransport):
+    """Shlyuz ulanmagan muhit uchun: xabarni faqat logga yozadi"""
+
+    def send(self, delivery):
+        notification = delivery.notification
+        logger.info("[%s] %s: %s", delivery.channel, notification.recipient.full_name, notification.message)
+
+
+class FakeTransport(BaseTransport):
+    """Testlar uchun: yuborilgan xabarlarni xotirada saqlaydi, kerak bo'lsa xato beradi"""
+    sent = []
+    fail_next = 0
+
+    @classmethod
+    def reset(cls):
+        cls.sent = []
+        cls.fail_next = 0
+
+    def send(self, delivery):
+        if FakeTransport.fail_next:
+            FakeTransport.fail_next -= 1
+            raise DeliveryError("Soxta shlyuz xatosi")
+        notification = delivery.notification
+        FakeTransport.sent.append((delivery.channel, notification.recipient_id, notification.message))
+
+
+def load_transports():
+    """Kanal -> transport obyekti"""
+    configured = getattr(settings, "NOTIFICATION_TRANSPORTS", {})
+    return {
+        channel: import_string(configured.get(channel, DEFAULT_TRANSPORT))()
+        for channel in ("sms", "telegram", "email")
+    }
+
+
+def deliver(deliveries, transports):
+    """Band qilingan vazifalarni yuboradi; (yuborilgan, qayta uriniladigan, yopilgan) sonini qaytaradi"""
+    sent = retried = failed = 0
+    for delivery in deliveries:
+        try:
+            transports[delivery.channel].send(delivery)
+        except PermanentDeliveryError as exc:
+            delivery.mark_failed(exc, retry=False)
+        except Exception as exc:
+            logger.warning("Bildirishnoma %s (%s) yuborilmadi: %s", delivery.notification_id, delivery.channel, exc)
+            delivery.mark_failed(exc)
+        else:
+            delivery.mark_sent()
+
+        if delivery.status == "sent":
+            sent += 1
+        elif delivery.status == "pending":
+            retried += 1
+        else:
+            failed += 1
+    return sent, retried, failed
@@ -0,0 +1,168 @@
+"""
+Eng yaqin bo'sh tez yordam mashinalarini topish uchun xotiradagi fazoviy indeks.
+
+Mashinalar koordinatalari bo'yicha to'rga (grid) joylanadi: katak ~1 km. Qidiruv so'rov nuqtasi
+katagidan boshlab halqama-halqa kengayadi va topilgan k ta mashinadan uzoqroq halqaga yetganda
+to'xtaydi, shuning uchun minglab mashinada ham faqat atrofdagi bir necha katak ko'riladi.
+
+Indeksda faqat "available" holatdagi va koordinatasi ma'lum mashinalar saqlanadi. Ambulance.save()
+tranzaksiya muvaffaqiyatli yakunlangandan keyin indeksni yangilaydi (live.py dagi kabi on_commit).
+Indeks bitta jarayon ichida: boshqa worker o'zgartirgan mashinalar uchun dispatch natijasi
+bazadan qayta tekshiriladi (Ambulance.nearest_available).
+"""
+import heapq
+import math
+import threading
+from collections import defaultdict
+
+from django.db import transaction
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Ikki nuqta orasidagi masofa (km)"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+class SpatialIndex:
+    """Kenglik/uzunlik bo'yicha to'r: yangilash O(1), k ta eng yaqinni topish — atrofdagi kataklar soniga bog'liq"""
+
+    def __init__(self, cell_degrees=0.01):
+        self.cell_degrees = cell_degrees
+        self._cells = defaultdict(dict)
+        self._positions = {}
+        self._bounds = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._positions)
+
+    def _cell(self, lat, lon):
+        return math.floor(lat / self.cell_degrees), math.floor(lon / self.cell_degrees)
+
+    def update(self, item_id, lat, lon):
+        with self._lock:
+            self._put(item_id, lat, lon)
+
+    def move(self, item_id, lat, lon):
+        """Faqat indeksda bor elementni ko'chirish; yo'q bo'lsa (masalan, band mashina) False"""
+        with self._lock:
+            if item_id not in self._positions:
+                return False
+            self._put(item_id, lat, lon)
+            return True
+
+    def _put(self, item_id, lat, lon):
+        cell = self._cell(lat, lon)
+        self._discard(item_id)
+        self._cells[cell][item_id] = (lat, lon)
+        self._positions[item_id] = cell
+        # Qidiruv chegarasi: o'chirishda qisqartirilmaydi, faqat yuqori baho
+        if self._bounds is None:
+            self._bounds = [cell[0], cell[0], cell[1], cell[1]]
+        else:
+            b = self._bounds
+            b[0], b[1] = min(b[0], cell[0]), max(b[1], cell[0])
+            b[2], b[3] = min(b[2], cell[1]), max(b[3], cell[1])
+
+    def remove(self, item_id):
+        with self._lock:
+            self._discard(item_id)
+
+    def clear(self):
+        with self._lock:
+            self._cells.clear()
+            self._positions.clear()
+            self._bounds = None
+
+    def _discard(self, item_id):
+        cell = self._positions.pop(item_id, None)
+        if cell is not None:
+            del self._cells[cell][item_id]
+            if not self._cells[cell]:
+                del self._cells[cell]
+
+    def _ring(self, ci, cj, ring):
+        if ring == 0:
+            yield ci, cj
+            return
+        for di in range(-ring, ring + 1):
+            yield ci + di, cj - ring
+            yield ci + di, cj + ring
+        for dj in range(-ring + 1, ring):
+            yield ci - ring, cj + dj
+            yield ci + ring, cj + dj
+
+    def nearest(self, lat, lon, k=5):
+        """[(masofa km, id), ...] — eng yaqindan boshlab, ko'pi bilan k ta"""
+        ci, cj = self._cell(lat, lon)
+        best = []  # (-masofa, id): eng uzoq'i tepada turadigan k o'lchamli heap
+        with self._lock:
+            if not self._positions or k < 1:
+                return []
+            b = self._bounds
+            max_ring = max(ci - b[0], b[1] - ci, cj - b[2], b[3] - cj)
+            for ring in range(max_ring + 1):
+                for cell in self._ring(ci, cj, ring):
+                    for item_id, (item_lat, item_lon) in self._cells.get(cell, {}).items():
+                        distance = haversine_km(lat, lon, item_lat, item_lon)
+                        if len(best) < k:
+                            heapq.heappush(best, (-distance, item_id))
+                        elif distance < -best[0][0]:
+                            heapq.heapreplace(best, (-distance, item_id))
+
+                # Keyingi halqadagi har qanday nuqta kamida shuncha uzoqda
+                if len(best) == k and -best[0][0] <= self._ring_distance_km(lat, ring):
+                    break
+        return sorted((-distance, item_id) for distance, item_id in best)
+
+    def _ring_distance_km(self, lat, ring):
+        edge_lat = min(abs(lat) + (ring + 1) * self.cell_degrees, 89.9)
+        return ring * self.cell_degrees * KM_PER_DEGREE * math.cos(math.radians(edge_lat))
+
+
+class AmbulanceIndex(SpatialIndex):
+    """Bo'sh tez yordam mashinalari indeksi: birinchi so'rovda bazadan yuklanadi"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._loaded = False
+        self._load_lock = threading.Lock()
+
+    def ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._load_lock:
+            if not self._loaded:
+                self.reload()
+
+    def reload(self):
+        from quickcare_app.models import Ambulance
+
+        self.clear()
+        for pk, lat, lon in Ambulance.objects.filter(
+            status=Ambulance.Status.AVAILABLE, latitude__isnull=False, longitude__isnull=False
+        ).values_list("pk", "latitude", "longitude"):
+            self.update(pk, lat, lon)
+        self._loaded = True
+
+    def reset(self):
+        """Keyingi so'rovda bazadan qayta yuklash (testlar, boshqa jarayon o'zgarishlari)"""
+        self.clear()
+        self._loaded = False
+
+    def sync(self, pk, status, lat, lon):
+        if status == "available" and lat is not None and lon is not None:
+            self.update(pk, lat, lon)
+        else:
+            self.remove(pk)
+
+    def sync_on_commit(self, pk, status, lat, lon):
+        transaction.on_commit(lambda: self.sync(pk, status, lat, lon))
+
+
+ambulance_index = AmbulanceIndex()
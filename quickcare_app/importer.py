@@ -0,0 +1,172 @@
+"""
+Dori katalogi va zaxirasini fayldan ommaviy yuklash (CSV yoki NDJSON).
+
+Fayl qatorma-qator o'qiladi va batch_size tadan partiyalab yoziladi, shuning uchun xotira fayl
+hajmiga bog'liq emas. Har bir qator MedicineImportSerializer qoidalari bilan tekshiriladi;
+xato qatorlar tashlab ketiladi va (qator raqami, xatolar) sifatida hisobotga tushadi.
+
+- Medicine: name bo'yicha upsert — bulk_create(update_conflicts=True, unique_fields=["name"]).
+  Faylda berilmagan ustunlar mavjud dorida o'zgarmaydi; qidiruv indeksi partiya bo'yicha yangilanadi.
+- Pharmacy: "stock" ustuni dorining birinchi zaxira qatoridagi qoldiqni belgilaydi (qator bo'lmasa
+  yaratiladi); pk bo'yicha bulk_create(update_conflicts=True). Farq InventoryMovement jurnaliga
+  ("receipt" / "adjustment") yoziladi, "kam qolgan" to'plami (LowStockEntry) yangilanadi.
+
+Har bir partiya o'z tranzaksiyasida: xato partiyagacha yuklanganlar saqlanib qoladi.
+"""
+import csv
+import json
+from collections import defaultdict
+from itertools import islice
+
+from django.db import transaction
+from rest_framework import serializers
+
+from quickcare_app.search import search_backend
+
+FORMATS = ("csv", "ndjson")
+IMPORT_NOTE = "Katalog importi"
+
+
+def detect_format(filename):
+    """Fayl kengaytmasidan format: .csv -> csv, .ndjson/.jsonl -> ndjson"""
+    name = (filename or "").lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return None
+
+
+def read_rows(stream, fmt):
+    """
+    Matnli oqimdan (qator raqami, dict) juftliklari. Buzilgan NDJSON qatori uchun dict o'rniga
+    xato matni (str) qaytariladi. Bo'sh CSV kataklari berilmagan deb hisoblanadi.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, {
+                key.strip(): value.strip() for key, value in row.items()
+                if key and value is not None and value.strip() != ""
+            }
+        return
+
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield number, f"JSON xatosi: {e}"
+            continue
+        yield number, row if isinstance(row, dict) else "Qator JSON obyekt bo'lishi kerak"
+
+
+class CatalogImport:
+    """Bitta import: hisoblagichlar va xato qatorlar (faqat birinchi max_errors tasi saqlanadi)"""
+
+    def __init__(self, batch_size=500, max_errors=1000):
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self.created = 0
+        self.updated = 0
+        self.stock_updated = 0
+        self.failed = 0
+        self.errors = []
+
+    def summary(self):
+        return {
+            "created": self.created,
+            "updated": self.updated,
+            "stock_updated": self.stock_updated,
+            "failed": self.failed,
+            "errors": self.errors,
+        }
+
+    def run(self, rows):
+        """rows — read_rows() natijasi. Xato qatorlarni (qator, xatolar) ko'rinishida darhol beradi"""
+        from quickcare_app.serializers import MedicineImportSerializer
+
+        validator = MedicineImportSerializer()
+        rows = iter(rows)
+        while batch := list(islice(rows, self.batch_size)):
+            valid = []
+            for line, row in batch:
+                if isinstance(row, str):
+                    errors = {"non_field_errors": [row]}
+                else:
+                    try:
+                        valid.append(validator.run_validation(row))
+                        continue
+                    except serializers.ValidationError as e:
+                        errors = e.detail
+                self.failed += 1
+                if len(self.errors) < self.max_errors:
+                    self.errors.append({"line": line, "errors": errors})
+                yield line, errors
+            if valid:
+                self._write(valid)
+
+    def _write(self, rows):
+        from quickcare_app.models import Medicine, Pharmacy, InventoryMovement, LowStockEntry
+
+        # Bir partiyada bir xil nom takrorlansa oxirgisi qoladi
+        by_name = {row["name"]: row for row in rows}
+        with transaction.atomic():
+            existing = set(Medicine.objects.filter(name__in=by_name).values_list("name", flat=True))
+            # Berilgan ustunlar to'plami bo'yicha guruhlanadi: berilmagan ustun mavjud qiymatni o'chirmasin
+            groups = defaultdict(list)
+            for name, row in by_name.items():
+                fields = {key: value for key, value in row.items() if key != "stock"}
+                groups[tuple(sorted(set(fields) - {"name"}))].append(Medicine(**fields))
+            for update_fields, medicines in groups.items():
+                if update_fields:
+                    Medicine.objects.bulk_create(
+                        medicines, update_conflicts=True, unique_fields=["name"], update_fields=list(update_fields)
+                    )
+                else:
+                    Medicine.objects.bulk_create(medicines, ignore_conflicts=True)
+            # bulk_create save() ni chaqirmaydi: qidiruv indeksi partiya bo'yicha yangilanadi
+            search_backend().update_many(
+                Medicine.objects.filter(name__in=by_name).values_list("pk", "name", "description")
+            )
+            self.created += len(by_name.keys() - existing)
+            self.updated += len(by_name.keys() & existing)
+            # Chegarasi o'zgargan dorilarning zaxira qatorlari "kam qolgan" to'plamida qayta tekshiriladi
+            relevelled = [name for name, row in by_name.items() if "reorder_level" in row]
+            LowStockEntry.refresh(
+                Pharmacy.objects.filter(medicine__name__in=relevelled).values_list("pk", flat=True)
+            )
+
+            stocks = {name: row["stock"] for name, row in by_name.items() if row.get("stock") is not None}
+            if not stocks:
+                return
+            medicine_ids = dict(Medicine.objects.filter(name__in=stocks).values_list("name", "pk"))
+            # Har bir dorining birinchi (eng kichik id) zaxira qatori; PostgreSQL'da qatorlar qulflanadi
+            current = {}
+            for pk, medicine_id, stock in Pharmacy.objects.select_for_update().filter(
+                medicine_id__in=medicine_ids.values()
+            ).order_by("-id").values_list("pk", "medicine_id", "stock"):
+                current[medicine_id] = (pk, stock)
+
+            changes = []
+            for name, stock in stocks.items():
+                medicine_id = medicine_ids[name]
+                if medicine_id in current:
+                    pk, old = current[medicine_id]
+                    if old != stock:
+                        changes.append((Pharmacy(pk=pk, medicine_id=medicine_id, stock=stock), "adjustment", stock - old))
+                else:
+                    changes.append((Pharmacy(medicine_id=medicine_id, stock=stock), "receipt", stock))
+            if not changes:
+                return
+            pharmacies = [pharmacy for pharmacy, _, _ in changes]
+            Pharmacy.objects.bulk_create(
+                pharmacies, update_conflicts=True, unique_fields=["id"], update_fields=["stock"]
+            )
+            InventoryMovement.objects.bulk_create(
+                InventoryMovement(pharmacy_id=pharmacy.pk, kind=kind, delta=delta, note=IMPORT_NOTE)
+                for pharmacy, kind, delta in changes if delta
+            )
+            LowStockEntry.refresh(pharmacy.pk for pharmacy, _, _ in changes)
+            self.stock_updated += len(changes)
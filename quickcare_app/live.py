@@ -0,0 +1,158 @@
+"""
+Jonli navbat tablosi: shifokor navbatidagi o'zgarishlarni Server-Sent Events orqali yuborish.
+
+Mijozlar list_my_queues / next_patient ni qayta-qayta so'rash o'rniga
+/api/v1/queue/stream/<doctor_id>/ ga ulanib, faqat o'zgarishlarni (delta) oladi:
+
+    {"event": "added", "id": 12, "position": 5, "status": "waiting"}
+    {"event": "status", "id": 9, "position": 1, "status": "in_progress"}
+    {"event": "cancelled", "id": 10, "position": 2}   # 2 dan keyingi kutayotganlar bittaga oldinga siljiydi
+
+Xabarlarda bemorning shaxsiy ma'lumotlari yo'q, lekin ulanish API bilan bir xil autentifikatsiyadan
+o'tadi (REST_FRAMEWORK DEFAULT_AUTHENTICATION_CLASSES: JWT yoki Basic); aks holda 401. Kutish zalidagi
+ekranlar ham o'z hisobining tokeni bilan ulanadi.
+Pub/sub bitta jarayon ichida ishlaydi (bir nechta worker uchun tashqi broker kerak bo'ladi).
+"""
+import asyncio
+import io
+import json
+import re
+import threading
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+
+STREAM_PATH = re.compile(r"^/api/v1/queue/stream/(?P<doctor_id>\d+)/$")
+HEARTBEAT_SECONDS = 15
+SUBSCRIBER_BUFFER = 100
+
+
+class QueueBroker:
+    """Jarayon ichidagi pub/sub: har bir obunachi o'z event loop'idagi asyncio.Queue orqali xabar oladi"""
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, doctor_id):
+        subscription = (asyncio.get_running_loop(), asyncio.Queue(maxsize=SUBSCRIBER_BUFFER))
+        with self._lock:
+            self._subscribers[doctor_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, doctor_id, subscription):
+        with self._lock:
+            self._subscribers[doctor_id].discard(subscription)
+            if not self._subscribers[doctor_id]:
+                del self._subscribers[doctor_id]
+
+    def publish(self, doctor_id, event):
+        """Istalgan oqimdan chaqirish mumkin (sinxron view'lar ham)"""
+        with self._lock:
+            subscriptions = list(self._subscribers.get(doctor_id, ()))
+        for loop, events in subscriptions:
+            loop.call_soon_threadsafe(self._deliver, events, event)
+
+    @staticmethod
+    def _deliver(events, event):
+        if events.full():
+            # Sekin mijoz butun tizimni ushlab turmasligi uchun eng eski xabar tashlanadi
+            events.get_nowait()
+        events.put_nowait(event)
+
+
+broker = QueueBroker()
+
+
+def publish_queue_event(doctor_id, event, **data):
+    """O'zgarish faqat tranzaksiya muvaffaqiyatli yakunlangandan keyin yuboriladi"""
+    payload = {"event": event, **data}
+    transaction.on_commit(lambda: broker.publish(doctor_id, payload))
+
+
+async def queue_stream(scope, receive, send, doctor_id):
+    """Bitta shifokor navbati uchun SSE oqimi"""
+    subscription = broker.subscribe(doctor_id)
+    _, events = subscription
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [
+            (b"content-type", b"text/event-stream"),
+            (b"cache-control", b"no-cache"),
+        ],
+    })
+
+    disconnected = asyncio.ensure_future(_wait_for_disconnect(receive))
+    try:
+        while not disconnected.done():
+            next_event = asyncio.ensure_future(events.get())
+            done, _ = await asyncio.wait(
+                {next_event, disconnected}, timeout=HEARTBEAT_SECONDS, return_when=asyncio.FIRST_COMPLETED
+            )
+            if next_event in done:
+                body = f"data: {json.dumps(next_event.result())}\n\n"
+            else:
+                next_event.cancel()
+                if disconnected in done:
+                    break
+                body = ": ping\n\n"
+            await send({"type": "http.response.body", "body": body.encode(), "more_body": True})
+    finally:
+        broker.unsubscribe(doctor_id, subscription)
+        disconnected.cancel()
+
+
+async def _wait_for_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+def authenticate_stream(scope):
+    """Oqim so'rovini DRF autentifikatorlari bilan tekshirish: foydalanuvchi yoki None"""
+    from django.core.handlers.asgi import ASGIRequest
+    from rest_framework.exceptions import APIException
+    from rest_framework.request import Request
+    from rest_framework.settings import api_settings
+
+    request = Request(
+        ASGIRequest(scope, io.BytesIO()),
+        authenticators=[authenticator() for authenticator in api_settings.DEFAULT_AUTHENTICATION_CLASSES],
+    )
+    try:
+        user = request.user
+    except APIException:
+        return None
+    return user if user.is_authenticated else None
+
+
+async def _unauthorized(send):
+    from rest_framework.exceptions import NotAuthenticated
+
+    await send({
+        "type": "http.response.start",
+        "status": 401,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"www-authenticate", b'Bearer realm="api"'),
+        ],
+    })
+    body = json.dumps({"detail": str(NotAuthenticated.default_detail)})
+    await send({"type": "http.response.body", "body": body.encode()})
+
+
+def live_queue_router(django_application):
+    """Oqim manzilini to'g'ridan-to'g'ri ASGI darajasida, qolganini Django'ga yo'naltiradi"""
+
+    async def application(scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "GET":
+            match = STREAM_PATH.match(scope["path"])
+            if match:
+                # Obuna faqat autentifikatsiyadan keyin
+                if await sync_to_async(authenticate_stream)(scope) is None:
+                    return await _unauthorized(send)
+                return await queue_stream(scope, receive, send, int(match["doctor_id"]))
+        return await django_application(scope, receive, send)
+
+    return application
@@ -0,0 +1,47 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.timezone import now
+
+from quickcare_app.models import Queue, QueueArchive, day_bounds
+
+
+class Command(BaseCommand):
+    help = "O'tgan kunlar navbatini QueueArchive jadvaliga partiyalab ko'chiradi"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--before",
+            help="Shu sanadan (YYYY-MM-DD) oldingi kunlar arxivlanadi. Standart: bugun",
+        )
+        parser.add_argument("--batch-size", type=int, default=500, help="Bitta tranzaksiyadagi qatorlar soni")
+        parser.add_argument(
+            "--sleep", type=float, default=0,
+            help="Partiyalar orasidagi tanaffus (soniya), boshqa yozuvchilarga navbat berish uchun",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size musbat bo'lishi kerak")
+
+        if options["before"]:
+            try:
+                day = datetime.date.fromisoformat(options["before"])
+            except ValueError:
+                raise CommandError("Noto'g'ri sana formati. YYYY-MM-DD formatida kiriting.")
+        else:
+            day = now().date()
+        cutoff, _ = day_bounds(day)
+
+        total = Queue.objects.filter(created_at__lt=cutoff).count()
+        self.stdout.write(f"{day} dan oldingi {total} ta navbat arxivlanadi")
+
+        moved = 0
+        for count in QueueArchive.archive_before(cutoff, batch_size=options["batch_size"]):
+            moved += count
+            self.stdout.write(f"  {moved}/{total}")
+            if options["sleep"]:
+                time.sleep(options["sleep"])
+
+        self.stdout.write(self.style.SUCCESS(f"Arxivga ko'chirildi: {moved}"))
@@ -0,0 +1,28 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from quickcare_app.models import InventoryMovement
+
+
+class Command(BaseCommand):
+    help = "Eski zaxira harakatlarini har bir dori qatori uchun bitta snapshot'ga yig'adi"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--keep-days", type=int, default=90, help="Shuncha kunlik harakatlar jurnalda batafsil qoladi"
+        )
+
+    def handle(self, *args, **options):
+        if options["keep_days"] < 0:
+            raise CommandError("--keep-days manfiy bo'lmasligi kerak")
+
+        before = timezone.now() - datetime.timedelta(days=options["keep_days"])
+        snapshots = deleted = 0
+        for pharmacy_id, count in InventoryMovement.compact(before):
+            snapshots += 1
+            deleted += count
+            self.stdout.write(f"  #{pharmacy_id}: {count}")
+
+        self.stdout.write(self.style.SUCCESS(f"Snapshot: {snapshots}, yig'ilgan harakatlar: {deleted}"))
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from quickcare_app.delivery import load_transports, deliver
+from quickcare_app.models import NotificationDelivery
+
+
+class Command(BaseCommand):
+    help = "Bildirishnomalar outbox'ini partiyalab olib, SMS/Telegram/Email transportlari orqali yetkazadi"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100, help="Bir marta band qilinadigan vazifalar soni")
+        parser.add_argument("--once", action="store_true", help="Navbat bo'shaguncha ishlab, to'xtash")
+        parser.add_argument("--poll", type=float, default=5, help="Navbat bo'sh bo'lganda kutish (soniya)")
+        parser.add_argument(
+            "--lease", type=int, default=NotificationDelivery.LEASE_SECONDS,
+            help="Shu vaqtdan keyin yakunlanmagan vazifa qayta olinadi (soniya)",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size musbat bo'lishi kerak")
+
+        transports = load_transports()
+        totals = [0, 0, 0]
+        try:
+            while True:
+                deliveries = NotificationDelivery.claim(options["batch_size"], lease_seconds=options["lease"])
+                if not deliveries:
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll"])
+                    continue
+
+                counts = deliver(deliveries, transports)
+                totals = [total + count for total, count in zip(totals, counts)]
+                self.stdout.write("yuborildi={} qayta={} xato={}".format(*counts))
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS("Jami: yuborildi={} qayta={} xato={}".format(*totals)))
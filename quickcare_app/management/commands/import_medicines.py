@@ -0,0 +1,34 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from quickcare_app.importer import FORMATS, CatalogImport, detect_format, read_rows
+
+
+class Command(BaseCommand):
+    help = "Dori katalogi va zaxirasini CSV / NDJSON fayldan partiyalab yuklaydi"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Fayl yo'li (.csv, .ndjson yoki .jsonl)")
+        parser.add_argument("--format", choices=FORMATS, help="Kengaytmadan aniqlanmasa fayl formati")
+        parser.add_argument("--batch-size", type=int, default=500, help="Bitta tranzaksiyadagi qatorlar soni")
+        parser.add_argument("--max-errors", type=int, default=1000, help="Hisobotda saqlanadigan xatolar soni")
+
+    def handle(self, *args, **options):
+        fmt = options["format"] or detect_format(options["path"])
+        if fmt is None:
+            raise CommandError("Formatni aniqlab bo'lmadi: --format csv|ndjson kiriting")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size musbat bo'lishi kerak")
+
+        job = CatalogImport(batch_size=options["batch_size"], max_errors=options["max_errors"])
+        try:
+            with open(options["path"], encoding="utf-8-sig", newline="") as stream:
+                for line, errors in job.run(read_rows(stream, fmt)):
+                    self.stderr.write(f"  {line}-qator: {json.dumps(errors, ensure_ascii=False)}")
+        except OSError as e:
+            raise CommandError(f"Faylni o'qib bo'lmadi: {e}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Yangi: {job.created}, yangilangan: {job.updated}, zaxira: {job.stock_updated}, xato: {job.failed}"
+        ))
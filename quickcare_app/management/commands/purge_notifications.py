@@ -0,0 +1,39 @@
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from quickcare_app.models import Notification
+
+
+class Command(BaseCommand):
+    help = "Saqlash muddati (NOTIFICATION_RETENTION_DAYS) o'tgan o'qilgan bildirishnomalarni partiyalab o'chiradi"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Bitta tranzaksiyadagi qatorlar soni")
+        parser.add_argument(
+            "--sleep", type=float, default=0,
+            help="Partiyalar orasidagi tanaffus (soniya), boshqa yozuvchilarga navbat berish uchun",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="O'chirmasdan, faqat sonini ko'rsatish")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size musbat bo'lishi kerak")
+
+        if options["dry_run"]:
+            for notification_type, cutoff in Notification.retention_cutoffs().items():
+                count = Notification.objects.filter(
+                    notification_type=notification_type, is_read=True, sent_at__lt=cutoff
+                ).count()
+                self.stdout.write(f"{notification_type}: {cutoff:%Y-%m-%d} dan oldingi {count} ta")
+            return
+
+        deleted = Counter()
+        for notification_type, count in Notification.purge_expired(batch_size=options["batch_size"]):
+            deleted[notification_type] += count
+            self.stdout.write(f"  {notification_type}: {deleted[notification_type]}")
+            if options["sleep"]:
+                time.sleep(options["sleep"])
+
+        self.stdout.write(self.style.SUCCESS(f"O'chirildi: {sum(deleted.values())}"))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from quickcare_app.search import search_backend
+
+
+class Command(BaseCommand):
+    help = "Dori qidiruvi indeksini Medicine jadvalidan qaytadan quradi (ommaviy UPDATE/DELETE'dan keyin)"
+
+    def handle(self, *args, **options):
+        backend = search_backend()
+        backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Qidiruv indeksi qayta qurildi ({type(backend).__name__})"))
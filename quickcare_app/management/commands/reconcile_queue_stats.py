@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from quickcare_app.models import Queue, DailyQueueCounter
+
+
+class Command(BaseCommand):
+    help = "Kunlik navbat hisoblagichlarini xom navbat qatorlaridan qayta hisoblab, farqlarni ko'rsatadi"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fix", action="store_true", help="Farq topilsa, hisoblagichni tuzatish")
+
+    def handle(self, *args, **options):
+        fields = DailyQueueCounter.COUNTER_FIELDS
+        expected = {
+            (row.pop("doctor_id"), row.pop("day")): row
+            for row in Queue.objects.annotate(
+                day=TruncDate("created_at", tzinfo=timezone.get_current_timezone())
+            ).values("doctor_id", "day").annotate(**DailyQueueCounter.aggregates()).order_by()
+        }
+        stored = {
+            (counter.doctor_id, counter.day): counter
+            for counter in DailyQueueCounter.objects.all()
+        }
+
+        drift = 0
+        for key in sorted(expected.keys() | stored.keys()):
+            values = expected.get(key, dict.fromkeys(fields, 0))
+            counter = stored.get(key)
+            actual = {field: getattr(counter, field) for field in fields} if counter else None
+            if actual == values:
+                continue
+
+            drift += 1
+            doctor_id, day = key
+            self.stdout.write(f"shifokor={doctor_id} kun={day}: saqlangan={actual} haqiqiy={values}")
+            if options["fix"]:
+                DailyQueueCounter.objects.update_or_create(doctor_id=doctor_id, day=day, defaults=values)
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("Hisoblagichlar to'g'ri"))
+        elif options["fix"]:
+            self.stdout.write(self.style.SUCCESS(f"Tuzatildi: {drift}"))
+        else:
+            self.stdout.write(self.style.WARNING(f"Farqlar: {drift} (tuzatish uchun --fix)"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from quickcare_app.models import StockReservation
+
+
+class Command(BaseCommand):
+    help = "Muddati o'tgan (retseptga yozilmay qolgan) zaxira bandlarini zaxiraga qaytaradi"
+
+    def handle(self, *args, **options):
+        released = StockReservation.release_expired()
+        self.stdout.write(self.style.SUCCESS(f"Qaytarildi: {released}"))
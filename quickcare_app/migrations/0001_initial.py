@@ -0,0 +1,230 @@
+# Generated by Django 5.1.7 on 2026-10-18 16:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Ambulance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('plate_number', models.CharField(max_length=20, unique=True, verbose_name='Davlat raqami')),
+                ('status', models.CharField(choices=[('available', 'Mavjud'), ('on_duty', 'Xizmatda'), ('unavailable', 'Mavjud emas')], default='available', max_length=20, verbose_name='Holati')),
+                ('current_location', models.CharField(blank=True, max_length=255, null=True, verbose_name='Joriy manzil')),
+            ],
+            options={
+                'verbose_name': 'Tez yordam',
+                'verbose_name_plural': 'Tez yordamlar',
+                'ordering': ['status', 'plate_number'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Department',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name="bo'limlar")),
+                ('description', models.TextField()),
+            ],
+            options={
+                'verbose_name': "bo'lim",
+                'verbose_name_plural': "bo'limlar",
+            },
+        ),
+        migrations.CreateModel(
+            name='Medicine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('usage', models.CharField(choices=[('painkiller', 'Painkiller'), ('antibiotic', 'Antibiotic'), ('anti-inflammatory', 'Anti-inflammatory'), ('other', 'Other')], default='other', max_length=20)),
+                ('side_effects', models.TextField(blank=True, null=True)),
+                ('price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('is_available', models.BooleanField(default=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Patient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('full_name', models.CharField(max_length=200, verbose_name="ism sha'rifi")),
+                ('phone_number', models.CharField(max_length=15, unique=True, verbose_name='telefon raqami')),
+                ('birth_date', models.DateField(verbose_name="tug'ilgan sanasi")),
+                ('address', models.TextField(blank=True, null=True, verbose_name='manzili')),
+                ('emergency_contact', models.CharField(blank=True, max_length=15, null=True, verbose_name="favqulotda qo'ng'iroq")),
+                ('medical_history', models.TextField(blank=True, null=True, verbose_name='kasallik tarixi')),
+                ('allergies', models.TextField(blank=True, null=True, verbose_name='allergiya')),
+                ('chronic_diseases', models.TextField(blank=True, null=True, verbose_name='surunkali kasalliklar')),
+                ('complaints', models.TextField(blank=True, null=True, verbose_name='shikoyatlar')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='yaratilgan sanasi')),
+            ],
+            options={
+                'verbose_name': 'bemor',
+                'verbose_name_plural': 'bemorlar',
+            },
+        ),
+        migrations.CreateModel(
+            name='Doctor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('full_name', models.CharField(default=None, max_length=150, verbose_name='shifokor')),
+                ('specialization', models.CharField(max_length=255)),
+                ('phone', models.CharField(max_length=15, unique=True)),
+                ('available', models.BooleanField(default=True)),
+                ('department', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='quickcare_app.department')),
+            ],
+            options={
+                'verbose_name': 'shifokor',
+                'verbose_name_plural': 'shifokorlar',
+            },
+        ),
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('message', models.TextField(verbose_name='Xabar matni')),
+                ('sent_at', models.DateTimeField(auto_now_add=True, verbose_name='Yuborilgan vaqt')),
+                ('is_read', models.BooleanField(default=False, verbose_name="O'qilganmi?")),
+                ('notification_type', models.CharField(choices=[('queue_update', 'Queue Update'), ('appointment_reminder', 'Appointment Reminder'), ('general', 'General Message'), ('emergency_alert', 'Emergency Alert')], default='queue_update', max_length=20)),
+                ('via_sms', models.BooleanField(default=True, verbose_name='SMS orqali')),
+                ('via_telegram', models.BooleanField(default=True, verbose_name='Telegram orqali')),
+                ('via_email', models.BooleanField(default=False, verbose_name='Email orqali')),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='quickcare_app.patient', verbose_name='Qabul qiluvchi')),
+            ],
+            options={
+                'verbose_name': 'bildirishnoma',
+                'verbose_name_plural': 'bildirishnomalar',
+            },
+        ),
+        migrations.CreateModel(
+            name='Emergency',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('description', models.TextField(verbose_name='Tavsif')),
+                ('status', models.CharField(choices=[('pending', 'Kutilmoqda'), ('in_progress', 'Jarayonda'), ('resolved', 'Hal qilindi')], default='pending', max_length=20, verbose_name='Holat')),
+                ('ambulance_requested', models.BooleanField(default=True, verbose_name='Tez yordam')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Yaratilgan vaqt')),
+                ('doctor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='quickcare_app.doctor', verbose_name='Shifokor')),
+                ('patient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='quickcare_app.patient', verbose_name='Bemor')),
+            ],
+            options={
+                'verbose_name': 'Jiddiy holat',
+                'verbose_name_plural': 'Jiddiy holatlar',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Comment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='quickcare_app.doctor')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='quickcare_app.patient')),
+            ],
+            options={
+                'verbose_name': 'izoh',
+                'verbose_name_plural': 'izohlar',
+            },
+        ),
+        migrations.CreateModel(
+            name='PatientMedicine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dosage', models.CharField(max_length=50)),
+                ('prescribed_at', models.DateTimeField(auto_now_add=True)),
+                ('medicine', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='quickcare_app.medicine')),
+                ('patient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='quickcare_app.patient')),
+            ],
+            options={
+                'verbose_name': 'bemor dorisi',
+                'verbose_name_plural': 'bemorlar dorilari',
+            },
+        ),
+        migrations.CreateModel(
+            name='Pharmacy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stock', models.IntegerField(default=0)),
+                ('medicine', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='quickcare_app.medicine')),
+            ],
+            options={
+                'verbose_name': 'dori',
+                'verbose_name_plural': 'dorilar',
+            },
+        ),
+        migrations.CreateModel(
+            name='Review',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rating', models.IntegerField(choices=[(1, '1'), (2, '2'), (3, '3'), (4, '4'), (5, '5')], default=5)),
+                ('comment', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('doctor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='quickcare_app.doctor')),
+                ('patient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='quickcare_app.patient')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Reply',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('response_text', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='quickcare_app.doctor')),
+                ('review', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='quickcare_app.review')),
+            ],
+            options={
+                'verbose_name': 'fikr qaytarish',
+                'verbose_name_plural': 'fikr qaytarishlar',
+            },
+        ),
+        migrations.CreateModel(
+            name='Room',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('room_number', models.IntegerField(verbose_name='xona raqami')),
+                ('capacity', models.IntegerField(default=1)),
+                ('department', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='quickcare_app.department', verbose_name="tegishli bo'lim")),
+            ],
+            options={
+                'verbose_name': 'xona',
+                'verbose_name_plural': 'xonalar',
+            },
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='room',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='quickcare_app.room'),
+        ),
+        migrations.CreateModel(
+            name='Queue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('status', models.CharField(choices=[('waiting', 'Waiting'), ('in_progress', 'In Progress'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], default='waiting', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='quickcare_app.doctor')),
+                ('patient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='quickcare_app.patient')),
+                ('room', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='quickcare_app.room')),
+            ],
+            options={
+                'verbose_name': 'navbat',
+                'verbose_name_plural': 'navbatlar',
+            },
+        ),
+        migrations.AddField(
+            model_name='doctor',
+            name='room',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='quickcare_app.room'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.7 on 2026-10-18 16:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quickcare_app', '0002_queue_counter_and_user_links'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='queue',
+            index=models.Index(fields=['doctor', 'status', 'position'], name='queue_doctor_status_pos_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='queue',
+            index=models.Index(fields=['doctor', 'status', 'created_at'], name='queue_doctor_status_day_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='queue',
+            index=models.Index(fields=['doctor', 'created_at'], name='queue_doctor_day_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.7 on 2026-10-18 16:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quickcare_app', '0003_queue_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueueArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.BigIntegerField(unique=True)),
+                ('position', models.PositiveIntegerField()),
+                ('status', models.CharField(max_length=20)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('doctor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='quickcare_app.doctor')),
+                ('patient', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='quickcare_app.patient')),
+                ('room', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='quickcare_app.room')),
+            ],
+            options={
+                'verbose_name': 'navbat arxivi',
+                'verbose_name_plural': 'navbatlar arxivi',
+                'indexes': [models.Index(fields=['doctor', 'created_at'], name='queue_archive_doctor_day_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.7 on 2026-10-18 16:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quickcare_app', '0004_queue_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailyqueuecounter',
+            name='completed_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='dailyqueuecounter',
+            name='in_progress_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='dailyqueuecounter',
+            name='waiting_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.1.7 on 2026-10-18 16:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quickcare_app', '0005_queue_counter_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='queue',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='queue',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='queuearchive',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='queuearchive',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='ConsultationEstimate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mean_minutes', models.FloatField(default=15)),
+                ('variance', models.FloatField(default=0)),
+                ('samples', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('doctor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='consultation_estimate', to='quickcare_app.doctor')),
+            ],
+            options={
+                'verbose_name': 'qabul davomiyligi bahosi',
+                'verbose_name_plural': 'qabul davomiyligi baholari',
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.7 on 2026-10-18 16:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quickcare_app', '0006_consultation_estimates'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='emergency',
+            index=models.Index(fields=['created_at', 'id'], name='emergency_cursor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', 'sent_at', 'id'], name='notification_cursor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='patientmedicine',
+            index=models.Index(fields=['prescribed_at', 'id'], name='patientmedicine_cursor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='queue',
+            index=models.Index(fields=['created_at', 'id'], name='queue_cursor_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.7 on 2026-10-18 16:58
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quickcare_app', '0007_cursor_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('channel', models.CharField(choices=[('sms', 'SMS'), ('telegram', 'Telegram'), ('email', 'Email')], max_length=10)),
+                ('status', models.CharField(choices=[('pending', 'Kutilmoqda'), ('processing', 'Yuborilmoqda'), ('sent', 'Yuborildi'), ('failed', 'Yuborilmadi')], default='pending', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('claimed_by', models.CharField(blank=True, default='', max_length=32)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('notification', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='quickcare_app.notification')),
+            ],
+            options={
+                'verbose_name': 'bildirishnoma yetkazilishi',
+                'verbose_name_plural': 'bildirishnomalar yetkazilishi',
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='delivery_due_idx')],
+                'unique_together': {('notification', 'channel')},
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.7 on 2026-10-18 17:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quickcare_app', '0008_notification_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnreadNotificationCounter',
+            fields=[
+                ('recipient', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='unread_counter', serialize=False, to='quickcare_app.patient')),
+                ('unread', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': "o'qilmagan bildirishnomalar soni",
+                'verbose_name_plural': "o'qilmagan bildirishnomalar soni",
+            },
+        ),
+    ]
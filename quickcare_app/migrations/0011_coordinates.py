@@ -0,0 +1,33 @@
+# Generated by Django 5.1.7 on 2026-10-18 17:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quickcare_app', '0010_notification_retention_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ambulance',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True, verbose_name='Kenglik'),
+        ),
+        migrations.AddField(
+            model_name='ambulance',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True, verbose_name='Uzunlik'),
+        ),
+        migrations.AddField(
+            model_name='patient',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True, verbose_name='manzil kengligi'),
+        ),
+        migrations.AddField(
+            model_name='patient',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True, verbose_name='manzil uzunligi'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.7 on 2026-10-18 17:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quickcare_app', '0011_coordinates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emergency',
+            name='ambulance',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='emergencies', to='quickcare_app.ambulance', verbose_name='Tez yordam mashinasi'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.7 on 2026-10-18 17:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quickcare_app', '0012_emergency_ambulance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AmbulancePosition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('latitude', models.FloatField(verbose_name='Kenglik')),
+                ('longitude', models.FloatField(verbose_name='Uzunlik')),
+                ('speed', models.FloatField(blank=True, null=True, verbose_name='Tezlik (km/soat)')),
+                ('recorded_at', models.DateTimeField(verbose_name='Qayd etilgan vaqt')),
+                ('ambulance', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='positions', to='quickcare_app.ambulance', verbose_name='Tez yordam')),
+            ],
+            options={
+                'verbose_name': 'Tez yordam joylashuvi',
+                'verbose_name_plural': 'Tez yordam joylashuvlari',
+                'indexes': [models.Index(fields=['ambulance', 'recorded_at'], name='ambulanceposition_track_idx')],
+            },
+        ),
+    ]
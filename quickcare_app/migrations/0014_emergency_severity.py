@@ -0,0 +1,22 @@
+# Generated by Django 5.1.7 on 2026-10-18 17:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quickcare_app', '0013_ambulance_position'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emergency',
+            name='severity',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'Hayotga xavfli'), (2, 'Shoshilinch'), (3, 'Odatiy'), (4, 'Yengil')], default=3, verbose_name="Og'irlik darajasi"),
+        ),
+        migrations.AddIndex(
+            model_name='emergency',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['severity', 'created_at', 'id'], name='emergency_triage_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.1.7 on 2026-10-18 17:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quickcare_app', '0014_emergency_severity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField()),
+                ('status', models.CharField(choices=[('held', 'Band qilingan'), ('committed', 'Retseptga yozilgan'), ('released', 'Qaytarilgan')], default='held', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'zaxira bandi',
+                'verbose_name_plural': 'zaxira bandlari',
+            },
+        ),
+        migrations.AddField(
+            model_name='patientmedicine',
+            name='quantity',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddConstraint(
+            model_name='pharmacy',
+            constraint=models.CheckConstraint(condition=models.Q(('stock__gte', 0)), name='pharmacy_stock_non_negative'),
+        ),
+        migrations.AddField(
+            model_name='stockreservation',
+            name='pharmacy',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='quickcare_app.pharmacy'),
+        ),
+        migrations.AddField(
+            model_name='stockreservation',
+            name='prescription',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reservation', to='quickcare_app.patientmedicine'),
+        ),
+        migrations.AddIndex(
+            model_name='stockreservation',
+            index=models.Index(fields=['status', 'expires_at'], name='reservation_expiry_idx'),
+        ),
+    ]
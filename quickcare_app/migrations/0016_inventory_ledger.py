@@ -0,0 +1,58 @@
+# Generated by Django 5.1.7 on 2026-10-18 17:24
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def opening_snapshots(apps, schema_editor):
+    """Jurnaldan oldingi qoldiqlar: stock = snapshot + harakatlar bo'lishi uchun boshlang'ich snapshot"""
+    Pharmacy = apps.get_model('quickcare_app', 'Pharmacy')
+    InventorySnapshot = apps.get_model('quickcare_app', 'InventorySnapshot')
+    now = django.utils.timezone.now()
+    InventorySnapshot.objects.bulk_create(
+        InventorySnapshot(pharmacy_id=pk, stock=stock, taken_at=now)
+        for pk, stock in Pharmacy.objects.exclude(stock=0).values_list('pk', 'stock').iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quickcare_app', '0015_stock_reservation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('receipt', 'Kirim'), ('dispense', 'Chiqim'), ('release', 'Band qaytarildi'), ('adjustment', 'Inventarizatsiya')], max_length=10)),
+                ('delta', models.IntegerField()),
+                ('note', models.CharField(blank=True, default='', max_length=255)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('pharmacy', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movements', to='quickcare_app.pharmacy')),
+                ('reservation', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='movements', to='quickcare_app.stockreservation')),
+            ],
+            options={
+                'verbose_name': 'zaxira harakati',
+                'verbose_name_plural': 'zaxira harakatlari',
+                'indexes': [models.Index(fields=['pharmacy', 'created_at'], name='movement_pharmacy_time_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='InventorySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stock', models.IntegerField()),
+                ('taken_at', models.DateTimeField()),
+                ('pharmacy', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='quickcare_app.pharmacy')),
+            ],
+            options={
+                'verbose_name': 'zaxira holati',
+                'verbose_name_plural': 'zaxira holatlari',
+                'constraints': [models.UniqueConstraint(fields=('pharmacy', 'taken_at'), name='unique_inventory_snapshot')],
+            },
+        ),
+        migrations.RunPython(opening_snapshots, migrations.RunPython.noop),
+    ]
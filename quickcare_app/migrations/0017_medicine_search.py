@@ -0,0 +1,42 @@
+from django.db import migrations
+from django.db.utils import OperationalError
+
+
+def create_search_tables(apps, schema_editor):
+    """SQLite FTS5 jadvallari (quickcare_app.search); FTS5 bo'lmasa trigram backend ishlatiladi"""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    table = apps.get_model('quickcare_app', 'Medicine')._meta.db_table
+    with schema_editor.connection.cursor() as cursor:
+        try:
+            cursor.execute(
+                "CREATE VIRTUAL TABLE medicine_fts USING fts5("
+                "name, description, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+            )
+        except OperationalError:
+            return
+        cursor.execute("CREATE VIRTUAL TABLE medicine_fts_trigram USING fts5(name, tokenize='trigram')")
+        cursor.execute(
+            f"INSERT INTO medicine_fts (rowid, name, description) "
+            f"SELECT id, name, COALESCE(description, '') FROM {table}"
+        )
+        cursor.execute(f"INSERT INTO medicine_fts_trigram (rowid, name) SELECT id, name FROM {table}")
+
+
+def drop_search_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("DROP TABLE IF EXISTS medicine_fts")
+        cursor.execute("DROP TABLE IF EXISTS medicine_fts_trigram")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quickcare_app', '0016_inventory_ledger'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_tables, drop_search_tables),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.1.7 on 2026-10-18 17:37
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def fill_low_stock(apps, schema_editor):
+    """Mavjud kam qolgan zaxiralar to'plamga ogohlantirishsiz qo'shiladi"""
+    Pharmacy = apps.get_model('quickcare_app', 'Pharmacy')
+    LowStockEntry = apps.get_model('quickcare_app', 'LowStockEntry')
+    LowStockEntry.objects.bulk_create(
+        (LowStockEntry(pharmacy_id=pk, state='out' if stock <= 0 else 'low') for pk, stock in
+         Pharmacy.objects.filter(
+             models.Q(stock__lt=models.F('medicine__reorder_level')) | models.Q(stock__lte=0)
+         ).values_list('pk', 'stock').iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quickcare_app', '0017_medicine_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='medicine',
+            name='reorder_level',
+            field=models.PositiveIntegerField(default=10, verbose_name='Buyurtma chegarasi'),
+        ),
+        migrations.CreateModel(
+            name='LowStockEntry',
+            fields=[
+                ('pharmacy', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='low_stock_entry', serialize=False, to='quickcare_app.pharmacy')),
+                ('state', models.CharField(choices=[('low', 'Kam qolgan'), ('out', 'Tugagan')], max_length=3)),
+                ('since', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'kam qolgan zaxira',
+                'verbose_name_plural': 'kam qolgan zaxiralar',
+                'indexes': [models.Index(fields=['state'], name='lowstock_state_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('low', 'Kam qolgan'), ('out', 'Tugagan')], max_length=3)),
+                ('stock', models.IntegerField()),
+                ('reorder_level', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('pharmacy', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alerts', to='quickcare_app.pharmacy')),
+            ],
+            options={
+                'verbose_name': 'zaxira ogohlantirishi',
+                'verbose_name_plural': 'zaxira ogohlantirishlari',
+            },
+        ),
+        migrations.RunPython(fill_low_stock, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.7 on 2026-10-18 17:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quickcare_app', '0018_low_stock_watchlist'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='queue',
+            index=models.Index(fields=['position', 'created_at', 'id'], name='queue_position_cursor_idx'),
+        ),
+    ]
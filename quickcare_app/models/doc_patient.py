@@ -1,8 +1,10 @@
+from django.conf import settings
 from django.db import models
 from .hospital_staff import Department, Room
 
 
 class Doctor(models.Model):
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True)
     full_name = models.CharField(max_length=150,verbose_name="shifokor", default=None)
     specialization = models.CharField(max_length=255)
     phone = models.CharField(max_length=15, unique=True)
@@ -19,10 +21,13 @@ class Doctor(models.Model):
 
 
 class Patient(models.Model):
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True)
     full_name = models.CharField(max_length=200, verbose_name="ism sha'rifi")
     phone_number = models.CharField(max_length=15, unique=True, verbose_name="telefon raqami")
     birth_date = models.DateField(verbose_name="tug'ilgan sanasi")  # Tug‘ilgan sana
     address = models.TextField(blank=True, null=True, verbose_name="manzili")
+    latitude = models.FloatField(blank=True, null=True, verbose_name="manzil kengligi")
+    longitude = models.FloatField(blank=True, null=True, verbose_name="manzil uzunligi")
     emergency_contact = models.CharField(max_length=15, blank=True, null=True, verbose_name="favqulotda qo'ng'iroq")
     medical_history = models.TextField(blank=True, null=True, verbose_name="kasallik tarixi")
     allergies = models.TextField(blank=True, null=True, verbose_name="allergiya")
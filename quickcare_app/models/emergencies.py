@@ -1,6 +1,7 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils.translation import gettext_lazy as _
 
+from quickcare_app.dispatch import ambulance_index
 from .doc_patient import Patient, Doctor
 from .misc import Notification
 
@@ -11,6 +12,13 @@ class Emergency(models.Model):
         IN_PROGRESS = 'in_progress', _('Jarayonda')
         RESOLVED = 'resolved', _('Hal qilindi')
 
+    class Severity(models.IntegerChoices):
+        # Kichik raqam — yuqori ustuvorlik (triaj darajasi)
+        CRITICAL = 1, _('Hayotga xavfli')
+        URGENT = 2, _('Shoshilinch')
+        STANDARD = 3, _('Odatiy')
+        MINOR = 4, _('Yengil')
+
     patient = models.ForeignKey(Patient, on_delete=models.CASCADE, verbose_name=_("Bemor"))
     doctor = models.ForeignKey(
         Doctor,
@@ -26,30 +34,85 @@ class Emergency(models.Model):
         default=Status.PENDING,
         verbose_name=_("Holat")
     )
+    severity = models.PositiveSmallIntegerField(
+        choices=Severity.choices,
+        default=Severity.STANDARD,
+        verbose_name=_("Og'irlik darajasi")
+    )
     ambulance_requested = models.BooleanField(default=True, verbose_name=_("Tez yordam"))
+    ambulance = models.ForeignKey(
+        'Ambulance',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='emergencies',
+        verbose_name=_("Tez yordam mashinasi")
+    )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Yaratilgan vaqt"))
 
     def __str__(self):
         return f"🚨 {self.patient.full_name} - {self.get_status_display()}"
 
-    def request_ambulance(self, ambulance=None):
-        """Tez yordam chaqirish metodi"""
-        if self.status != self.Status.PENDING:
-            raise ValueError("Faqat 'Jarayonda' bo'lgan holaydagina tez yordam chaqirish mumkin")
+    @staticmethod
+    def triage_order():
+        """Kutilayotgan holatlar triaj tartibida (emergency_triage_idx bo'yicha)"""
+        return Emergency.objects.filter(status=Emergency.Status.PENDING).order_by('severity', 'created_at', 'id')
 
-        self.ambulance_requested = True
-        self.status = self.Status.IN_PROGRESS
+    @staticmethod
+    def next_pending():
+        """
+        Eng ustuvor kutilayotgan holatni dispetcherga olish: emergency_triage_idx bo'yicha birinchi qator
+        "pending" -> "in_progress" shartli UPDATE bilan band qilinadi. Indeksli so'rov barcha worker
+        jarayonlari yaratgan holatlarni ko'radi. Boshqa so'rov ulgurgan bo'lsa keyingisiga o'tiladi.
+        Navbat bo'sh bo'lsa None.
+        """
+        while True:
+            pk = Emergency.triage_order().values_list('pk', flat=True).first()
+            if pk is None:
+                return None
+            if Emergency.objects.filter(pk=pk, status=Emergency.Status.PENDING).update(
+                status=Emergency.Status.IN_PROGRESS
+            ):
+                return Emergency.objects.select_related('patient', 'doctor', 'ambulance').get(pk=pk)
 
+    def request_ambulance(self, ambulance=None):
+        """
+        Tez yordam chaqirish metodi. Holat shartli UPDATE bilan o'zgartiriladi: parallel so'rovlardan
+        faqat bittasi "pending" holatni ushlaydi. Mashina berilsa — Ambulance.allocate orqali biriktiriladi.
+        """
         if ambulance:
-            ambulance.mark_on_duty(location=self.patient.address)
-            self.ambulance = ambulance  # agar Emergency modelda ambulance ForeignKey bo'lsa
-        self.save()
-
-        Notification.send_notification(
-            recipient=self.patient,
-            message="🚑 Tez yordam sizning manzilingizga yo'l oldi!",
-            notification_type="emergency"
-        )
+            if self.status != self.Status.PENDING:
+                raise ValueError("Faqat 'Kutilmoqda' holatidagina tez yordam chaqirish mumkin")
+            Ambulance.allocate(self, ambulance)
+            return True
+
+        with transaction.atomic():
+            updated = Emergency.objects.filter(pk=self.pk, status=self.Status.PENDING).update(
+                ambulance_requested=True, status=self.Status.IN_PROGRESS
+            )
+            if not updated:
+                raise ValueError("Faqat 'Kutilmoqda' holatidagina tez yordam chaqirish mumkin")
+            self.ambulance_requested = True
+            self.status = self.Status.IN_PROGRESS
+
+            Notification.send_notification(
+                recipient=self.patient,
+                message="🚑 Tez yordam chaqiruvi qabul qilindi!",
+                notification_type="emergency_alert"
+            )
+        return True
+
+    def resolve(self):
+        """Holatni yopish va biriktirilgan mashinani bo'shatish (bitta tranzaksiyada). Allaqachon yopilgan bo'lsa False"""
+        with transaction.atomic():
+            updated = Emergency.objects.filter(pk=self.pk).exclude(status=self.Status.RESOLVED).update(
+                status=self.Status.RESOLVED
+            )
+            if not updated:
+                return False
+            self.status = self.Status.RESOLVED
+            if self.ambulance_id:
+                self.ambulance.release()
         return True
 
     @property
@@ -61,6 +124,16 @@ class Emergency(models.Model):
         verbose_name = _("Jiddiy holat")
         verbose_name_plural = _("Jiddiy holatlar")
         ordering = ['-created_at']
+        indexes = [
+            # ro'yxat kursori (EmergencyPagination)
+            models.Index(fields=['created_at', 'id'], name='emergency_cursor_idx'),
+            # triaj navbati (triage_order): faqat kutilayotgan holatlar
+            models.Index(
+                fields=['severity', 'created_at', 'id'],
+                condition=models.Q(status='pending'),
+                name='emergency_triage_idx',
+            ),
+        ]
 
 
 class Ambulance(models.Model):
@@ -86,11 +159,154 @@ class Ambulance(models.Model):
         null=True,
         verbose_name=_("Joriy manzil")
     )
+    latitude = models.FloatField(null=True, blank=True, verbose_name=_("Kenglik"))
+    longitude = models.FloatField(null=True, blank=True, verbose_name=_("Uzunlik"))
 
     def __str__(self):
         return f"🚑 {self.plate_number} - {self.get_status_display()}"
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Holat yoki joylashuv o'zgargan bo'lishi mumkin: fazoviy indeks tranzaksiyadan keyin yangilanadi
+        ambulance_index.sync_on_commit(self.pk, self.status, self.latitude, self.longitude)
+
+    def delete(self, *args, **kwargs):
+        pk = self.pk
+        result = super().delete(*args, **kwargs)
+        transaction.on_commit(lambda: ambulance_index.remove(pk))
+        return result
+
+    def mark_on_duty(self, location=None):
+        """Mashina chaqiruvga jo'natildi"""
+        self.status = self.Status.ON_DUTY
+        if location:
+            self.current_location = location
+        self.save(update_fields=['status', 'current_location'])
+
+    def claim(self, location=None):
+        """
+        Bo'sh mashinani band qilish: "available" -> "on_duty" bitta shartli UPDATE bilan.
+        Boshqa dispetcher ulgurib qolgan bo'lsa False (hech narsa o'zgarmaydi).
+        """
+        fields = {'status': self.Status.ON_DUTY}
+        if location:
+            fields['current_location'] = location
+        if not Ambulance.objects.filter(pk=self.pk, status=self.Status.AVAILABLE).update(**fields):
+            return False
+        for name, value in fields.items():
+            setattr(self, name, value)
+        ambulance_index.sync_on_commit(self.pk, self.status, self.latitude, self.longitude)
+        return True
+
+    def release(self):
+        """Chaqiruvdan qaytgan mashinani bo'shatish (faqat "on_duty" holatidan)"""
+        if not Ambulance.objects.filter(pk=self.pk, status=self.Status.ON_DUTY).update(status=self.Status.AVAILABLE):
+            return False
+        self.status = self.Status.AVAILABLE
+        ambulance_index.sync_on_commit(self.pk, self.status, self.latitude, self.longitude)
+        return True
+
+    @staticmethod
+    def allocate(emergency, ambulance=None, location=None, k=5):
+        """
+        Mashinani favqulodda holatga biriktirish; ambulance berilmasa — bemorga eng yaqin bo'sh mashina.
+        Mashina claim() bilan band qilinadi va holat bilan shu tranzaksiyada bog'lanadi. Holatga boshqa
+        so'rov mashina biriktirib ulgurgan bo'lsa, ValueError va mashina bandligi ham bekor bo'ladi.
+        """
+        if ambulance is not None:
+            candidates = [ambulance]
+        else:
+            patient = emergency.patient
+            if patient.latitude is None or patient.longitude is None:
+                raise ValueError("Bemor manzilining koordinatasi kiritilmagan")
+            candidates = [unit for unit, _ in Ambulance.nearest_available(patient.latitude, patient.longitude, k)]
+        location = location or emergency.patient.address
+
+        with transaction.atomic():
+            # Nomzodlardan birinchi band qilinganini olamiz: raqobatda yutqazilsa keyingisiga o'tiladi
+            claimed = next((unit for unit in candidates if unit.claim(location)), None)
+            if claimed is None:
+                raise ValueError("Tez yordam jo'natish uchun mavjud emas!")
+
+            linked = Emergency.objects.filter(pk=emergency.pk, ambulance__isnull=True).exclude(
+                status=Emergency.Status.RESOLVED
+            ).update(ambulance=claimed, status=Emergency.Status.IN_PROGRESS, ambulance_requested=True)
+            if linked:
+                Notification.send_notification(
+                    recipient=emergency.patient,
+                    message=f"🚑 Tez yordam ({claimed.plate_number}) sizning manzilingizga yo'l oldi!",
+                    notification_type="emergency_alert"
+                )
+            else:
+                transaction.set_rollback(True)
+        if not linked:
+            # Band qilish bekor qilindi: obyektni bazadagi holatiga qaytaramiz
+            claimed.refresh_from_db(fields=['status', 'current_location'])
+            raise ValueError("Bu holatga allaqachon tez yordam biriktirilgan yoki holat yopilgan")
+
+        emergency.ambulance = claimed
+        emergency.status = Emergency.Status.IN_PROGRESS
+        emergency.ambulance_requested = True
+        return claimed
+
+    def mark_available(self):
+        self.status = self.Status.AVAILABLE
+        self.save(update_fields=['status'])
+
+    def mark_unavailable(self):
+        self.status = self.Status.UNAVAILABLE
+        self.save(update_fields=['status'])
+
+    def move_to(self, latitude=None, longitude=None, location=None):
+        """Joylashuvni yangilash (koordinata va/yoki matnli manzil)"""
+        fields = []
+        if latitude is not None and longitude is not None:
+            self.latitude, self.longitude = latitude, longitude
+            fields += ['latitude', 'longitude']
+        if location:
+            self.current_location = location
+            fields.append('current_location')
+        self.save(update_fields=fields)
+
+    @staticmethod
+    def nearest_available(latitude, longitude, k=5):
+        """
+        k ta eng yaqin bo'sh mashina: [(ambulance, masofa km), ...].
+        Nomzodlar xotiradagi indeksdan olinadi, holati esa bazadan bitta so'rov bilan tekshiriladi
+        (indeks boshqa jarayondagi o'zgarishlardan orqada qolishi mumkin).
+        """
+        ambulance_index.ensure_loaded()
+        candidates = ambulance_index.nearest(latitude, longitude, k * 2)
+        ambulances = Ambulance.objects.filter(status=Ambulance.Status.AVAILABLE).in_bulk(
+            [pk for _, pk in candidates]
+        )
+        return [(ambulances[pk], distance) for distance, pk in candidates if pk in ambulances][:k]
+
     class Meta:
         verbose_name = _("Tez yordam")
         verbose_name_plural = _("Tez yordamlar")
         ordering = ['status', 'plate_number']
+
+
+class AmbulancePosition(models.Model):
+    """
+    GPS trek tarixi. Faqat quickcare_app.telemetry tomonidan to'plab (bulk_create) yoziladi;
+    jonli joylashuv bu jadvaldan emas, xotiradagi buferdan va Ambulance.latitude/longitude dan o'qiladi.
+    """
+    ambulance = models.ForeignKey(
+        Ambulance, on_delete=models.CASCADE, related_name='positions', verbose_name=_("Tez yordam")
+    )
+    latitude = models.FloatField(verbose_name=_("Kenglik"))
+    longitude = models.FloatField(verbose_name=_("Uzunlik"))
+    speed = models.FloatField(null=True, blank=True, verbose_name=_("Tezlik (km/soat)"))
+    recorded_at = models.DateTimeField(verbose_name=_("Qayd etilgan vaqt"))
+
+    def __str__(self):
+        return f"📍 {self.ambulance_id} - {self.recorded_at:%Y-%m-%d %H:%M:%S}"
+
+    class Meta:
+        verbose_name = _("Tez yordam joylashuvi")
+        verbose_name_plural = _("Tez yordam joylashuvlari")
+        indexes = [
+            models.Index(fields=['ambulance', 'recorded_at'], name='ambulanceposition_track_idx'),
+        ]
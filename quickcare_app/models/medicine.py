@@ -1,5 +1,11 @@
 #appointment, notification, patientmedicine
-from django.db import models
+import datetime
+from collections import defaultdict
+
+from django.db import models, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+from quickcare_app.search import search_backend
 from .doc_patient import Patient
 
 class Medicine(models.Model):
@@ -18,10 +24,29 @@ class Medicine(models.Model):
     side_effects = models.TextField(blank=True, null=True)  # Yon ta’sirlari
     price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)  # Narxi
     is_available = models.BooleanField(default=True)  # Mavjud yoki yo‘qligi
+    # Zaxira qatorida shundan kam qolsa "kam qolgan" ro'yxatiga tushadi (LowStockEntry)
+    reorder_level = models.PositiveIntegerField(default=10, verbose_name="Buyurtma chegarasi")
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # Qidiruv indeksi (quickcare_app.search): FTS5 jadvali shu tranzaksiyada, xotiradagisi on_commit
+            search_backend().update(self.pk, self.name, self.description)
+            # Chegara o'zgargan bo'lishi mumkin
+            if not adding:
+                LowStockEntry.refresh(self.pharmacy_set.values_list("pk", flat=True))
+
+    def delete(self, *args, **kwargs):
+        pk = self.pk
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            search_backend().remove(pk)
+        return result
+
 
 class Pharmacy(models.Model):
     medicine = models.ForeignKey(Medicine, on_delete=models.CASCADE)
@@ -30,15 +55,353 @@ class Pharmacy(models.Model):
     def __str__(self):
         return f"{self.medicine.name} - {self.stock} left"
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        update_fields = kwargs.pop("update_fields", None)
+        with transaction.atomic():
+            if adding:
+                super().save(*args, update_fields=update_fields, **kwargs)
+                # Boshlang'ich qoldiq ham harakatlar jurnaliga tushadi: stock = snapshot + harakatlar yig'indisi
+                if self.stock:
+                    InventoryMovement.objects.create(pharmacy=self, kind="receipt", delta=self.stock)
+            else:
+                # Yangilashda qoldiq to'g'ridan-to'g'ri yozilmaydi: bazadagidan farqi adjust() orqali
+                # jurnalga tushadi, qolgan ustunlar odatdagidek saqlanadi
+                if update_fields is None:
+                    update_fields = [field.name for field in self._meta.concrete_fields if not field.primary_key]
+                fields = [name for name in update_fields if name != "stock"]
+                if fields:
+                    super().save(*args, update_fields=fields, **kwargs)
+                if "stock" in update_fields:
+                    Pharmacy.adjust(self.pk, self.stock)
+            LowStockEntry.refresh([self.pk])
+
+    @staticmethod
+    def take(pk, quantity, kind="dispense", reservation=None):
+        """
+        Zaxiradan olish: UPDATE ... SET stock = stock - n WHERE stock >= n va jurnalga yozuv.
+        Yetmasa False (hech narsa yozilmaydi).
+        """
+        with transaction.atomic():
+            if not Pharmacy.objects.filter(pk=pk, stock__gte=quantity).update(stock=F("stock") - quantity):
+                return False
+            InventoryMovement.objects.create(pharmacy_id=pk, kind=kind, delta=-quantity, reservation=reservation)
+            LowStockEntry.refresh([pk])
+        return True
+
+    @staticmethod
+    def restock(pk, quantity, kind="receipt", reservation=None, note=""):
+        """Zaxiraga qo'shish (o'qib-yozishsiz, F() bilan) va jurnalga yozuv"""
+        with transaction.atomic():
+            if not Pharmacy.objects.filter(pk=pk).update(stock=F("stock") + quantity):
+                return False
+            InventoryMovement.objects.create(
+                pharmacy_id=pk, kind=kind, delta=quantity, reservation=reservation, note=note
+            )
+            LowStockEntry.refresh([pk])
+        return True
+
+    @staticmethod
+    def adjust(pk, stock, note=""):
+        """
+        Inventarizatsiya natijasi: qoldiqni aniq songa tenglash. Farq "adjustment" sifatida yoziladi;
+        parallel o'zgarish bo'lsa (compare-and-set) qayta o'qiladi. Qaytaradi: yozilgan farq.
+        """
+        while True:
+            current = Pharmacy.objects.filter(pk=pk).values_list("stock", flat=True).get()
+            if current == stock:
+                return 0
+            with transaction.atomic():
+                if Pharmacy.objects.filter(pk=pk, stock=current).update(stock=stock):
+                    InventoryMovement.objects.create(
+                        pharmacy_id=pk, kind="adjustment", delta=stock - current, note=note
+                    )
+                    LowStockEntry.refresh([pk])
+                    return stock - current
+
     class Meta:
         verbose_name = "dori"
         verbose_name_plural = "dorilar"
+        constraints = [
+            # Shartli UPDATE'dan tashqari yo'l bilan ham zaxira manfiy bo'lib qolmasin
+            models.CheckConstraint(condition=models.Q(stock__gte=0), name="pharmacy_stock_non_negative"),
+        ]
+
+
+class StockReservation(models.Model):
+    """
+    Retsept uchun zaxiradan ajratilgan dori. Zaxira qisqa tranzaksiyada band qilinadi (held),
+    retsept yozilgach "committed", yozilmasa "released" bo'lib zaxiraga qaytariladi.
+    Jarayon to'xtab qolib "held" holatda qolganlari muddati o'tgach release_expired() bilan qaytariladi.
+    """
+    STATUS_CHOICES = (
+        ("held", "Band qilingan"),
+        ("committed", "Retseptga yozilgan"),
+        ("released", "Qaytarilgan"),
+    )
+    HOLD_SECONDS = 300
+
+    pharmacy = models.ForeignKey(Pharmacy, on_delete=models.CASCADE, related_name="reservations")
+    quantity = models.PositiveIntegerField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="held")
+    prescription = models.OneToOneField(
+        "PatientMedicine", on_delete=models.SET_NULL, null=True, blank=True, related_name="reservation"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "zaxira bandi"
+        verbose_name_plural = "zaxira bandlari"
+        indexes = [
+            # release_expired: muddati o'tgan bandlar
+            models.Index(fields=["status", "expires_at"], name="reservation_expiry_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.pharmacy_id}: {self.quantity} ({self.status})"
+
+    @staticmethod
+    def reserve(medicine, quantity, hold_seconds=None):
+        """
+        Dorining zaxirasi yetarli bo'lgan qatoridan quantity ta band qilish.
+        Qaytaradi: StockReservation; dori omborda umuman hisobga olinmagan bo'lsa None.
+        Zaxira yetmasa ValueError.
+        """
+        rows = list(
+            Pharmacy.objects.filter(medicine=medicine).order_by("-stock").values_list("pk", "stock")
+        )
+        if not rows:
+            return None
+        hold_seconds = hold_seconds or StockReservation.HOLD_SECONDS
+        with transaction.atomic():
+            # Qoldig'i ko'p qatordan boshlab: raqobatda yutqazilsa (qoldiq kamaygan) keyingisi
+            for pk, stock in rows:
+                if stock < quantity:
+                    continue
+                reservation = StockReservation.objects.create(
+                    pharmacy_id=pk, quantity=quantity,
+                    expires_at=timezone.now() + datetime.timedelta(seconds=hold_seconds),
+                )
+                if Pharmacy.take(pk, quantity, reservation=reservation):
+                    return reservation
+                reservation.delete()
+        raise ValueError("Zaxirada bu doridan yetarli qolmagan")
+
+    def commit(self, prescription):
+        """Bandni retseptga bog'lash. Band muddati o'tib qaytarilgan bo'lsa ValueError"""
+        if not StockReservation.objects.filter(pk=self.pk, status="held").update(
+            status="committed", prescription=prescription
+        ):
+            raise ValueError("Zaxira bandining muddati o'tgan")
+        self.status, self.prescription = "committed", prescription
+
+    def release(self):
+        """Bandni bekor qilib zaxiraga qaytarish (faqat "held" holatidan, bir marta)"""
+        with transaction.atomic():
+            if not StockReservation.objects.filter(pk=self.pk, status="held").update(status="released"):
+                return False
+            Pharmacy.restock(self.pharmacy_id, self.quantity, kind="release", reservation=self)
+        self.status = "released"
+        return True
+
+    @staticmethod
+    def release_expired(current=None):
+        """Muddati o'tgan "held" bandlarni zaxiraga qaytarish. Qaytarilganlar soni"""
+        expired = StockReservation.objects.filter(status="held", expires_at__lte=current or timezone.now())
+        return sum(reservation.release() for reservation in expired)
+
+
+class InventoryMovement(models.Model):
+    """
+    Zaxira harakatlari jurnali (faqat qo'shiladi). Har bir Pharmacy.stock o'zgarishi shu yerga
+    bitta qator bilan yoziladi, shuning uchun qoldiq = oxirgi snapshot + undan keyingi harakatlar.
+    Pharmacy.stock shu yig'indining keshi bo'lib qoladi: zaxira manfiy bo'lmasligi uchun shartli UPDATE unga qo'yiladi.
+    Eski harakatlar compact_inventory bilan InventorySnapshot'ga yig'iladi.
+    """
+    KIND_CHOICES = (
+        ("receipt", "Kirim"),
+        ("dispense", "Chiqim"),
+        ("release", "Band qaytarildi"),
+        ("adjustment", "Inventarizatsiya"),
+    )
+
+    pharmacy = models.ForeignKey(Pharmacy, on_delete=models.CASCADE, related_name="movements")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    delta = models.IntegerField()
+    reservation = models.ForeignKey(
+        StockReservation, on_delete=models.SET_NULL, null=True, blank=True, related_name="movements"
+    )
+    note = models.CharField(max_length=255, blank=True, default="")
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "zaxira harakati"
+        verbose_name_plural = "zaxira harakatlari"
+        indexes = [
+            # stock_at / compact: bitta qatorning vaqt oralig'idagi harakatlari
+            models.Index(fields=["pharmacy", "created_at"], name="movement_pharmacy_time_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.pharmacy_id}: {self.delta:+d} ({self.kind})"
+
+    @staticmethod
+    def stock_at(pharmacy_id, when=None):
+        """
+        Qoldiq berilgan vaqtda (None — hozir): eng yaqin oldingi snapshot + undan keyingi harakatlar.
+        Ikki indeksli so'rov; compact qilingan davr uchun aniqlik snapshot nuqtalarida.
+        """
+        snapshots = InventorySnapshot.objects.filter(pharmacy_id=pharmacy_id)
+        movements = InventoryMovement.objects.filter(pharmacy_id=pharmacy_id)
+        if when is not None:
+            snapshots = snapshots.filter(taken_at__lte=when)
+            movements = movements.filter(created_at__lte=when)
+        snapshot = snapshots.order_by("-taken_at").values_list("stock", "taken_at").first()
+        base = 0
+        if snapshot:
+            base = snapshot[0]
+            movements = movements.filter(created_at__gt=snapshot[1])
+        return base + (movements.aggregate(total=Sum("delta"))["total"] or 0)
+
+    @staticmethod
+    def compact(before):
+        """
+        before gacha bo'lgan harakatlarni har bir Pharmacy uchun bitta snapshot'ga yig'ib o'chiradi.
+        Har bir Pharmacy o'z tranzaksiyasida; har biridan keyin (pharmacy_id, o'chirilgan harakatlar) beradi.
+        """
+        pharmacy_ids = (
+            InventoryMovement.objects.filter(created_at__lte=before)
+            .values_list("pharmacy_id", flat=True).distinct().order_by("pharmacy_id")
+        )
+        for pharmacy_id in list(pharmacy_ids):
+            with transaction.atomic():
+                stock = InventoryMovement.stock_at(pharmacy_id, before)
+                InventorySnapshot.objects.update_or_create(
+                    pharmacy_id=pharmacy_id, taken_at=before, defaults={"stock": stock}
+                )
+                deleted, _ = InventoryMovement.objects.filter(
+                    pharmacy_id=pharmacy_id, created_at__lte=before
+                ).delete()
+            yield pharmacy_id, deleted
+
+
+class InventorySnapshot(models.Model):
+    """Qoldiqning ma'lum vaqtdagi holati (compact_inventory yozadi)"""
+    pharmacy = models.ForeignKey(Pharmacy, on_delete=models.CASCADE, related_name="snapshots")
+    stock = models.IntegerField()
+    taken_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "zaxira holati"
+        verbose_name_plural = "zaxira holatlari"
+        constraints = [
+            models.UniqueConstraint(fields=["pharmacy", "taken_at"], name="unique_inventory_snapshot"),
+        ]
+
+    def __str__(self):
+        return f"{self.pharmacy_id}: {self.stock} ({self.taken_at:%Y-%m-%d})"
+
+
+class LowStockEntry(models.Model):
+    """
+    Kam qolgan zaxira qatorlari to'plami: stock < medicine.reorder_level bo'lgan har bir Pharmacy uchun
+    bitta qator ("out" — tugagan). Qoldiq yoki chegarani o'zgartiradigan har bir yo'l (take, restock, adjust,
+    save, katalog importi) o'sha tranzaksiyada refresh() ni chaqiradi, shuning uchun low_stock / out_of_stock
+    Pharmacy jadvalini skanerlamaydi — faqat shu kichik jadvalni o'qiydi.
+    """
+    STATE_CHOICES = (
+        ("low", "Kam qolgan"),
+        ("out", "Tugagan"),
+    )
+
+    pharmacy = models.OneToOneField(
+        Pharmacy, on_delete=models.CASCADE, primary_key=True, related_name="low_stock_entry"
+    )
+    state = models.CharField(max_length=3, choices=STATE_CHOICES)
+    since = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "kam qolgan zaxira"
+        verbose_name_plural = "kam qolgan zaxiralar"
+        indexes = [
+            # out_of_stock: faqat tugaganlar
+            models.Index(fields=["state"], name="lowstock_state_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.pharmacy_id}: {self.state}"
+
+    @staticmethod
+    def state_for(stock, reorder_level):
+        if stock <= 0:
+            return "out"
+        if stock < reorder_level:
+            return "low"
+        return None
+
+    @staticmethod
+    def refresh(pharmacy_ids):
+        """
+        Berilgan zaxira qatorlari uchun to'plamni joriy qoldiq va chegaraga moslashtiradi.
+        Holat yomonlashganda (yo'q -> low/out, low -> out) bitta StockAlert yoziladi; holat o'zgarmasa
+        hech narsa yozilmaydi, shuning uchun chegaradan bir marta o'tish — bitta ogohlantirish.
+        Qoldiqni o'zgartirgan tranzaksiya ichida chaqiriladi: qator UPDATE bilan qulflangan bo'ladi.
+        """
+        pharmacy_ids = list(pharmacy_ids)
+        if not pharmacy_ids:
+            return
+        current = Pharmacy.objects.filter(pk__in=pharmacy_ids).values_list(
+            "pk", "stock", "medicine__reorder_level"
+        )
+        entries = dict(LowStockEntry.objects.filter(pharmacy_id__in=pharmacy_ids).values_list("pharmacy_id", "state"))
+
+        added, moved, cleared, alerts = [], defaultdict(list), [], []
+        for pk, stock, reorder_level in current:
+            state, previous = LowStockEntry.state_for(stock, reorder_level), entries.get(pk)
+            if state == previous:
+                continue
+            if state is None:
+                cleared.append(pk)
+                continue
+            if previous is None:
+                added.append(LowStockEntry(pharmacy_id=pk, state=state))
+            else:
+                moved[state].append(pk)
+            # out -> low (qisman to'ldirildi) yaxshilanish: ogohlantirish kerak emas
+            if previous is None or state == "out":
+                alerts.append(StockAlert(pharmacy_id=pk, kind=state, stock=stock, reorder_level=reorder_level))
+
+        with transaction.atomic():
+            if cleared:
+                LowStockEntry.objects.filter(pharmacy_id__in=cleared).delete()
+            LowStockEntry.objects.bulk_create(added)
+            for state, pks in moved.items():
+                LowStockEntry.objects.filter(pharmacy_id__in=pks).update(state=state)
+            StockAlert.objects.bulk_create(alerts)
+
+
+class StockAlert(models.Model):
+    """Zaxira qatori chegaradan o'tgani haqida voqea (LowStockEntry.refresh yozadi)"""
+    pharmacy = models.ForeignKey(Pharmacy, on_delete=models.CASCADE, related_name="alerts")
+    kind = models.CharField(max_length=3, choices=LowStockEntry.STATE_CHOICES)
+    stock = models.IntegerField()
+    reorder_level = models.PositiveIntegerField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "zaxira ogohlantirishi"
+        verbose_name_plural = "zaxira ogohlantirishlari"
+
+    def __str__(self):
+        return f"⚠️ {self.pharmacy_id}: {self.get_kind_display()} ({self.stock}/{self.reorder_level})"
 
 
 class PatientMedicine(models.Model):
     patient = models.ForeignKey(Patient, on_delete=models.CASCADE)
     medicine = models.ForeignKey(Medicine, on_delete=models.CASCADE)
     dosage = models.CharField(max_length=50)
+    quantity = models.PositiveIntegerField(default=1)
     prescribed_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -48,8 +411,32 @@ class PatientMedicine(models.Model):
     def __str__(self):
         return f"{self.patient.full_name} - {self.medicine.name} ({self.dosage})"
 
+    @staticmethod
+    def prescribe(patient, medicine, dosage, quantity=1):
+        """
+        Retsept yozish: avval zaxira band qilinadi (StockReservation.reserve), keyin retsept yoziladi.
+        Retseptni yozishda xato bo'lsa band zaxiraga qaytariladi. Zaxira yetmasa ValueError.
+        """
+        reservation = StockReservation.reserve(medicine, quantity)
+        try:
+            with transaction.atomic():
+                prescription = PatientMedicine.objects.create(
+                    patient=patient, medicine=medicine, dosage=dosage, quantity=quantity
+                )
+                if reservation is not None:
+                    reservation.commit(prescription)
+        except Exception:
+            if reservation is not None:
+                reservation.release()
+            raise
+        return prescription
+
     class Meta:
         verbose_name = "bemor dorisi"
         verbose_name_plural = "bemorlar dorilari"
+        indexes = [
+            # ro'yxat kursori (PrescriptionPagination)
+            models.Index(fields=["prescribed_at", "id"], name="patientmedicine_cursor_idx"),
+        ]
 
 
@@ -1,4 +1,12 @@
-from django.db import models
+import datetime
+import uuid
+
+from collections import Counter
+
+from django.conf import settings
+from django.db import models, transaction, IntegrityError
+from django.db.models import F, Q, Case, When, Value, Exists, OuterRef
+from django.utils import timezone
 from .doc_patient import  Doctor, Patient
 
 
@@ -10,6 +18,8 @@ class Notification(models.Model):
         ("general", "General Message"),
         ("emergency_alert", "Emergency Alert"),
     )
+    # settings.NOTIFICATION_RETENTION_DAYS da ko'rsatilmagan turlar uchun
+    DEFAULT_RETENTION_DAYS = 90
 
     recipient = models.ForeignKey(Patient, on_delete=models.CASCADE, verbose_name="Qabul qiluvchi")
     message = models.TextField(verbose_name="Xabar matni")
@@ -23,25 +33,322 @@ class Notification(models.Model):
     class Meta:
         verbose_name = "bildirishnoma"
         verbose_name_plural = "bildirishnomalar"
+        indexes = [
+            # foydalanuvchining bildirishnomalari kursori (NotificationPagination)
+            models.Index(fields=["recipient", "sent_at", "id"], name="notification_cursor_idx"),
+            # o'qilmaganlar ro'yxati, mark_all_read, coalesce
+            models.Index(fields=["recipient", "is_read", "sent_at"], name="notification_unread_idx"),
+            # purge_expired: turi bo'yicha eskirgan o'qilganlar
+            models.Index(fields=["notification_type", "is_read", "sent_at"], name="notification_retention_idx"),
+        ]
 
     def __str__(self):
         return f"📢 {self.recipient.full_name} ga xabar yuborildi ({self.notification_type})"
 
     def mark_as_read(self):
+        """Shartli UPDATE: allaqachon o'qilgan bo'lsa hisoblagich ikkinchi marta kamaymaydi"""
+        with transaction.atomic():
+            updated = Notification.objects.filter(pk=self.pk, is_read=False).update(is_read=True)
+            UnreadNotificationCounter.apply({self.recipient_id: -updated})
         self.is_read = True
-        self.save()
+        return bool(updated)
+
+    @staticmethod
+    def mark_all_read(recipient, up_to=None):
+        """Bemorning barcha (yoki up_to id gacha bo'lgan) o'qilmagan bildirishnomalari — bitta UPDATE"""
+        recipient_id = getattr(recipient, "pk", recipient)
+        unread = Notification.objects.filter(recipient_id=recipient_id, is_read=False)
+        if up_to is not None:
+            unread = unread.filter(pk__lte=up_to)
+        with transaction.atomic():
+            updated = unread.update(is_read=True)
+            UnreadNotificationCounter.apply({recipient_id: -updated})
+        return updated
+
+    @property
+    def channels(self):
+        """Bildirishnoma yuboriladigan kanallar (via_* bayroqlari bo'yicha)"""
+        return [channel for channel, _ in NotificationDelivery.CHANNELS if getattr(self, f"via_{channel}")]
 
     @staticmethod
     def send_notification(recipient, message, notification_type="queue_update", via_sms=True, via_telegram=True, via_email=False):
-        notification = Notification.objects.create(
-            recipient=recipient,
-            message=message,
+        """
+        Bildirishnoma va uning yetkazish vazifalari (outbox) chaqiruvchining tranzaksiyasida yoziladi.
+        SMS/Telegram/Email shlyuzlariga so'rov yo'lida murojaat qilinmaydi, ularni deliver_notifications bajaradi.
+        """
+        return Notification.fan_out(
+            [(recipient, message)],
             notification_type=notification_type,
             via_sms=via_sms,
             via_telegram=via_telegram,
-            via_email=via_email
+            via_email=via_email,
+        )[0]
+
+    @staticmethod
+    def fan_out(messages, notification_type="queue_update", via_sms=True, via_telegram=True, via_email=False):
+        """
+        Ko'p bemorga bir vaqtda bildirishnoma: messages — [(bemor yoki uning id si, matn), ...].
+        Bildirishnomalar ham, ularning outbox vazifalari ham bulk_create bilan yoziladi.
+        Oyna ichida hali yuborilmagan xabari bor bemorlarga yangi qator yozilmaydi (coalesce).
+        """
+        flags = {"via_sms": via_sms, "via_telegram": via_telegram, "via_email": via_email}
+        messages = [(Notification.recipient_id_of(recipient), message) for recipient, message in messages]
+        with transaction.atomic(savepoint=False):
+            messages, coalesced = Notification.coalesce(messages, notification_type, **flags)
+            notifications = Notification.objects.bulk_create(
+                Notification(
+                    recipient_id=recipient_id,
+                    message=message,
+                    notification_type=notification_type,
+                    **flags,
+                )
+                for recipient_id, message in messages
+            )
+            NotificationDelivery.enqueue(notifications)
+            UnreadNotificationCounter.apply(Counter(n.recipient_id for n in notifications))
+        return coalesced + notifications
+
+    @staticmethod
+    def coalesce_window(notification_type):
+        """Tur uchun birlashtirish oynasi (soniya) yoki None — birlashtirilmaydi"""
+        return getattr(settings, "NOTIFICATION_COALESCE_WINDOWS", {}).get(notification_type)
+
+    @staticmethod
+    def recipient_id_of(recipient):
+        """Qabul qiluvchi faqat Patient yoki uning id si (User va boshqa obyektlarning pk si emas)"""
+        if isinstance(recipient, Patient):
+            return recipient.pk
+        if isinstance(recipient, int) and not isinstance(recipient, bool):
+            return recipient
+        raise TypeError(f"Bildirishnoma qabul qiluvchisi Patient yoki uning id si bo'lishi kerak: {recipient!r}")
+
+    @staticmethod
+    def coalesce(messages, notification_type, **flags):
+        """
+        Bemorning shu turdagi, settings.NOTIFICATION_COALESCE_WINDOWS oynasi ichidagi, o'qilmagan va
+        hali hech bir kanalga yuborilmagan bildirishnomasi bo'lsa, uning matni eng oxirgi holat bilan
+        almashtiriladi: yangi qator ham, qo'shimcha SMS ham bo'lmaydi.
+        Birlashtirilgan bildirishnomaning kutayotgan yetkazishlari yana bir oynaga surib qo'yiladi.
+        (birlashtirilmagan xabarlar, birlashtirilgan bildirishnomalar) juftligini qaytaradi.
+        """
+        window = Notification.coalesce_window(notification_type)
+        if not window or not messages:
+            return messages, []
+
+        # Bitta chaqiruvda bir bemorga bir nechta xabar bo'lsa, oxirgisi qoladi
+        latest = dict(messages)
+        current = timezone.now()
+        started = NotificationDelivery.objects.filter(notification=OuterRef("pk")).exclude(status="pending")
+        unsent = Notification.objects.filter(is_read=False).filter(~Exists(started))
+        pending = unsent.filter(
+            notification_type=notification_type,
+            sent_at__gte=current - datetime.timedelta(seconds=window),
+            **flags,
+        )
+
+        coalesced = {}
+        recipient_ids = list(latest)
+        for i in range(0, len(recipient_ids), UnreadNotificationCounter.CHUNK_SIZE):
+            chunk = recipient_ids[i:i + UnreadNotificationCounter.CHUNK_SIZE]
+            for notification in pending.filter(recipient_id__in=chunk).order_by("recipient_id", "-sent_at", "-id"):
+                coalesced.setdefault(notification.recipient_id, notification)
+
+        # SELECT va UPDATE orasida worker yetkazishni boshlagan yoki bemor o'qigan bo'lishi mumkin: shartlar
+        # UPDATE'da qayta tekshiriladi, yangilanmagan qatorlar bemorlari uchun yangi bildirishnoma yoziladi
+        notifications = list(coalesced.values())
+        updated = set()
+        for i in range(0, len(notifications), UnreadNotificationCounter.CHUNK_SIZE // 2):
+            chunk = notifications[i:i + UnreadNotificationCounter.CHUNK_SIZE // 2]
+            ids = [n.pk for n in chunk]
+            unsent.filter(pk__in=ids).update(
+                message=Case(*[When(pk=n.pk, then=Value(latest[n.recipient_id])) for n in chunk]),
+                sent_at=current,
+            )
+            chunk_updated = list(Notification.objects.filter(pk__in=ids, sent_at=current).values_list("pk", flat=True))
+            # Yana bir oyna kutiladi: shu orada kelgan holat ham shu SMS ga qo'shiladi
+            NotificationDelivery.objects.filter(notification_id__in=chunk_updated, status="pending").update(
+                next_attempt_at=current + datetime.timedelta(seconds=window)
+            )
+            updated.update(chunk_updated)
+        notifications = [n for n in notifications if n.pk in updated]
+        for notification in notifications:
+            notification.message = latest[notification.recipient_id]
+            notification.sent_at = current
+        coalesced = {n.recipient_id: n for n in notifications}
+
+        remaining = [(recipient_id, message) for recipient_id, message in latest.items() if recipient_id not in coalesced]
+        return remaining, notifications
+
+    @staticmethod
+    def retention_cutoffs(current=None):
+        """Tur -> shu vaqtdan oldin yuborilgan o'qilgan bildirishnomalar o'chiriladi"""
+        current = current or timezone.now()
+        days = getattr(settings, "NOTIFICATION_RETENTION_DAYS", {})
+        return {
+            notification_type: current - datetime.timedelta(
+                days=days.get(notification_type, Notification.DEFAULT_RETENTION_DAYS)
+            )
+            for notification_type, _ in Notification.NOTIFICATION_TYPES
+        }
+
+    @staticmethod
+    def purge_expired(batch_size=1000, current=None):
+        """
+        Saqlash muddati o'tgan o'qilgan bildirishnomalarni partiyalab o'chiradi (outbox qatorlari ham).
+        Har bir partiya alohida qisqa tranzaksiya, shuning uchun yozuvchilar uzoq kutib qolmaydi.
+        O'qilmaganlar tegilmaydi, shuning uchun UnreadNotificationCounter o'zgarmaydi.
+        Har bir partiyadan keyin (tur, o'chirilganlar soni) qaytariladi (yield).
+        """
+        for notification_type, cutoff in Notification.retention_cutoffs(current).items():
+            expired = Notification.objects.filter(
+                notification_type=notification_type, is_read=True, sent_at__lt=cutoff
+            ).order_by("sent_at")
+            while True:
+                with transaction.atomic():
+                    ids = list(expired.values_list("pk", flat=True)[:batch_size])
+                    if not ids:
+                        break
+                    Notification.objects.filter(pk__in=ids).delete()
+                yield notification_type, len(ids)
+
+    @staticmethod
+    def waiting_messages(doctor, day, message, from_position=1):
+        """
+        Shifokorning shu kundagi kutayotgan bemorlari uchun (bemor id, matn) juftliklari (bitta SELECT).
+        message — {full_name} va {position} o'rinbosarlari bo'lgan shablon.
+        """
+        from .queue import Queue
+
+        waiting = Queue.doctor_day_queue(doctor, day).filter(
+            status="waiting", position__gte=from_position
+        ).order_by("position").values_list("patient_id", "patient__full_name", "position")
+        return [
+            (patient_id, message.format(full_name=full_name, position=position))
+            for patient_id, full_name, position in waiting
+        ]
+
+    @staticmethod
+    def notify_waiting(doctor, day, message, from_position=1, notification_type="queue_update"):
+        """Shifokorning barcha kutayotgan bemorlariga bitta chaqiruvda xabar yuborish"""
+        return Notification.fan_out(
+            Notification.waiting_messages(doctor, day, message, from_position),
+            notification_type=notification_type,
+        )
+
+
+class NotificationDelivery(models.Model):
+    """Outbox: bildirishnomaning bitta kanal orqali yetkazilishi (worker navbati)"""
+    CHANNELS = (
+        ("sms", "SMS"),
+        ("telegram", "Telegram"),
+        ("email", "Email"),
+    )
+    STATUS_CHOICES = (
+        ("pending", "Kutilmoqda"),
+        ("processing", "Yuborilmoqda"),
+        ("sent", "Yuborildi"),
+        ("failed", "Yuborilmadi"),
+    )
+    MAX_ATTEMPTS = 5
+    BACKOFF_SECONDS = 30
+    MAX_BACKOFF_SECONDS = 3600
+    # Shu vaqt ichida yakunlanmagan vazifa (worker to'xtab qolgan) boshqa worker tomonidan qayta olinadi
+    LEASE_SECONDS = 300
+
+    notification = models.ForeignKey(Notification, on_delete=models.CASCADE, related_name="deliveries")
+    channel = models.CharField(max_length=10, choices=CHANNELS)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_by = models.CharField(max_length=32, blank=True, default="")
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default="")
+
+    class Meta:
+        verbose_name = "bildirishnoma yetkazilishi"
+        verbose_name_plural = "bildirishnomalar yetkazilishi"
+        unique_together = ("notification", "channel")
+        indexes = [
+            # worker: navbatdagi vazifalar
+            models.Index(fields=["status", "next_attempt_at"], name="delivery_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.notification_id} → {self.channel} ({self.status})"
+
+    @staticmethod
+    def enqueue(notifications):
+        """
+        Saqlangan bildirishnomalar uchun har bir yoqilgan kanalga vazifa yaratadi (bitta INSERT).
+        Birlashtiriladigan turlar oyna tugagach yuboriladi: shu orada kelgan holatlar bitta SMS bo'ladi.
+        """
+        deliveries = []
+        for notification in notifications:
+            window = Notification.coalesce_window(notification.notification_type)
+            due = {"next_attempt_at": notification.sent_at + datetime.timedelta(seconds=window)} if window else {}
+            deliveries += [
+                NotificationDelivery(notification=notification, channel=channel, **due)
+                for channel in notification.channels
+            ]
+        return NotificationDelivery.objects.bulk_create(deliveries)
+
+    @staticmethod
+    def claim(batch_size=100, lease_seconds=None):
+        """
+        Muddati kelgan vazifalarni shu worker nomiga band qiladi.
+        Shartli UPDATE tufayli parallel workerlar bitta vazifani ikki marta olmaydi.
+        """
+        current = timezone.now()
+        lease = datetime.timedelta(seconds=lease_seconds or NotificationDelivery.LEASE_SECONDS)
+        due = (
+            Q(status="pending", next_attempt_at__lte=current)
+            | Q(status="processing", claimed_at__lt=current - lease)
+        )
+        ids = list(
+            NotificationDelivery.objects.filter(due).order_by("next_attempt_at").values_list("pk", flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+
+        token = uuid.uuid4().hex
+        # Urinish band qilishda sanaladi: workerni yiqitadigan xabar cheksiz qaytarilmaydi
+        NotificationDelivery.objects.filter(due, pk__in=ids).update(
+            status="processing", claimed_by=token, claimed_at=current, attempts=F("attempts") + 1
+        )
+        return list(
+            NotificationDelivery.objects.filter(claimed_by=token, status="processing")
+            .select_related("notification__recipient__user")
+            .order_by("next_attempt_at")
+        )
+
+    @staticmethod
+    def backoff(attempts):
+        """Eksponensial kutish: 30s, 60s, 120s, ... MAX_BACKOFF_SECONDS gacha"""
+        seconds = NotificationDelivery.BACKOFF_SECONDS * 2 ** max(attempts - 1, 0)
+        return datetime.timedelta(seconds=min(seconds, NotificationDelivery.MAX_BACKOFF_SECONDS))
+
+    def mark_sent(self):
+        self.status = "sent"
+        self.sent_at = timezone.now()
+        return self._finish(status=self.status, sent_at=self.sent_at, last_error="")
+
+    def mark_failed(self, error, retry=True):
+        """Xatoni yozadi va vazifani keyinroqqa qoldiradi yoki urinishlar tugasa yopadi"""
+        self.last_error = str(error)
+        if retry and self.attempts < NotificationDelivery.MAX_ATTEMPTS:
+            self.status = "pending"
+            self.next_attempt_at = timezone.now() + NotificationDelivery.backoff(self.attempts)
+        else:
+            self.status = "failed"
+        return self._finish(status=self.status, next_attempt_at=self.next_attempt_at, last_error=self.last_error)
+
+    def _finish(self, **changes):
+        # Ijara muddati o'tib vazifani boshqa worker olgan bo'lsa, uning natijasi ustidan yozilmaydi
+        return bool(
+            NotificationDelivery.objects.filter(pk=self.pk, claimed_by=self.claimed_by, status="processing")
+            .update(claimed_by="", **changes)
         )
-        return notification
 
 
 
@@ -92,5 +399,83 @@ class Reply(models.Model):
         verbose_name_plural = "fikr qaytarishlar"
 
 
+class UnreadNotificationCounter(models.Model):
+    """
+    Bemorning o'qilmagan bildirishnomalari soni: ilovadagi belgi (badge) uchun bitta indeksli o'qish.
+    Bildirishnoma yaratilganda va o'qilganda F() deltasi bilan shu tranzaksiyada yangilanadi.
+    """
+    # SQLite so'rov parametrlari chegarasi: bitta UPDATE'dagi bemorlar soni
+    CHUNK_SIZE = 400
+
+    recipient = models.OneToOneField(
+        Patient, on_delete=models.CASCADE, primary_key=True, related_name="unread_counter"
+    )
+    unread = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = "o'qilmagan bildirishnomalar soni"
+        verbose_name_plural = "o'qilmagan bildirishnomalar soni"
+
+    def __str__(self):
+        return f"{self.recipient_id}: {self.unread}"
+
+    @staticmethod
+    def apply(deltas):
+        """
+        deltas — {bemor id: o'zgarish}. Bildirishnomalar allaqachon yozilgan bo'lishi kerak:
+        hisoblagich qatori hali bo'lmasa, u xom jadvaldan hisoblab yaratiladi.
+        """
+        deltas = {recipient_id: delta for recipient_id, delta in deltas.items() if delta}
+        if not deltas:
+            return
+
+        recipient_ids = list(deltas)
+        with transaction.atomic():
+            updated = set()
+            for i in range(0, len(recipient_ids), UnreadNotificationCounter.CHUNK_SIZE):
+                chunk = recipient_ids[i:i + UnreadNotificationCounter.CHUNK_SIZE]
+                by_delta = {}
+                for recipient_id in chunk:
+                    by_delta.setdefault(deltas[recipient_id], []).append(recipient_id)
+                counters = UnreadNotificationCounter.objects.filter(recipient_id__in=chunk)
+                # Bir xil deltali bemorlar bitta When'ga yig'iladi (odatda hammasi +1)
+                shift = Case(
+                    *[When(recipient_id__in=ids, then=Value(delta)) for delta, ids in by_delta.items()],
+                    default=Value(0),
+                )
+                if counters.update(unread=F("unread") + shift) != len(chunk):
+                    updated.update(counters.values_list("recipient_id", flat=True))
+                else:
+                    updated.update(chunk)
+
+            missing = deltas.keys() - updated
+            if not missing:
+                return
 
+            unread = dict(
+                Notification.objects.filter(recipient_id__in=missing, is_read=False)
+                .values_list("recipient_id").annotate(count=models.Count("pk")).order_by()
+            )
+            try:
+                with transaction.atomic():
+                    UnreadNotificationCounter.objects.bulk_create(
+                        UnreadNotificationCounter(recipient_id=recipient_id, unread=unread.get(recipient_id, 0))
+                        for recipient_id in missing
+                    )
+            except IntegrityError:
+                # Parallel so'rov ba'zi hisoblagichlarni birinchi bo'lib yaratdi: qolganini bittalab
+                for recipient_id in missing:
+                    counters = UnreadNotificationCounter.objects.filter(recipient_id=recipient_id)
+                    if not counters.update(unread=F("unread") + deltas[recipient_id]):
+                        UnreadNotificationCounter.objects.create(
+                            recipient_id=recipient_id, unread=unread.get(recipient_id, 0)
+                        )
 
+    @staticmethod
+    def for_user(user):
+        """Foydalanuvchining o'qilmagan bildirishnomalari soni (odatda bitta so'rov)"""
+        unread = UnreadNotificationCounter.objects.filter(recipient__user=user).values_list("unread", flat=True).first()
+        if unread is None:
+            # Hali bitta ham bildirishnoma olmagan bemor
+            return Notification.objects.filter(recipient__user=user, is_read=False).count()
+        return unread
@@ -1,10 +1,26 @@
-from django.db import models
+import datetime
+import operator
+from collections import defaultdict
+from functools import reduce
+
+from django.db import models, transaction, IntegrityError
+from django.db.models import F, Max, Count, Q, Case, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django.utils.timezone import now
+from quickcare_app.live import publish_queue_event
 from .doc_patient import Doctor, Patient
 from .hospital_staff import Room
 from .misc import Notification
 
 
+def day_bounds(day):
+    """Berilgan kunning [boshlanishi, tugashi) oralig'i (indeksdan foydalanish uchun __date o'rniga)"""
+    tz = timezone.get_current_timezone()
+    start = datetime.datetime.combine(day, datetime.time.min, tzinfo=tz)
+    return start, start + datetime.timedelta(days=1)
+
+
 class Queue(models.Model):
     patient = models.ForeignKey(Patient, on_delete=models.CASCADE)
     doctor = models.ForeignKey(Doctor, on_delete=models.CASCADE)
@@ -21,6 +37,8 @@ class Queue(models.Model):
         default="waiting"
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         return f"{self.patient.user.username} - {self.position}"
@@ -28,57 +46,427 @@ class Queue(models.Model):
     class Meta:
         verbose_name = "navbat"
         verbose_name_plural = "navbatlar"
+        indexes = [
+            # next_patient, cancel_queue siljishi, faol bemorlar soni
+            models.Index(fields=["doctor", "status", "position"], name="queue_doctor_status_pos_idx"),
+            # doctor_statistics: bugun yakunlanganlar
+            models.Index(fields=["doctor", "status", "created_at"], name="queue_doctor_status_day_idx"),
+            # shifokorning bir kunlik navbati (doctor_day_queue)
+            models.Index(fields=["doctor", "created_at"], name="queue_doctor_day_idx"),
+            # ro'yxat kursori ?ordering=created_at bilan (QueuePagination)
+            models.Index(fields=["created_at", "id"], name="queue_cursor_idx"),
+            # ro'yxatning navbat tartibidagi kursori (QueuePagination)
+            models.Index(fields=["position", "created_at", "id"], name="queue_position_cursor_idx"),
+        ]
 
     @staticmethod
-    def reset_daily_queue():
-        """🔥 Har kuni kechasi navbatni yangilash"""
-        Queue.objects.all().delete()
+    def reset_daily_queue(batch_size=500):
+        """🔥 Har kuni kechasi navbatni yangilash: o'tgan kunlar navbati arxivga ko'chiriladi"""
+        today_start, _ = day_bounds(now().date())
+        return sum(QueueArchive.archive_before(today_start, batch_size=batch_size))
 
     @staticmethod
     def add_patient_to_queue(patient, doctor):
         """➕ Bemorga avtomatik navbat raqami berish"""
-        today = now().date()
-        start_time = now().replace(hour=8, minute=0, second=0)
-        end_time = now().replace(hour=20, minute=0, second=0)
-
-        if start_time <= now() <= end_time:
-            last_position = Queue.objects.filter(created_at__date=today).count() + 1
-            queue = Queue.objects.create(
-                patient=patient,
-                doctor=doctor,
-                position=last_position
-            )
+        current = now()
+        today = current.date()
+        start_time = current.replace(hour=8, minute=0, second=0)
+        end_time = current.replace(hour=20, minute=0, second=0)
 
-            Notification.send_notification(
-                recipient=patient,
-                message=f"📢 Hurmatli {patient.user.username}, sizning navbatingiz {last_position}.",
-                notification_type="queue_update"
-            )
+        if start_time <= current <= end_time:
+            # Raqam olish va navbat yozuvi bitta tranzaksiyada: insert xato bersa, raqam ham qaytariladi
+            with transaction.atomic():
+                last_position = DailyQueueCounter.next_position(doctor, today)
+                queue = Queue.objects.create(
+                    patient=patient,
+                    doctor=doctor,
+                    position=last_position
+                )
+                queue.publish("added")
+
+                Notification.send_notification(
+                    recipient=patient,
+                    message=f"📢 Hurmatli {patient.full_name}, sizning navbatingiz {last_position}.",
+                    notification_type="queue_update"
+                )
             return queue
         return None
 
+    def publish(self, event="status"):
+        """Navbatdagi o'zgarishni jonli tabloga yuborish"""
+        publish_queue_event(self.doctor_id, event, id=self.pk, position=self.position, status=self.status)
+
+    @property
+    def queue_day(self):
+        """Navbat qaysi kunga tegishli (mahalliy vaqt bo'yicha)"""
+        return timezone.localtime(self.created_at).date()
+
+    def change_status(self, new_status):
+        """
+        Qabulni boshlash / yakunlash; kunlik hisoblagichlar shu tranzaksiyada yangilanadi.
+        Qabul yakunlanganda uning davomiyligi shifokorning kutish vaqti bahosiga qo'shiladi.
+        """
+        old_status = self.status
+        changes = {"status": new_status}
+        if new_status == "in_progress":
+            changes["started_at"] = now()
+        elif new_status == "completed":
+            changes["completed_at"] = now()
+
+        with transaction.atomic():
+            if not Queue.objects.filter(pk=self.pk, status=old_status).update(**changes):
+                return False
+            DailyQueueCounter.transition(self.doctor_id, self.queue_day, old_status, new_status)
+            for field, value in changes.items():
+                setattr(self, field, value)
+            if new_status == "completed" and self.started_at:
+                minutes = (self.completed_at - self.started_at).total_seconds() / 60
+                ConsultationEstimate.record(self.doctor_id, minutes)
+            self.publish()
+        return True
+
+    def estimated_start(self, stats, mean_minutes, current=None):
+        """
+        Kutayotgan bemor qabulining taxminiy boshlanish vaqti.
+        stats — DailyQueueCounter.stats(), mean_minutes — ConsultationEstimate.mean_for();
+        ikkalasi ham oldindan hisoblangan, tarixni skanerlash shart emas.
+        """
+        if self.status != "waiting":
+            return None
+        # Raqamlar bekor qilinmaganlar orasida zich: oldingi o'rinlar qabul qilingan yoki qabulda
+        ahead = max(self.position - 1 - stats["completed_count"] - stats["in_progress_count"], 0)
+        minutes = (ahead + stats["in_progress_count"]) * mean_minutes
+        return (current or now()) + datetime.timedelta(minutes=minutes)
+
+    @staticmethod
+    def doctor_day_queue(doctor, day):
+        """Shifokorning bir kunlik navbati"""
+        start, end = day_bounds(day)
+        return Queue.objects.filter(doctor=doctor, created_at__gte=start, created_at__lt=end)
+
+    @staticmethod
+    def close_gaps(doctor, day, positions):
+        """
+        Bekor qilingan o'rinlardan keyingi kutayotgan bemorlarni bitta UPDATE bilan oldinga siljitadi
+        (faqat shu shifokor va shu kun). Har bir qator o'zidan oldingi bekor qilinganlar soniga siljiydi.
+        """
+        shift = reduce(operator.add, [Case(When(position__gt=p, then=1), default=0) for p in positions])
+        Queue.doctor_day_queue(doctor, day).filter(
+            position__gt=min(positions),
+            status="waiting"
+        ).update(position=F("position") - shift)
+
+    @staticmethod
+    def bulk_apply(actions):
+        """
+        Ko'p navbat amallarini bitta tranzaksiyada bajaradi.
+        actions — [(queue, action), ...]; holat qoidalari oldindan tekshirilgan bo'lishi kerak
+        (QueueActionSerializer). Har bir amal turi uchun bitta UPDATE, bekor qilinganlar uchun
+        har bir (shifokor, kun) bo'yicha bitta siljitish UPDATE'i, bildirishnomalar esa bitta INSERT.
+        """
+        current = now()
+        by_action = defaultdict(list)
+        for queue, action in actions:
+            by_action[action].append(queue)
+
+        counters = defaultdict(lambda: defaultdict(int))
+        durations = defaultdict(list)
+        messages = []
+        with transaction.atomic():
+            for action, queues in by_action.items():
+                old_status, new_status = QUEUE_ACTIONS[action]
+                changes = {"status": new_status}
+                if new_status == "in_progress":
+                    changes["started_at"] = current
+                elif new_status == "completed":
+                    changes["completed_at"] = current
+
+                updated = Queue.objects.filter(pk__in=[q.pk for q in queues], status=old_status).update(**changes)
+                if updated != len(queues):
+                    raise ValueError(STATUS_CONFLICT_MESSAGE)
+
+                for queue in queues:
+                    for field, value in changes.items():
+                        setattr(queue, field, value)
+                    deltas = counters[(queue.doctor_id, queue.queue_day)]
+                    deltas[STATUS_COUNTERS[old_status]] -= 1
+                    if new_status in STATUS_COUNTERS:
+                        deltas[STATUS_COUNTERS[new_status]] += 1
+                    if action == "cancel":
+                        deltas["last_position"] -= 1
+                        messages.append((queue.patient_id, "❌ Sizning navbatingiz bekor qilindi."))
+                    else:
+                        queue.publish()
+                    if action == "complete" and queue.started_at:
+                        durations[queue.doctor_id].append((queue.completed_at - queue.started_at).total_seconds() / 60)
+
+            cancelled = defaultdict(list)
+            # Mijoz har bir "cancelled" da keyingi kutayotganlarni bittaga siljitadi: kattasidan boshlab
+            # yuborilsa, hali qo'llanmagan bekor qilishlar o'rni o'zgarmaydi
+            for queue in sorted(by_action.get("cancel", []), key=lambda q: -q.position):
+                cancelled[(queue.doctor_id, queue.queue_day)].append(queue.position)
+                publish_queue_event(queue.doctor_id, "cancelled", id=queue.pk, position=queue.position)
+            for (doctor_id, day), positions in cancelled.items():
+                Queue.close_gaps(doctor_id, day, positions)
+                messages += Notification.waiting_messages(doctor_id, day, SHIFT_MESSAGE, from_position=min(positions))
+
+            for (doctor_id, day), deltas in counters.items():
+                DailyQueueCounter.apply(doctor_id, day, **deltas)
+            for doctor_id, minutes in durations.items():
+                ConsultationEstimate.record(doctor_id, *minutes)
+            Notification.fan_out(messages)
+
     def cancel_queue(self):
         """❌ Bemor navbatdan voz kechsa, keyingi bemorlarning navbati oldinga siljiydi"""
-        if self.status == "waiting":
-            self.status = "cancelled"
-            self.save()
-
-            # Keyingi bemorlarning navbatini oldinga siljitish
-            next_patients = Queue.objects.filter(position__gt=self.position, status="waiting").order_by("position")
-            for q in next_patients:
-                q.position -= 1
-                q.save()
-
-            Notification.send_notification(
-                recipient=self.patient,
-                message=f"❌ Sizning navbatingiz bekor qilindi.",
-                notification_type="queue_update"
+        if self.status != "waiting":
+            return False
+
+        day = self.queue_day
+        with transaction.atomic():
+            # Shartli UPDATE: parallel so'rov allaqachon bekor qilgan bo'lsa, qayta siljitmaymiz
+            cancelled = Queue.objects.filter(pk=self.pk, status="waiting").update(status="cancelled")
+            if not cancelled:
+                return False
+
+            Queue.close_gaps(self.doctor_id, day, [self.position])
+
+            # Hisoblagich ham bittaga kamayadi, aks holda keyingi bemor raqami orasida bo'shliq qoladi
+            DailyQueueCounter.apply(self.doctor_id, day, last_position=-1, waiting_count=-1)
+            # Bitta delta: mijozlar shu o'rindan keyingi kutayotganlarni o'zlari siljitadi
+            publish_queue_event(self.doctor_id, "cancelled", id=self.pk, position=self.position)
+
+            # Bekor qilgan bemor va orqasida siljigan barcha bemorlar: bitta INSERT
+            Notification.fan_out(
+                [(self.patient_id, "❌ Sizning navbatingiz bekor qilindi.")]
+                + Notification.waiting_messages(self.doctor_id, day, SHIFT_MESSAGE, from_position=self.position)
             )
+        self.status = "cancelled"
+        return True
 
-            if next_patients.exists():
-                next_patient = next_patients.first()
-                Notification.send_notification(
-                    recipient=next_patient.patient,
-                    message=f"📢 Hurmatli {next_patient.patient.user.username}, navbatingiz bir pog‘ona oldinga siljidi.",
-                    notification_type="queue_update"
+
+# Bekor qilingan o'rindan keyingi, oldinga siljigan bemorlarga xabar (Notification.waiting_messages shabloni).
+# Bitta so'rovda bir nechta o'rin bekor qilinishi mumkin, shuning uchun necha pog'ona emas, yangi raqam aytiladi
+SHIFT_MESSAGE = "📢 Hurmatli {full_name}, navbatingiz oldinga siljidi. Yangi raqamingiz: {position}."
+
+# Shartli UPDATE navbatni kutilgan holatda topmadi (parallel so'rov ulgurdi): 409 javob matni
+STATUS_CONFLICT_MESSAGE = "Navbat holati parallel so'rov tomonidan o'zgartirildi"
+
+# Amal -> (talab qilinadigan holat, yangi holat)
+QUEUE_ACTIONS = {
+    "cancel": ("waiting", "cancelled"),
+    "start": ("waiting", "in_progress"),
+    "complete": ("in_progress", "completed"),
+}
+
+# Holat -> DailyQueueCounter maydoni (bekor qilinganlar sanalmaydi)
+STATUS_COUNTERS = {
+    "waiting": "waiting_count",
+    "in_progress": "in_progress_count",
+    "completed": "completed_count",
+}
+
+
+class DailyQueueCounter(models.Model):
+    """
+    Har bir shifokor uchun kunlik navbat hisoblagichi: navbat raqamlari va holatlar soni.
+    Navbat, qabul boshlash/yakunlash va bekor qilishda shu tranzaksiyada yangilanadi,
+    shuning uchun statistika va kunlik limit bitta qatordan o'qiladi.
+    """
+    doctor = models.ForeignKey(Doctor, on_delete=models.CASCADE)
+    day = models.DateField()
+    last_position = models.PositiveIntegerField(default=0)
+    waiting_count = models.PositiveIntegerField(default=0)
+    in_progress_count = models.PositiveIntegerField(default=0)
+    completed_count = models.PositiveIntegerField(default=0)
+
+    COUNTER_FIELDS = ["last_position", "waiting_count", "in_progress_count", "completed_count"]
+
+    class Meta:
+        verbose_name = "navbat hisoblagichi"
+        verbose_name_plural = "navbat hisoblagichlari"
+        constraints = [
+            models.UniqueConstraint(fields=["doctor", "day"], name="unique_queue_counter_per_doctor_day"),
+        ]
+
+    def __str__(self):
+        return f"{self.doctor_id} - {self.day}: {self.last_position}"
+
+    @staticmethod
+    def aggregates():
+        """Xom navbat qatorlaridan hisoblagich qiymatlarini hisoblovchi ifodalar"""
+        values = {
+            "last_position": Coalesce(Max("position", filter=~Q(status="cancelled")), 0),
+        }
+        for status, field in STATUS_COUNTERS.items():
+            values[field] = Count("pk", filter=Q(status=status))
+        return values
+
+    @staticmethod
+    def count_rows(doctor, day):
+        return Queue.doctor_day_queue(doctor, day).aggregate(**DailyQueueCounter.aggregates())
+
+    @staticmethod
+    def stats(doctor, day):
+        """Bitta indeksli o'qish; hisoblagich hali yaratilmagan bo'lsa — nollar"""
+        values = DailyQueueCounter.objects.filter(doctor=doctor, day=day).values(
+            *DailyQueueCounter.COUNTER_FIELDS
+        ).first()
+        return values or dict.fromkeys(DailyQueueCounter.COUNTER_FIELDS, 0)
+
+    @staticmethod
+    def apply(doctor, day, pending=False, **deltas):
+        """
+        Hisoblagichlarni F() bilan o'zgartiradi. Bu UPDATE qatorni qulflaydi (SQLite'da yozish qulfini oladi),
+        shuning uchun parallel so'rovlar bir-birining o'zgarishini yo'qotmaydi.
+        Qator hali bo'lmasa, u xom navbat qatorlaridan bir marta hisoblab yaratiladi;
+        pending=True — navbat qatori hali yozilmagan, o'zgarish hisobga qo'shiladi.
+        """
+        counters = DailyQueueCounter.objects.filter(doctor=doctor, day=day)
+        changes = {field: F(field) + delta for field, delta in deltas.items()}
+        with transaction.atomic():
+            if counters.update(**changes):
+                return counters
+
+            values = DailyQueueCounter.count_rows(doctor, day)
+            if pending:
+                for field, delta in deltas.items():
+                    values[field] += delta
+            try:
+                with transaction.atomic():
+                    DailyQueueCounter.objects.create(doctor_id=getattr(doctor, "pk", doctor), day=day, **values)
+            except IntegrityError:
+                # Parallel so'rov hisoblagichni birinchi bo'lib yaratdi
+                counters.update(**changes)
+        return counters
+
+    @staticmethod
+    def next_position(doctor, day):
+        """Navbat raqamini atomar tarzda beradi (yangi bemor kutayotganlar soniga ham qo'shiladi)"""
+        with transaction.atomic():
+            counters = DailyQueueCounter.apply(doctor, day, pending=True, last_position=1, waiting_count=1)
+            return counters.values_list("last_position", flat=True).get()
+
+    @staticmethod
+    def transition(doctor, day, old_status, new_status):
+        """Navbat qatori holati o'zgargandan keyin chaqiriladi"""
+        if old_status == new_status:
+            return
+        deltas = {}
+        if old_status in STATUS_COUNTERS:
+            deltas[STATUS_COUNTERS[old_status]] = -1
+        if new_status in STATUS_COUNTERS:
+            deltas[STATUS_COUNTERS[new_status]] = 1
+        if deltas:
+            DailyQueueCounter.apply(doctor, day, **deltas)
+
+
+class ConsultationEstimate(models.Model):
+    """
+    Shifokor qabuli davomiyligining eksponensial tortilgan o'rtachasi va dispersiyasi.
+    Har bir yakunlangan qabulda O(1) da yangilanadi.
+    """
+    DEFAULT_MINUTES = 15
+    ALPHA = 0.2
+
+    doctor = models.OneToOneField(Doctor, on_delete=models.CASCADE, related_name="consultation_estimate")
+    mean_minutes = models.FloatField(default=DEFAULT_MINUTES)
+    variance = models.FloatField(default=0)
+    samples = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "qabul davomiyligi bahosi"
+        verbose_name_plural = "qabul davomiyligi baholari"
+
+    def __str__(self):
+        return f"{self.doctor_id}: {self.mean_minutes:.1f} daq ({self.samples})"
+
+    @property
+    def std_minutes(self):
+        return self.variance ** 0.5
+
+    def add_sample(self, minutes):
+        if not self.samples:
+            self.mean_minutes, self.variance = minutes, 0.0
+        else:
+            diff = minutes - self.mean_minutes
+            increment = self.ALPHA * diff
+            self.mean_minutes += increment
+            self.variance = (1 - self.ALPHA) * (self.variance + diff * increment)
+        self.samples += 1
+
+    @staticmethod
+    def record(doctor_id, *minutes):
+        with transaction.atomic():
+            estimate, _ = ConsultationEstimate.objects.select_for_update().get_or_create(doctor_id=doctor_id)
+            for sample in minutes:
+                estimate.add_sample(sample)
+            estimate.save()
+        return estimate
+
+    @staticmethod
+    def mean_for(doctor_id):
+        mean = ConsultationEstimate.objects.filter(doctor_id=doctor_id).values_list("mean_minutes", flat=True).first()
+        return ConsultationEstimate.DEFAULT_MINUTES if mean is None else mean
+
+
+class QueueArchive(models.Model):
+    """O'tgan kunlar navbati (tahlil uchun). Jonli Queue jadvali kichik bo'lib qoladi"""
+    original_id = models.BigIntegerField(unique=True)
+    patient = models.ForeignKey(Patient, on_delete=models.SET_NULL, null=True, blank=True)
+    doctor = models.ForeignKey(Doctor, on_delete=models.SET_NULL, null=True, blank=True)
+    room = models.ForeignKey(Room, on_delete=models.SET_NULL, null=True, blank=True)
+    position = models.PositiveIntegerField()
+    status = models.CharField(max_length=20)
+    created_at = models.DateTimeField()
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "navbat arxivi"
+        verbose_name_plural = "navbatlar arxivi"
+        indexes = [
+            models.Index(fields=["doctor", "created_at"], name="queue_archive_doctor_day_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.original_id} - {self.position} ({self.status})"
+
+    @staticmethod
+    def archive_before(cutoff, batch_size=500):
+        """
+        cutoff dan oldin yaratilgan navbatlarni arxivga partiyalab ko'chiradi.
+        Har bir partiya alohida tranzaksiya: bulk_create + bitta DELETE.
+        Jarayon to'xtab qolsa, qayta ishga tushirish qolgan joyidan davom etadi.
+        Har bir partiyadan keyin ko'chirilgan qatorlar soni qaytariladi (yield).
+        """
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    Queue.objects.filter(created_at__lt=cutoff).order_by("pk")[:batch_size]
                 )
+                if not batch:
+                    break
+                QueueArchive.objects.bulk_create(
+                    [
+                        QueueArchive(
+                            original_id=q.pk,
+                            patient_id=q.patient_id,
+                            doctor_id=q.doctor_id,
+                            room_id=q.room_id,
+                            position=q.position,
+                            status=q.status,
+                            created_at=q.created_at,
+                            started_at=q.started_at,
+                            completed_at=q.completed_at,
+                        )
+                        for q in batch
+                    ],
+                    ignore_conflicts=True,
+                )
+                Queue.objects.filter(pk__in=[q.pk for q in batch]).delete()
+            yield len(batch)
+
+        # O'tgan kunlar hisoblagichlari endi kerak emas
+        DailyQueueCounter.objects.filter(day__lt=timezone.localtime(cutoff).date()).delete()
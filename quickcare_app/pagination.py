@@ -0,0 +1,136 @@
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Indekslangan ustun + id bo'yicha kursorli sahifalash (keyset).
+
+    PageNumberPagination har sahifada COUNT(*) va OFFSET bajaradi, chuqur sahifalar jadval
+    o'sgani sari sekinlashadi. Bu yerda kursor oxirgi qatorning (qiymat, id) juftligini saqlaydi:
+
+        WHERE sent_at < :qiymat OR (sent_at = :qiymat AND id < :id) ORDER BY sent_at DESC, id DESC
+
+    shuning uchun 1-sahifa ham, 10 000-sahifa ham indeksdan bir xil tezlikda o'qiladi.
+    Juftlik yagona bo'lgani uchun DRF'ning offset'li kursoriga ehtiyoj qolmaydi.
+
+    ordering id bilan tugagan kortej bo'lsa (masalan, ('position', 'created_at', 'id')), kalit shu
+    ustunlarning barchasidan leksikografik tuziladi.
+    """
+    ordering = '-created_at'
+
+    def get_ordering(self, request, queryset, view):
+        ordering = tuple(super().get_ordering(request, queryset, view))
+        if ordering[-1].lstrip('-') in ('id', 'pk'):
+            return ordering
+        # ?ordering= faqat birinchi ustunni tanlaydi, id esa doim oxirgi kalit
+        field = ordering[0]
+        return (field, '-id' if field.startswith('-') else 'id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            queryset = queryset.filter(self.position_filter(queryset.model, current_position, reverse))
+
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = results[:self.page_size]
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def position_filter(self, model, position, reverse):
+        """Kursordagi (qiymat, ..., id) dan keyingi qatorlar sharti"""
+        values = position.rsplit('|', len(self.ordering) - 1)
+        if len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        keys = []
+        for ordering, value in zip(self.ordering, values):
+            field = ordering.lstrip('-')
+            # Kursor qatordan oldinga yoki orqaga yuradi: (kursor teskari) XOR (tartib kamayuvchi)
+            lookup = 'lt' if reverse != ordering.startswith('-') else 'gt'
+            keys.append((field, lookup, self.parse_value(model, field, value)))
+
+        field, lookup, value = keys[-1]
+        following = Q(**{f'{field}__{lookup}': value})
+        if len(keys) == 1:
+            return following
+        for field, lookup, value in reversed(keys[1:-1]):
+            following = Q(**{f'{field}__{lookup}': value}) | (Q(**{field: value}) & following)
+        field, lookup, value = keys[0]
+        # Ortiqcha ko'rinuvchi "<=" chegarasi indeksni diapazon bo'yicha qidirishga majbur qiladi,
+        # aks holda OR sharti tufayli indeks boshidan boshlab ko'rib chiqiladi
+        return Q(**{f'{field}__{lookup}e': value}) & (Q(**{f'{field}__{lookup}': value}) | following)
+
+    def parse_value(self, model, field, value):
+        try:
+            return model._meta.get_field(field).to_python(value)
+        except ValidationError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def _get_position_from_instance(self, instance, ordering):
+        return '|'.join(
+            super(KeysetCursorPagination, self)._get_position_from_instance(instance, (field,))
+            for field in ordering
+        )
+
+
+class NotificationPagination(KeysetCursorPagination):
+    ordering = '-sent_at'
+
+
+class QueuePagination(KeysetCursorPagination):
+    # Navbat tartibida (raqam bo'yicha), keyin yozilgan vaqt — avvalgi ordering = ['position', 'created_at']
+    ordering = ('position', 'created_at', 'id')
+
+
+class EmergencyPagination(KeysetCursorPagination):
+    ordering = '-created_at'
+
+
+class PrescriptionPagination(KeysetCursorPagination):
+    ordering = '-prescribed_at'
@@ -0,0 +1,354 @@
+"""
+Dorilarni nomi va tavsifi bo'yicha qidirish: natijalar ahamiyati bo'yicha saralangan, prefiks va
+xatoli yozilishlarni hisobga oladi.
+
+Qidiruv ikki bosqichda:
+1. Har bir so'z prefiks sifatida (ibu -> ibuprofen) nomda yoki tavsifda bo'lishi kerak. Barcha so'zlari
+   nomda topilganlar birinchi (qisqa nom oldin), keyin nom va tavsifdagi mosliklar ahamiyati bo'yicha.
+2. Hech narsa topilmasa — xatoli yozilish: dori nomlari trigramlar (3 harfli bo'laklar) o'xshashligi
+   bo'yicha qidiriladi (paratsetmol -> Paratsetamol). Topilgan bo'lsa bu bosqich o'tkazib yuboriladi:
+   trigram so'rovi qimmatroq, aniq mosliklar esa baribir yuqorida turardi.
+
+Ikki backend bor:
+- FTS5Search: SQLite FTS5 virtual jadvallari (medicine_fts — unicode61, medicine_fts_trigram — trigram
+  tokenizer). Indeks bazada, Medicine.save()/delete() bilan o'sha tranzaksiyada yangilanadi.
+- TrigramSearch: xotiradagi sof Python indeksi — FTS5 bo'lmagan bazalar uchun (PostgreSQL yoki FTS5'siz
+  SQLite). Birinchi so'rovda bazadan yuklanadi, o'zgarishlar on_commit bilan (dispatch.py kabi).
+
+settings.MEDICINE_SEARCH_BACKEND: "auto" (FTS5 jadvallari bo'lsa FTS5), "fts5" yoki "trigram".
+"""
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+
+TOKEN = re.compile(r"\w+")
+NAME_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+# Xatoli so'z dori nomidagi so'zga kamida shunchalik o'xshash bo'lishi kerak (trigramlar Jaccard indeksi)
+SIMILARITY = 0.3
+FUZZY_CANDIDATES = 200
+FTS_TABLE = "medicine_fts"
+TRIGRAM_TABLE = "medicine_fts_trigram"
+
+
+def tokenize(text):
+    """Kichik harfli, diakritikasiz so'zlar (FTS5 unicode61 remove_diacritics bilan bir xil)"""
+    text = unicodedata.normalize("NFKD", (text or "").casefold())
+    return TOKEN.findall("".join(ch for ch in text if not unicodedata.combining(ch)))
+
+
+def trigrams(word):
+    """Chetlari to'ldirilgan trigramlar: "ibu" -> {"  i", " ib", "ibu", "bu "}"""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(word, other):
+    a, b = trigrams(word), trigrams(other)
+    return len(a & b) / len(a | b)
+
+
+def fuzzy_score(tokens, name):
+    """Nom so'rovga qanchalik o'xshash (0..1); biror so'z o'xshamasa None"""
+    terms = tokenize(name)
+    if not terms:
+        return None
+    total = 0.0
+    for token in tokens:
+        best = max(1.0 if term.startswith(token) else similarity(token, term) for term in terms)
+        if best < SIMILARITY:
+            return None
+        total += best
+    return total / len(tokens)
+
+
+class FTS5Search:
+    """SQLite FTS5: rowid = Medicine.id"""
+
+    def update(self, pk, name, description):
+        self.update_many([(pk, name, description)])
+
+    def update_many(self, rows):
+        rows = [(pk, name, description or "") for pk, name, description in rows]
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            for table in (FTS_TABLE, TRIGRAM_TABLE):
+                cursor.executemany(f"DELETE FROM {table} WHERE rowid = %s", [(pk,) for pk, _, _ in rows])
+            cursor.executemany(f"INSERT INTO {FTS_TABLE} (rowid, name, description) VALUES (%s, %s, %s)", rows)
+            cursor.executemany(
+                f"INSERT INTO {TRIGRAM_TABLE} (rowid, name) VALUES (%s, %s)", [(pk, name) for pk, name, _ in rows]
+            )
+
+    def remove(self, pk):
+        with connection.cursor() as cursor:
+            for table in (FTS_TABLE, TRIGRAM_TABLE):
+                cursor.execute(f"DELETE FROM {table} WHERE rowid = %s", [pk])
+
+    def rebuild(self):
+        from quickcare_app.models import Medicine
+
+        source = Medicine._meta.db_table
+        with transaction.atomic(), connection.cursor() as cursor:
+            for table in (FTS_TABLE, TRIGRAM_TABLE):
+                cursor.execute(f"DELETE FROM {table}")
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, name, description) "
+                f"SELECT id, name, COALESCE(description, '') FROM {source}"
+            )
+            cursor.execute(f"INSERT INTO {TRIGRAM_TABLE} (rowid, name) SELECT id, name FROM {source}")
+
+    def search(self, query, limit=20):
+        """Medicine id'lari — eng mosidan boshlab, ko'pi bilan limit ta"""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        # So'zlar \w+ bo'lgani uchun qo'shtirnoq ichida xavfsiz; "so'z"* — prefiks so'rovi
+        prefixes = " ".join(f'"{token}"*' for token in tokens)
+        with connection.cursor() as cursor:
+            # Barcha so'zlar nomda: qisqa nom oldin (bm25 uzunlikni butun qator — tavsif bilan — bo'yicha oladi)
+            cursor.execute(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s ORDER BY length(name), rowid LIMIT %s",
+                [f"name : ({prefixes})", limit],
+            )
+            found = [pk for pk, in cursor.fetchall()]
+            if len(found) < limit:
+                cursor.execute(
+                    f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+                    f"ORDER BY bm25({FTS_TABLE}, {NAME_WEIGHT}, {DESCRIPTION_WEIGHT}) LIMIT %s",
+                    [prefixes, limit + len(found)],
+                )
+                seen = set(found)
+                found += [pk for pk, in cursor.fetchall() if pk not in seen][:limit - len(found)]
+            if found:
+                return found
+
+            groups = [" OR ".join(f'"{chunk}"' for chunk in _chunks(token)) for token in tokens if len(token) >= 3]
+            if not groups:
+                return found
+            cursor.execute(
+                f"SELECT rowid, name FROM {TRIGRAM_TABLE} WHERE {TRIGRAM_TABLE} MATCH %s "
+                f"ORDER BY bm25({TRIGRAM_TABLE}) LIMIT %s",
+                [" AND ".join(f"({group})" for group in groups), FUZZY_CANDIDATES],
+            )
+            candidates = cursor.fetchall()
+        return _rank_fuzzy(tokens, candidates, limit)
+
+
+def _chunks(word):
+    """
+    Trigram jadvalidan nomzod olish uchun bo'laklar. Bitta xatoli so'zda 2 ta, 9+ harflisida 3 ta ketma-ket
+    bo'lakdan kamida bittasi buzilmaydi (1 va 2 ta xato uchun) — har bir trigram bo'yicha OR'dan ancha tanlovchan.
+    Qisqa so'zlar uchun barcha trigramlar.
+    """
+    if len(word) < 6:
+        return sorted({word[i:i + 3] for i in range(len(word) - 2)})
+    size = len(word) // (3 if len(word) >= 9 else 2)
+    return [word[i:i + size] for i in range(0, len(word) - size + 1, size)]
+
+
+def _rank_fuzzy(tokens, candidates, limit):
+    scored = []
+    for pk, name in candidates:
+        score = fuzzy_score(tokens, name)
+        if score is not None:
+            scored.append((-score, len(name), pk))
+    return [pk for _, _, pk in sorted(scored)[:limit]]
+
+
+class TrigramSearch:
+    """
+    Xotiradagi teskari indeks: so'z -> dorilar (nom va tavsif alohida), saralangan lug'at (prefikslar
+    uchun bisect) va trigram -> nomdagi so'zlar (xatoli yozilishlar uchun).
+    """
+
+    def __init__(self):
+        self._docs = {}
+        self._names = defaultdict(set)
+        self._descriptions = defaultdict(set)
+        self._vocabulary = []
+        self._grams = defaultdict(set)
+        self._loaded = False
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def ensure_loaded(self):
+        if not self._loaded:
+            self.reload()
+
+    def reload(self):
+        from quickcare_app.models import Medicine
+
+        with self._lock:
+            self.clear()
+            for pk, name, description in Medicine.objects.values_list("pk", "name", "description").iterator():
+                self._add(pk, name, description)
+            self._loaded = True
+
+    def reset(self):
+        """Keyingi so'rovda bazadan qayta yuklash (testlar, boshqa jarayon o'zgarishlari)"""
+        with self._lock:
+            self.clear()
+            self._loaded = False
+
+    def clear(self):
+        with self._lock:
+            self._docs.clear()
+            self._names.clear()
+            self._descriptions.clear()
+            self._vocabulary = []
+            self._grams.clear()
+
+    def update(self, pk, name, description):
+        self.update_many([(pk, name, description)])
+
+    def update_many(self, rows):
+        rows = list(rows)
+
+        def apply():
+            with self._lock:
+                if not self._loaded:
+                    return
+                for pk, name, description in rows:
+                    self._discard(pk)
+                    self._add(pk, name, description)
+
+        transaction.on_commit(apply)
+
+    def remove(self, pk):
+        def apply():
+            with self._lock:
+                self._discard(pk)
+
+        transaction.on_commit(apply)
+
+    def rebuild(self):
+        self.reload()
+
+    def _add(self, pk, name, description):
+        name_terms, description_terms = set(tokenize(name)), set(tokenize(description))
+        self._docs[pk] = (name, name_terms, description_terms)
+        for term in name_terms:
+            if not self._names[term]:
+                for gram in trigrams(term):
+                    self._grams[gram].add(term)
+            self._names[term].add(pk)
+            self._remember(term)
+        for term in description_terms:
+            self._descriptions[term].add(pk)
+            self._remember(term)
+
+    def _remember(self, term):
+        i = bisect_left(self._vocabulary, term)
+        if i == len(self._vocabulary) or self._vocabulary[i] != term:
+            self._vocabulary.insert(i, term)
+
+    def _discard(self, pk):
+        doc = self._docs.pop(pk, None)
+        if doc is None:
+            return
+        _, name_terms, description_terms = doc
+        for term in name_terms:
+            self._names[term].discard(pk)
+            if not self._names[term]:
+                del self._names[term]
+                for gram in trigrams(term):
+                    self._grams[gram].discard(term)
+                    if not self._grams[gram]:
+                        del self._grams[gram]
+        for term in description_terms:
+            self._descriptions[term].discard(pk)
+            if not self._descriptions[term]:
+                del self._descriptions[term]
+        for term in name_terms | description_terms:
+            if term not in self._names and term not in self._descriptions:
+                i = bisect_left(self._vocabulary, term)
+                if i < len(self._vocabulary) and self._vocabulary[i] == term:
+                    del self._vocabulary[i]
+
+    def _prefix_terms(self, token):
+        i = bisect_left(self._vocabulary, token)
+        while i < len(self._vocabulary) and self._vocabulary[i].startswith(token):
+            yield self._vocabulary[i]
+            i += 1
+
+    def search(self, query, limit=20):
+        """Medicine id'lari — eng mosidan boshlab, ko'pi bilan limit ta"""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        self.ensure_loaded()
+        with self._lock:
+            scores = None
+            for token in tokens:
+                # Har bir so'z uchun hujjatning eng yaxshi mosligi; to'liq so'z prefiksdan biroz ustun
+                best = defaultdict(float)
+                for term in self._prefix_terms(token):
+                    exact = 1.0 if term == token else 0.7
+                    for pk in self._names.get(term, ()):
+                        best[pk] = max(best[pk], NAME_WEIGHT * exact)
+                    for pk in self._descriptions.get(term, ()):
+                        best[pk] = max(best[pk], DESCRIPTION_WEIGHT * exact)
+                if scores is None:
+                    scores = best
+                else:
+                    scores = {pk: score + best[pk] for pk, score in scores.items() if pk in best}
+                if not scores:
+                    break
+            ranked = sorted((-score, len(self._docs[pk][0]), pk) for pk, score in (scores or {}).items())
+            if ranked:
+                return [pk for _, _, pk in ranked[:limit]]
+
+            # Xatoli yozilish: o'xshashlik har bir (so'z, lug'at so'zi) juftligi uchun bir marta hisoblanadi,
+            # dori nomi esa har bir so'rov so'ziga o'xshash so'z bo'lsagina nomzod (fuzzy_score bilan bir xil)
+            matches, candidates = [], None
+            for token in tokens:
+                scores = {term: 1.0 for term in self._prefix_terms(token) if term in self._names}
+                shared = defaultdict(int)
+                for gram in trigrams(token):
+                    for term in self._grams.get(gram, ()):
+                        shared[term] += 1
+                size = len(trigrams(token))
+                for term, count in shared.items():
+                    # Jaccard = umumiy / (|A| + |B| - umumiy) <= umumiy / |A|: aniq hisob faqat shundan o'tganlarga
+                    if term not in scores and count >= SIMILARITY * size:
+                        score = similarity(token, term)
+                        if score >= SIMILARITY:
+                            scores[term] = score
+                docs = set().union(*(self._names[term] for term in scores))
+                candidates = docs if candidates is None else candidates & docs
+                matches.append(scores)
+                if not candidates:
+                    return []
+
+            ranked = []
+            for pk in candidates:
+                name, name_terms, _ = self._docs[pk]
+                score = sum(max(scores.get(term, 0.0) for term in name_terms) for scores in matches)
+                ranked.append((-score / len(tokens), len(name), pk))
+        return [pk for _, _, pk in sorted(ranked)[:limit]]
+
+
+fts5_search = FTS5Search()
+trigram_search = TrigramSearch()
+_fts5_ready = None
+
+
+def search_backend():
+    """settings.MEDICINE_SEARCH_BACKEND bo'yicha backend; "auto" da FTS5 jadvallari borligi tekshiriladi"""
+    global _fts5_ready
+    choice = getattr(settings, "MEDICINE_SEARCH_BACKEND", "auto")
+    if choice == "fts5":
+        return fts5_search
+    if choice == "trigram":
+        return trigram_search
+    if _fts5_ready is None:
+        _fts5_ready = connection.vendor == "sqlite" and FTS_TABLE in connection.introspection.table_names()
+    return fts5_search if _fts5_ready else trigram_search
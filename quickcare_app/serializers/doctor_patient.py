@@ -40,6 +40,8 @@ class PatientSerializer(serializers.ModelSerializer):
         model = Patient
         fields = "__all__"
         read_only_fields = ['id', "age", "created_at"]
+        # ?fields= bo'lganda only() uchun (serializers/sparse.py)
+        field_sources = {'age': ['birth_date']}
 
     def get_full_name(self, obj):
         return f"{obj.user.first_name} {obj.user.last_name}".strip()
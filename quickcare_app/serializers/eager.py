@@ -0,0 +1,75 @@
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+
+def _relation_path(model, attrs):
+    """source atributlaridan ForeignKey/OneToOne orqali o'tadigan eng uzun yo'l"""
+    path = []
+    for attr in attrs:
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            break
+        if not (field.many_to_one or field.one_to_one):
+            break
+        path.append(attr)
+        model = field.related_model
+    return path
+
+
+def _collect(serializer, prefix, select, prefetch, in_many):
+    meta = getattr(serializer, 'Meta', None)
+    model = getattr(meta, 'model', None)
+    # Ko'p qatorli bog'lanish ichidagi select_related ham prefetch orqali yuklanadi
+    joined = prefetch if in_many else select
+
+    for lookup in getattr(meta, 'select_related', ()):
+        joined.add(prefix + lookup)
+    for lookup in getattr(meta, 'prefetch_related', ()):
+        prefetch.add(prefix + lookup)
+
+    if model is None:
+        return
+
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+        attrs = field.source_attrs
+        if isinstance(field, serializers.ListSerializer):
+            path = prefix + '__'.join(attrs)
+            prefetch.add(path)
+            _collect(field.child, path + '__', select, prefetch, True)
+        elif isinstance(field, serializers.BaseSerializer):
+            relation = _relation_path(model, attrs)
+            if len(relation) == len(attrs):
+                path = prefix + '__'.join(relation)
+                joined.add(path)
+                _collect(field, path + '__', select, prefetch, in_many)
+        elif isinstance(field, serializers.ManyRelatedField):
+            prefetch.add(prefix + '__'.join(attrs))
+        elif len(attrs) > 1:
+            # masalan source="department.name" -> select_related("department")
+            relation = _relation_path(model, attrs[:-1])
+            if relation:
+                joined.add(prefix + '__'.join(relation))
+
+
+@lru_cache(maxsize=None)
+def eager_loading(serializer_class):
+    """
+    Serializer o'qiydigan bog'lanishlar: (select_related, prefetch_related).
+
+    Nuqtali source'lar (department.name) va ichma-ich serializer'lar avtomatik aniqlanadi.
+    SerializerMethodField ichida o'qiladigan bog'lanishlar Meta'da e'lon qilinadi:
+
+        class Meta:
+            select_related = ['patient__user']
+            prefetch_related = [...]
+    """
+    select, prefetch = set(), set()
+    _collect(serializer_class(), '', select, prefetch, False)
+    # select_related bilan yuklanadiganlarni qayta prefetch qilish shart emas
+    prefetch = {lookup for lookup in prefetch if lookup not in select}
+    return tuple(sorted(select)), tuple(sorted(prefetch))
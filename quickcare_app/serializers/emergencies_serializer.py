@@ -7,7 +7,7 @@ class AmbulanceSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Ambulance
-        fields = ['id', 'plate_number', 'status', 'status_display', 'current_location']
+        fields = ['id', 'plate_number', 'status', 'status_display', 'current_location', 'latitude', 'longitude']
 
 
 class EmergencySerializer(serializers.ModelSerializer):
@@ -33,7 +33,9 @@ class EmergencySerializer(serializers.ModelSerializer):
             'incorrect_type': 'Noto\'g\'ri ID formati.'
         }
     )
+    ambulance = AmbulanceSerializer(read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
+    severity_display = serializers.CharField(source='get_severity_display', read_only=True)
 
     class Meta:
         model = Emergency
@@ -43,18 +45,25 @@ class EmergencySerializer(serializers.ModelSerializer):
             'doctor', 'doctor_id',
             'description',
             'status', 'status_display',
+            'severity', 'severity_display',
             'ambulance_requested', 'can_request_ambulance',
+            'ambulance',
             'created_at',
         ]
         read_only_fields = [
             'status_display',
+            'severity_display',
             'created_at',
             'can_request_ambulance'
         ]
+        field_sources = {'can_request_ambulance': ['status', 'ambulance_requested']}
         extra_kwargs = {
             'status': {
                 'help_text': f"Mavjud statuslar: {','.join([choice[0] for choice in Emergency.Status.choices])}"
             },
+            'severity': {
+                'help_text': "Triaj darajasi: 1 — hayotga xavfli ... 4 — yengil"
+            },
             'ambulance_requested': {
                 'help_text': 'Agar tez yordam chaqirish kerak bo\'lsa, belgilang'
             }
@@ -98,10 +107,51 @@ class EmergencySerializer(serializers.ModelSerializer):
 
             # Agar status "resolved" ga o'zgartirilsa, tez yordamni bo'shatish
             if instance.status == Emergency.Status.RESOLVED and instance.ambulance:
-                instance.ambulance.mark_available()
+                instance.ambulance.release()
 
             return instance
         except Exception as e:
             raise serializers.ValidationError(
                 {'non_field_errors': [f'Yangilashda xato yuz berdi: {str(e)}']}
-            )
\ No newline at end of file
+            )
+
+class CoordinatesSerializer(serializers.Serializer):
+    latitude = serializers.FloatField(min_value=-90, max_value=90, required=False)
+    longitude = serializers.FloatField(min_value=-180, max_value=180, required=False)
+
+    def validate(self, data):
+        if ('latitude' in data) != ('longitude' in data):
+            raise serializers.ValidationError('Kenglik va uzunlik birga kiritilishi kerak')
+        return data
+
+
+class NearestAmbulanceQuerySerializer(CoordinatesSerializer):
+    """Eng yaqin mashinalar so'rovi: koordinata yoki favqulodda holat (bemor manzili koordinatasi)"""
+    emergency_id = serializers.PrimaryKeyRelatedField(
+        queryset=Emergency.objects.select_related('patient'), source='emergency', required=False
+    )
+    k = serializers.IntegerField(min_value=1, max_value=50, default=5)
+
+    def validate(self, data):
+        data = super().validate(data)
+        if 'latitude' not in data:
+            patient = data['emergency'].patient if 'emergency' in data else None
+            if patient is None or patient.latitude is None or patient.longitude is None:
+                raise serializers.ValidationError(
+                    'Koordinata yoki manzili koordinatali bemorning favqulodda holati kiritilishi kerak'
+                )
+            data['latitude'], data['longitude'] = patient.latitude, patient.longitude
+        return data
+
+
+class TelemetryFixSerializer(serializers.Serializer):
+    ambulance_id = serializers.IntegerField(min_value=1)
+    latitude = serializers.FloatField(min_value=-90, max_value=90)
+    longitude = serializers.FloatField(min_value=-180, max_value=180)
+    recorded_at = serializers.DateTimeField()
+    speed = serializers.FloatField(min_value=0, required=False, allow_null=True, default=None)
+
+
+class TelemetryBatchSerializer(serializers.Serializer):
+    """Bir nechta mashinaning GPS nuqtalari bitta so'rovda"""
+    fixes = TelemetryFixSerializer(many=True, allow_empty=False, max_length=1000)
@@ -1,11 +1,20 @@
 from rest_framework import serializers
-from quickcare_app.models import Medicine, Pharmacy, PatientMedicine
+from quickcare_app.models import Medicine, Pharmacy, PatientMedicine, InventoryMovement, StockAlert
 
 class PharmacySerializer(serializers.ModelSerializer):
     class Meta:
         model = Pharmacy
         fields = "__all__"
 
+    def update(self, instance, validated_data):
+        """Qoldiqni to'g'ridan-to'g'ri yozish o'rniga farq harakatlar jurnaliga "adjustment" bo'lib tushadi"""
+        stock = validated_data.pop('stock', None)
+        instance = super().update(instance, validated_data)
+        if stock is not None:
+            Pharmacy.adjust(instance.pk, stock, note="API orqali tuzatildi")
+            instance.refresh_from_db(fields=['stock'])
+        return instance
+
 
 
 class MedicineSerializer(serializers.ModelSerializer):
@@ -14,13 +23,58 @@ class MedicineSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
+class MedicineImportSerializer(MedicineSerializer):
+    """
+    Katalog importi qatori (quickcare_app.importer). name bo'yicha upsert qilingani uchun unique
+    tekshiruvi (har bir qatorga bitta so'rov) o'chirilgan; stock — dorining zaxira qoldig'i.
+    """
+    stock = serializers.IntegerField(min_value=0, required=False, allow_null=True)
+
+    class Meta(MedicineSerializer.Meta):
+        fields = ['name', 'description', 'usage', 'side_effects', 'price', 'is_available', 'reorder_level', 'stock']
+        extra_kwargs = {'name': {'validators': []}}
+
+
+class MedicineImportUploadSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    format = serializers.ChoiceField(choices=['csv', 'ndjson'], required=False)
+
+
 class PatientMedicineSerializer(serializers.ModelSerializer):
-    patient_name = serializers.CharField(source='patinet.full_name', read_only=True)
+    patient_name = serializers.CharField(source='patient.full_name', read_only=True)
     medicine_name = serializers.CharField(source='medicine.name', read_only=True)
 
     class Meta:
         model = PatientMedicine
-        fields = ['id', 'patient', 'patient_name', 'medicine','medicine_name', 'dosage','prescribed_at']
+        fields = ['id', 'patient', 'patient_name', 'medicine','medicine_name', 'dosage', 'quantity', 'prescribed_at']
+
+    def validate_medicine(self, value):
+        if not value.is_available:
+            raise serializers.ValidationError("Dori mavjud emas yoki tugagan!")
+        return value
 
+    def create(self, validated_data):
+        """Retsept zaxiradan band qilish bilan birga yoziladi (PatientMedicine.prescribe)"""
+        try:
+            return PatientMedicine.prescribe(**validated_data)
+        except ValueError as e:
+            raise serializers.ValidationError({'error': str(e)})
 
 
+class StockQuantitySerializer(serializers.Serializer):
+    quantity = serializers.IntegerField(min_value=1)
+
+
+class InventoryMovementSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = InventoryMovement
+        fields = ['id', 'kind', 'delta', 'reservation', 'note', 'created_at']
+
+
+class StockAlertSerializer(serializers.ModelSerializer):
+    medicine = serializers.IntegerField(source='pharmacy.medicine_id', read_only=True)
+    kind_display = serializers.CharField(source='get_kind_display', read_only=True)
+
+    class Meta:
+        model = StockAlert
+        fields = ['id', 'pharmacy', 'medicine', 'kind', 'kind_display', 'stock', 'reorder_level', 'created_at']
@@ -9,8 +9,7 @@ class NotificationSerializer(serializers.ModelSerializer):
         fields = ["id", "recipient", "recipient_name", "message", "sent_at", "notification_type"]
 
     def create(self, validated_data):
-        notification = Notification.objects.create(**validated_data)
-        return notification
+        return Notification.send_notification(**validated_data)
 
 
 class CommentSerializer(serializers.ModelSerializer):
@@ -1,10 +1,61 @@
+from django.db import transaction
 from rest_framework import serializers
-from quickcare_app.models import Queue, Doctor, Patient, Notification, Room
+from quickcare_app.models import Queue, Doctor, Patient, Notification, Room, DailyQueueCounter, ConsultationEstimate
 from .doctor_patient import DoctorSerializer, PatientSerializer
 from .staff_serializer import RoomSerializer
 from django.utils.timezone import now
 
-class QueueSerializer(serializers.ModelSerializer):
+
+class EstimatedStartMixin:
+    """
+    Kutayotgan bemor uchun taxminiy qabul vaqti.
+    Hisoblagich va baho har bir (shifokor, kun) uchun bir marta o'qiladi va context'da saqlanadi;
+    ro'yxatda esa butun sahifa uchun ikki so'rovda oldindan yuklanadi (QueueEstimateListSerializer).
+    """
+
+    @staticmethod
+    def preload_estimates(context, queues):
+        cache = context.setdefault('queue_estimates', {})
+        keys = {(q.doctor_id, q.queue_day) for q in queues if q.status == 'waiting'} - cache.keys()
+        if not keys:
+            return cache
+        doctor_ids = {doctor_id for doctor_id, _ in keys}
+        counters = {
+            (row.pop('doctor_id'), row.pop('day')): row
+            for row in DailyQueueCounter.objects.filter(
+                doctor_id__in=doctor_ids, day__in={day for _, day in keys}
+            ).values('doctor_id', 'day', *DailyQueueCounter.COUNTER_FIELDS)
+        }
+        means = dict(
+            ConsultationEstimate.objects.filter(doctor_id__in=doctor_ids).values_list('doctor_id', 'mean_minutes')
+        )
+        for doctor_id, day in keys:
+            cache[(doctor_id, day)] = (
+                counters.get((doctor_id, day)) or dict.fromkeys(DailyQueueCounter.COUNTER_FIELDS, 0),
+                means.get(doctor_id, ConsultationEstimate.DEFAULT_MINUTES),
+            )
+        return cache
+
+    # get_estimated_start o'qiydigan ustunlar (Meta.field_sources uchun); queue_day created_at dan hisoblanadi
+    ESTIMATE_SOURCES = ['status', 'doctor', 'created_at', 'position']
+
+    def get_estimated_start(self, obj):
+        if obj.status != 'waiting':
+            return None
+        stats, mean_minutes = self.preload_estimates(self.context, [obj])[(obj.doctor_id, obj.queue_day)]
+        return obj.estimated_start(stats, mean_minutes)
+
+
+class QueueEstimateListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        queues = list(data.all() if hasattr(data, 'all') else data)
+        # ?fields= bilan estimated_start so'ralmagan bo'lsa, uning ustunlari ham yuklanmagan
+        if 'estimated_start' in self.child.fields:
+            EstimatedStartMixin.preload_estimates(self.context, queues)
+        return super().to_representation(queues)
+
+
+class QueueSerializer(EstimatedStartMixin, serializers.ModelSerializer):
     patient = PatientSerializer(read_only=True)
     doctor = DoctorSerializer(read_only=True)
     room = RoomSerializer(read_only=True)
@@ -27,6 +78,7 @@ class QueueSerializer(serializers.ModelSerializer):
     )
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     waiting_time = serializers.SerializerMethodField()
+    estimated_start = serializers.SerializerMethodField()
 
     class Meta:
         model = Queue
@@ -34,9 +86,15 @@ class QueueSerializer(serializers.ModelSerializer):
             'id', 'patient', 'doctor', 'room',
             'patient_id', 'doctor_id', 'room_id',
             'position', 'status', 'status_display',
-            'created_at', 'waiting_time'
+            'created_at', 'started_at', 'completed_at',
+            'waiting_time', 'estimated_start'
         ]
-        read_only_fields = ['position', 'created_at']
+        read_only_fields = ['position', 'created_at', 'started_at', 'completed_at']
+        list_serializer_class = QueueEstimateListSerializer
+        field_sources = {
+            'waiting_time': ['status', 'created_at'],
+            'estimated_start': EstimatedStartMixin.ESTIMATE_SOURCES,
+        }
 
     def get_waiting_time(self, obj):
         if obj.status == 'waiting':
@@ -60,10 +118,8 @@ class QueueSerializer(serializers.ModelSerializer):
                 {"patient": "Bu bemor allaqachon navbatda turibti."}
             )
         doctor = data.get('doctor')
-        active_patients_count = Queue.objects.filter(
-            doctor=doctor,
-            status__in=['waiting', 'in_progress']
-        ).count()
+        stats = DailyQueueCounter.stats(doctor, now().date())
+        active_patients_count = stats['waiting_count'] + stats['in_progress_count']
 
         if active_patients_count >= 20:
             raise serializers.ValidationError(
@@ -88,9 +144,11 @@ class QueueSerializer(serializers.ModelSerializer):
             )
         return queue
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         """
         Custom update method to handle status changes and notifications
+        (bildirishnomalar holat o'zgarishi bilan bitta tranzaksiyada yoziladi)
         """
         old_status = instance.status
         new_status = validated_data.get('status', old_status)
@@ -101,9 +159,10 @@ class QueueSerializer(serializers.ModelSerializer):
                 return instance
 
             if new_status == 'in_progress' and old_status == 'waiting':
+                room = instance.room or instance.doctor.room
                 Notification.send_notification(
                     recipient=instance.patient,
-                    message=f"🔔 Hurmatli {instance.patient.user.username}, hozir sizning navbatingiz. Iltimos, {instance.room.room_number} xonaga kiring.",
+                    message=f"🔔 Hurmatli {instance.patient.full_name}, hozir sizning navbatingiz. Iltimos, {room.room_number} xonaga kiring.",
                     notification_type='queue_update'
                 )
 
@@ -115,29 +174,41 @@ class QueueSerializer(serializers.ModelSerializer):
                 if next_queue:
                     Notification.send_notification(
                         recipient=next_queue.patient,
-                        message = f"🔔 Hurmatli {next_queue.patient.user.username}, tayyorlaning, sizning navbatingiz yaqinlashmoqda.",
+                        message = f"🔔 Hurmatli {next_queue.patient.full_name}, tayyorlaning, sizning navbatingiz yaqinlashmoqda.",
                         notification_type='queue_update'
                     )
 
+        validated_data.pop('status', None)
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save()
 
-            for attr, value in validated_data.items():
-                setattr(instance, attr, value)
-            instance.save()
-
-            return instance
+        # Holat alohida o'zgartiriladi: hisoblagichlar va jonli tablo shu yerda yangilanadi
+        if old_status != new_status:
+            instance.change_status(new_status)
+        return instance
 
-class QueueListSerializer(serializers.ModelSerializer):
+class QueueListSerializer(EstimatedStartMixin, serializers.ModelSerializer):
     patient_name = serializers.SerializerMethodField()
     doctor_name = serializers.SerializerMethodField()
     status_display = serializers.CharField(source='get_status_display', read_only=True)
+    estimated_start = serializers.SerializerMethodField()
 
     class Meta:
         model = Queue
         fields = [
             'id', 'patient_name', 'doctor_name',
             'position', 'status', 'status_display',
-            'created_at'
+            'created_at', 'estimated_start'
         ]
+        list_serializer_class = QueueEstimateListSerializer
+        # get_patient_name / get_doctor_name ichida o'qiladi
+        select_related = ['patient__user', 'doctor__user']
+        field_sources = {
+            'patient_name': ['patient__user__first_name', 'patient__user__last_name', 'patient__user__username'],
+            'doctor_name': ['doctor__user__first_name', 'doctor__user__last_name', 'doctor__user__username'],
+            'estimated_start': EstimatedStartMixin.ESTIMATE_SOURCES,
+        }
 
     def get_patient_name(self, obj):
         if obj.patient.user.first_name:
@@ -178,13 +249,10 @@ class QueueActionSerializer(serializers.Serializer):
         return data
 
 
+class QueueBulkActionItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    action = serializers.ChoiceField(choices=QueueActionSerializer.ACTION_CHOICES)
 
 
-
-
-
-
-
-
-
-
+class QueueBulkActionSerializer(serializers.Serializer):
+    actions = QueueBulkActionItemSerializer(many=True, allow_empty=False, max_length=200)
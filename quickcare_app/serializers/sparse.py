@@ -0,0 +1,177 @@
+"""
+Siyrak maydonlar (sparse fieldsets): mijoz faqat ko'rsatadigan maydonlarini so'raydi.
+
+    ?fields=id,status,patient.full_name    # faqat shu maydonlar (nuqta — ichma-ich serializer maydoni)
+    ?expand=doctor                          # ichma-ich obyekt to'liq; kengaytirilmaganlari faqat ID
+
+fields yoki expand berilganda ichma-ich serializer'lar (patient, doctor, ...) kengaytirilmasa ID ga
+aylanadi. Hech biri berilmasa — javob avvalgidek to'liq. So'rov ham shunga moslashadi:
+select_related faqat kengaytirilgan bog'lanishlarga, only() esa serializer o'qiydigan ustunlarga.
+
+SerializerMethodField va property'lar o'qiydigan ustunlar Meta'da e'lon qilinadi, aks holda bu
+serializer uchun only() qo'llanmaydi (kechiktirilgan ustun har bir qator uchun alohida so'rov bo'lardi):
+
+    class Meta:
+        field_sources = {'age': ['birth_date']}
+"""
+import re
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+from .eager import _collect, _relation_path
+
+DISPLAY_SOURCE = re.compile(r"^get_(\w+)_display$")
+
+
+def parse_field_list(value):
+    """"id,patient.full_name,patient.age" -> {'id': {}, 'patient': {'full_name': {}, 'age': {}}}"""
+    tree = {}
+    for item in (value or '').split(','):
+        node = tree
+        for part in item.strip().split('.'):
+            if part:
+                node = node.setdefault(part, {})
+    return tree
+
+
+def apply_sparse_fields(serializer, fields, expand):
+    """
+    Serializer maydonlarini joyida qisqartiradi. fields=None — barcha maydonlar.
+    Noma'lum maydon so'ralsa ValidationError.
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    declared = serializer.fields
+    readable = [name for name, field in declared.items() if not field.write_only]
+
+    if fields:
+        unknown = sorted(set(fields) - set(readable))
+        if unknown:
+            raise serializers.ValidationError({'fields': [f"Noma'lum maydon: {name}" for name in unknown]})
+        for name in list(declared):
+            if name not in fields:
+                del declared[name]
+    unknown = sorted(set(expand) - set(declared))
+    if unknown:
+        raise serializers.ValidationError({'expand': [f"Noma'lum maydon: {name}" for name in unknown]})
+
+    model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+    for name, field in list(declared.items()):
+        if field.write_only or not isinstance(field, serializers.BaseSerializer):
+            continue
+        nested = (fields or {}).get(name)
+        if nested or name in expand:
+            apply_sparse_fields(field, nested or None, expand.get(name, {}))
+            continue
+        # Kengaytirilmagan bog'lanish -> ID (faqat haqiqiy ForeignKey/OneToOne/ManyToMany bo'lsa)
+        attrs = field.source_attrs
+        many = isinstance(field, serializers.ListSerializer)
+        if model is None or field.source == '*' or len(attrs) != 1:
+            continue
+        try:
+            relation = model._meta.get_field(attrs[0])
+        except FieldDoesNotExist:
+            continue
+        if relation.is_relation and relation.concrete and relation.many_to_many == many:
+            source = {} if field.source == name else {'source': field.source}
+            declared[name] = serializers.PrimaryKeyRelatedField(read_only=True, many=many, **source)
+    return serializer
+
+
+def _column_paths(serializer, prefix, model):
+    """only() uchun ustun yo'llari; aniqlab bo'lmasa None"""
+    meta = getattr(serializer, 'Meta', None)
+    sources = getattr(meta, 'field_sources', {})
+    paths = set()
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if name in sources:
+            # E'lon qilingan manba ustun bo'lmasa (masalan, property), only() qo'llanmaydi
+            if not all(_is_column(model, source) for source in sources[name]):
+                return None
+            paths.update(prefix + source for source in sources[name])
+            continue
+        if field.source == '*':
+            return None
+        if isinstance(field, (serializers.ListSerializer, serializers.ManyRelatedField)):
+            # prefetch orqali alohida yuklanadi: bu jadvaldan faqat pk kerak
+            continue
+
+        attrs = list(field.source_attrs)
+        display = DISPLAY_SOURCE.match(attrs[-1])
+        if display:
+            attrs[-1] = display.group(1)
+        relation = _relation_path(model, attrs)
+        if isinstance(field, serializers.BaseSerializer):
+            if len(relation) != len(attrs) or getattr(getattr(field, 'Meta', None), 'model', None) is None:
+                return None
+            path = '__'.join(relation)
+            nested = _column_paths(field, prefix + path + '__', field.Meta.model)
+            if nested is None:
+                return None
+            paths.add(prefix + path)
+            paths |= nested
+            continue
+
+        # Oddiy yoki nuqtali (department.name) ustun
+        if len(relation) < len(attrs) - 1:
+            return None
+        target = model
+        for attr in attrs[:-1]:
+            target = target._meta.get_field(attr).related_model
+        try:
+            column = target._meta.get_field(attrs[-1])
+        except FieldDoesNotExist:
+            return None
+        if not column.concrete:
+            return None
+        paths.add(prefix + '__'.join(attrs))
+    return paths
+
+
+def _is_column(model, path):
+    """'patient__user__first_name' kabi yo'l haqiqiy ustunga (concrete field) olib boradimi"""
+    *relations, name = path.split('__')
+    try:
+        for attr in relations:
+            model = model._meta.get_field(attr).related_model
+            if model is None:
+                return False
+        return model._meta.get_field(name) in model._meta.concrete_fields
+    except FieldDoesNotExist:
+        return False
+
+
+def only_fields(serializer, select_related=()):
+    """
+    Qisqartirilgan serializer uchun only() ro'yxati yoki None (aniqlab bo'lmasa — hamma ustun).
+    select_related qilinmagan bog'lanish ichidagi ustunlar olib tashlanadi: ular baribir alohida yuklanadi.
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    paths = _column_paths(serializer, '', serializer.Meta.model)
+    if paths is None:
+        return None
+    # select_related('patient__user') "patient" ni ham qo'shib oladi
+    joined = {'__'.join(lookup.split('__')[:i + 1]) for lookup in select_related for i in range(lookup.count('__') + 1)}
+    # select_related qilinadigan bog'lanishning o'zi kechiktirilmasligi kerak
+    result = set(joined)
+    for path in paths:
+        parts = path.split('__')
+        prefixes = ['__'.join(parts[:i]) for i in range(1, len(parts))]
+        if all(prefix in joined for prefix in prefixes):
+            result.add(path)
+            result.update(prefixes)
+    return sorted(result)
+
+
+def sparse_loading(serializer):
+    """Qisqartirilgan serializer uchun (select_related, prefetch_related)"""
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    select, prefetch = set(), set()
+    _collect(serializer, '', select, prefetch, False)
+    prefetch = {lookup for lookup in prefetch if lookup not in select}
+    return tuple(sorted(select)), tuple(sorted(prefetch))
@@ -0,0 +1,199 @@
+"""
+Tez yordam mashinalarining GPS telemetriyasi: bitta so'rovda ko'p nuqta qabul qilinadi.
+
+Nuqtalar bittalab bazaga yozilmaydi:
+
+- har bir mashinaning oxirgi TELEMETRY_RECENT_FIXES ta nuqtasi xotiradagi halqa buferda (deque(maxlen))
+  turadi; jonli joylashuv va so'nggi trek shu yerdan o'qiladi, tarix jadvaliga murojaat qilinmaydi;
+- yangi nuqtalar navbatda to'planadi va TELEMETRY_FLUSH_SIZE ga yetganda yoki oxirgi yozishdan beri
+  TELEMETRY_FLUSH_SECONDS o'tganda AmbulancePosition ga bitta bulk_create bilan yoziladi;
+- Ambulance jadvalida faqat oxirgi ma'lum koordinata yangilanadi (bitta bulk_update).
+
+Bufer bitta jarayon ichida (live.py, dispatch.py kabi): har bir worker o'zi qabul qilgan nuqtalarni yozadi.
+Nuqtalar kelmay qolsa ham navbat osilib qolmasligi uchun fon oqimi (start(); faqat server kirish nuqtalari —
+config/asgi.py, config/wsgi.py — ishga tushiradi, boshqaruv buyruqlari va testlar emas) muddati kelganda
+yozadi; jarayon to'xtaganda qoldiq yoziladi.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import deque, namedtuple
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from quickcare_app.dispatch import ambulance_index
+
+logger = logging.getLogger(__name__)
+
+Fix = namedtuple("Fix", "latitude longitude recorded_at speed")
+
+DEFAULT_RECENT_FIXES = 120
+DEFAULT_FLUSH_SIZE = 500
+DEFAULT_FLUSH_SECONDS = 5
+DEFAULT_FLUSH_RETRIES = 5
+DEFAULT_MAX_PENDING = 50000
+
+
+class TelemetryBuffer:
+    def __init__(self):
+        self._recent = {}
+        self._pending = []
+        self._last_flush = time.monotonic()
+        # Ketma-ket muvaffaqiyatsiz yozishlar (TELEMETRY_FLUSH_RETRIES dan keyin partiya tashlanadi)
+        self._failures = 0
+        self._lock = threading.Lock()
+        # Yozishlar ketma-ket: eski "latest" yangisidan keyin Ambulance ga yozilmasin
+        self._flush_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def record(self, fixes):
+        """
+        fixes: [(ambulance_id, Fix), ...]. Navbat to'lgan yoki muddati kelgan bo'lsa shu chaqiruvda
+        bazaga yoziladi. Qaytaradi: bazaga yozilgan nuqtalar soni (yozilmagan bo'lsa 0).
+        """
+        size = getattr(settings, 'TELEMETRY_RECENT_FIXES', DEFAULT_RECENT_FIXES)
+        with self._lock:
+            for ambulance_id, fix in sorted(fixes, key=lambda item: item[1].recorded_at):
+                recent = self._recent.get(ambulance_id)
+                if recent is None:
+                    recent = self._recent[ambulance_id] = deque(maxlen=size)
+                # Kechikib kelgan nuqta faqat tarixga yoziladi, jonli joylashuvni orqaga qaytarmaydi
+                if not recent or fix.recorded_at >= recent[-1].recorded_at:
+                    recent.append(fix)
+                self._pending.append((ambulance_id, fix))
+            due = len(self._pending) >= getattr(settings, 'TELEMETRY_FLUSH_SIZE', DEFAULT_FLUSH_SIZE)
+        return self.flush() if due or self._flush_due() else 0
+
+    def _flush_due(self):
+        interval = getattr(settings, 'TELEMETRY_FLUSH_SECONDS', DEFAULT_FLUSH_SECONDS)
+        with self._lock:
+            return bool(self._pending) and time.monotonic() - self._last_flush >= interval
+
+    def flush(self):
+        """
+        To'plangan nuqtalarni tarixga yozish va oxirgi joylashuvni Ambulance ga ko'chirish.
+        Xato so'rovga (yoki fon oqimiga) ko'tarilmaydi: log'ga yoziladi, nuqtalar navbatga qaytadi
+        (TELEMETRY_FLUSH_RETRIES urinishdan keyin va TELEMETRY_MAX_PENDING dan oshgani tashlanadi).
+        """
+        with self._flush_lock:
+            try:
+                return self._write()
+            except Exception:
+                logger.exception("Telemetriya nuqtalari bazaga yozilmadi")
+                return 0
+
+    def _write(self):
+        from quickcare_app.models import Ambulance, AmbulancePosition
+
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._last_flush = time.monotonic()
+            latest = {ambulance_id: self._recent[ambulance_id][-1] for ambulance_id, _ in pending}
+        if not pending:
+            return 0
+
+        try:
+            # Tekshiruvdan keyin o'chirilgan mashina nuqtalari tashlanadi: FK xatosi butun partiyani to'xtatardi
+            known = set(Ambulance.objects.filter(pk__in=latest).values_list('pk', flat=True))
+            if len(known) < len(latest):
+                removed = latest.keys() - known
+                pending = [(ambulance_id, fix) for ambulance_id, fix in pending if ambulance_id in known]
+                latest = {ambulance_id: fix for ambulance_id, fix in latest.items() if ambulance_id in known}
+                with self._lock:
+                    for ambulance_id in removed:
+                        self._recent.pop(ambulance_id, None)
+                logger.warning("O'chirilgan mashinalar %s ning telemetriyasi tashlab yuborildi", sorted(removed))
+            with transaction.atomic():
+                AmbulancePosition.objects.bulk_create(
+                    AmbulancePosition(
+                        ambulance_id=ambulance_id, latitude=fix.latitude, longitude=fix.longitude,
+                        speed=fix.speed, recorded_at=fix.recorded_at,
+                    )
+                    for ambulance_id, fix in pending
+                )
+                Ambulance.objects.bulk_update(
+                    [
+                        Ambulance(pk=ambulance_id, latitude=fix.latitude, longitude=fix.longitude)
+                        for ambulance_id, fix in latest.items()
+                    ],
+                    ['latitude', 'longitude'],
+                )
+                # bulk_update save() ni chaqirmaydi: indeksdagi (bo'sh) mashinalarni o'zimiz ko'chiramiz
+                transaction.on_commit(lambda: [
+                    ambulance_index.move(ambulance_id, fix.latitude, fix.longitude)
+                    for ambulance_id, fix in latest.items()
+                ])
+        except Exception:
+            self._requeue(pending)
+            raise
+        with self._lock:
+            self._failures = 0
+        return len(pending)
+
+    def _requeue(self, pending):
+        """Nuqtalar yo'qolmasin: keyingi yozishda qayta urinib ko'riladi, lekin cheksiz emas"""
+        retries = getattr(settings, 'TELEMETRY_FLUSH_RETRIES', DEFAULT_FLUSH_RETRIES)
+        limit = getattr(settings, 'TELEMETRY_MAX_PENDING', DEFAULT_MAX_PENDING)
+        with self._lock:
+            self._failures += 1
+            give_up = self._failures >= retries
+            overflow = 0
+            if give_up:
+                self._failures = 0
+            else:
+                self._pending[:0] = pending
+                overflow = max(len(self._pending) - limit, 0)
+                # Eng eskilari tashlanadi: jonli joylashuv uchun yangilari muhimroq
+                del self._pending[:overflow]
+        if give_up:
+            logger.error("%d ta telemetriya nuqtasi %d urinishdan keyin tashlab yuborildi", len(pending), retries)
+        elif overflow:
+            logger.error("Telemetriya navbati to'ldi: eng eski %d ta nuqta tashlab yuborildi", overflow)
+
+    def latest(self, ambulance_id):
+        """Oxirgi ma'lum nuqta (Fix) yoki None"""
+        with self._lock:
+            recent = self._recent.get(ambulance_id)
+            return recent[-1] if recent else None
+
+    def recent(self, ambulance_id, limit=None):
+        """So'nggi nuqtalar, eskisidan yangisiga"""
+        with self._lock:
+            fixes = list(self._recent.get(ambulance_id, ()))
+        return fixes[-limit:] if limit else fixes
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def reset(self):
+        with self._lock:
+            self._recent.clear()
+            self._pending.clear()
+            self._failures = 0
+            self._last_flush = time.monotonic()
+
+    def start(self):
+        """Muddati kelgan nuqtalarni yozuvchi fon oqimi; jarayon tugaganda qoldiq yoziladi"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="telemetry-flush", daemon=True)
+        atexit.register(self.stop)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self.flush()
+
+    def _run(self):
+        while not self._stopped.wait(getattr(settings, 'TELEMETRY_FLUSH_SECONDS', DEFAULT_FLUSH_SECONDS)):
+            if self._flush_due():
+                self.flush()
+                close_old_connections()
+
+
+telemetry_buffer = TelemetryBuffer()
@@ -0,0 +1,174 @@
+import datetime
+import random
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase, APIRequestFactory, force_authenticate
+
+from quickcare_app.dispatch import SpatialIndex, ambulance_index, haversine_km
+from quickcare_app.models import Ambulance, Emergency, Patient
+from quickcare_app.views import AmbulanceViewSet
+
+User = get_user_model()
+
+
+class SpatialIndexTests(SimpleTestCase):
+    def test_nearest_matches_brute_force(self):
+        rng = random.Random(7)
+        points = {i: (41.2 + rng.random() * 0.2, 69.1 + rng.random() * 0.3) for i in range(500)}
+        index = SpatialIndex()
+        for i, (lat, lon) in points.items():
+            index.update(i, lat, lon)
+        for i in range(0, 500, 3):
+            index.remove(i)
+            del points[i]
+
+        # Shahar ichidan ham, to'r chegarasidan tashqaridan ham
+        for lat, lon in [(41.3, 69.25), (41.21, 69.11), (41.5, 69.0), (40.0, 70.0)]:
+            for k in (1, 5, 20):
+                expected = sorted((haversine_km(lat, lon, *p), i) for i, p in points.items())[:k]
+                self.assertEqual([i for _, i in index.nearest(lat, lon, k)], [i for _, i in expected])
+
+    def test_fewer_points_than_k(self):
+        index = SpatialIndex()
+        self.assertEqual(index.nearest(41.3, 69.2, 3), [])
+        index.update("a", 41.3, 69.2)
+        self.assertEqual([i for _, i in index.nearest(41.0, 69.0, 3)], ["a"])
+
+
+class NearestAmbulanceTests(APITestCase):
+    def setUp(self):
+        ambulance_index.reset()
+        self.addCleanup(ambulance_index.reset)
+        self.client.force_authenticate(user=User.objects.create(username="dispetcher", is_staff=True))
+        self.near = Ambulance.objects.create(plate_number="01A001AA", latitude=41.311, longitude=69.279)
+        self.far = Ambulance.objects.create(plate_number="01A002AA", latitude=41.35, longitude=69.35)
+        self.busy = Ambulance.objects.create(
+            plate_number="01A003AA", latitude=41.3111, longitude=69.2791, status=Ambulance.Status.ON_DUTY
+        )
+        Ambulance.objects.create(plate_number="01A004AA")
+
+    def nearest(self, **params):
+        response = self.client.get(reverse("ambulance-nearest"), params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return [item["id"] for item in response.data]
+
+    def test_returns_available_units_by_distance(self):
+        self.assertEqual(self.nearest(latitude=41.3105, longitude=69.2785, k=5), [self.near.pk, self.far.pk])
+
+    def test_index_follows_status_and_location_changes(self):
+        self.nearest(latitude=41.31, longitude=69.28)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.near.mark_on_duty()
+            self.busy.mark_available()
+            self.far.move_to(41.3106, 69.2786)
+
+        self.assertEqual(self.nearest(latitude=41.3105, longitude=69.2785, k=2), [self.far.pk, self.busy.pk])
+
+    def test_uses_patient_coordinates_of_emergency(self):
+        patient = Patient.objects.create(
+            full_name="Bemor", phone_number="+998930000001", birth_date=datetime.date(1990, 1, 1),
+            address="Toshkent", latitude=41.349, longitude=69.349,
+        )
+        emergency = Emergency.objects.create(patient=patient, description="Yurak og'rig'i kuchli")
+
+        self.assertEqual(self.nearest(emergency_id=emergency.pk, k=1), [self.far.pk])
+
+    def test_requires_coordinates(self):
+        response = self.client.get(reverse("ambulance-nearest"), {"latitude": 41.3})
+        self.assertEqual(response.status_code, 400)
+
+
+class AllocationTests(APITestCase):
+    def setUp(self):
+        ambulance_index.reset()
+        self.addCleanup(ambulance_index.reset)
+        self.client.force_authenticate(user=User.objects.create(username="dispetcher", is_staff=True))
+        self.patient = Patient.objects.create(
+            full_name="Bemor", phone_number="+998930000001", birth_date=datetime.date(1990, 1, 1),
+            address="Toshkent", latitude=41.311, longitude=69.279,
+        )
+        self.emergency = Emergency.objects.create(patient=self.patient, description="Yurak og'rig'i kuchli")
+        self.ambulance = Ambulance.objects.create(plate_number="01A001AA", latitude=41.35, longitude=69.35)
+
+    def send(self, ambulance, emergency=None):
+        data = {"location": "Chilonzor"}
+        if emergency:
+            data["emergency_id"] = emergency.pk
+        return self.client.post(reverse("ambulance-send-ambulance", args=[ambulance.pk]), data)
+
+    def test_send_links_ambulance_and_second_dispatch_conflicts(self):
+        self.assertEqual(self.send(self.ambulance, self.emergency).status_code, 200)
+
+        self.emergency.refresh_from_db()
+        self.assertEqual((self.emergency.ambulance_id, self.emergency.status), (self.ambulance.pk, "in_progress"))
+        other = Emergency.objects.create(patient=self.patient, description="Boshqa chaqiruv tavsifi")
+        response = self.send(self.ambulance, other)
+        self.assertEqual(response.status_code, 409)
+        self.assertIsNone(Emergency.objects.get(pk=other.pk).ambulance_id)
+
+    def test_second_unit_for_same_emergency_is_rolled_back(self):
+        second = Ambulance.objects.create(plate_number="01A002AA")
+        self.send(self.ambulance, self.emergency)
+
+        self.assertEqual(self.send(second, self.emergency).status_code, 409)
+        self.assertEqual(Ambulance.objects.get(pk=second.pk).status, "available")
+
+    def test_dispatch_picks_nearest_and_resolve_frees_it(self):
+        near = Ambulance.objects.create(plate_number="01A002AA", latitude=41.312, longitude=69.28)
+
+        response = self.client.post(reverse("emergency-dispatch-ambulance", args=[self.emergency.pk]))
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data["ambulance"]["id"], near.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("emergency-resolve", args=[self.emergency.pk]))
+        self.assertEqual(Ambulance.objects.get(pk=near.pk).status, "available")
+        self.assertEqual([a.pk for a, _ in Ambulance.nearest_available(41.311, 69.279, k=1)], [near.pk])
+
+
+class AllocationConcurrencyTests(TransactionTestCase):
+    AMBULANCES = 5
+    EMERGENCIES = 40
+
+    def setUp(self):
+        ambulance_index.reset()
+        self.addCleanup(ambulance_index.reset)
+        self.user = User.objects.create(username="dispetcher", is_staff=True)
+        patient = Patient.objects.create(
+            full_name="Bemor", phone_number="+998930000001", birth_date=datetime.date(1990, 1, 1), address="Toshkent"
+        )
+        self.ambulances = [Ambulance.objects.create(plate_number=f"01A{i:03d}AA") for i in range(self.AMBULANCES)]
+        self.emergencies = Emergency.objects.bulk_create(
+            Emergency(patient=patient, description="Favqulodda chaqiruv") for _ in range(self.EMERGENCIES)
+        )
+
+    def send(self, args):
+        ambulance, emergency = args
+        view = AmbulanceViewSet.as_view({"post": "send_ambulance"})
+        request = APIRequestFactory().post(
+            "/", {"location": "Chilonzor", "emergency_id": emergency.pk}, format="json"
+        )
+        force_authenticate(request, user=self.user)
+        try:
+            return view(request, pk=ambulance.pk).status_code
+        finally:
+            connection.close()
+
+    def test_parallel_dispatch_never_double_assigns(self):
+        # Har bir holatga barcha mashinalar bir vaqtda jo'natiladi
+        attempts = [(ambulance, emergency) for emergency in self.emergencies for ambulance in self.ambulances]
+        random.Random(1).shuffle(attempts)
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            statuses = Counter(pool.map(self.send, attempts))
+
+        self.assertEqual(set(statuses), {200, 409})
+        self.assertEqual(statuses[200], self.AMBULANCES)
+        assigned = list(Emergency.objects.filter(ambulance__isnull=False).values_list("ambulance_id", flat=True))
+        self.assertEqual(sorted(assigned), sorted(a.pk for a in self.ambulances))
+        self.assertEqual(set(Ambulance.objects.values_list("status", flat=True)), {"on_duty"})
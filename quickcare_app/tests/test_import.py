@@ -0,0 +1,126 @@
+import io
+import json
+import os
+import tempfile
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db.models import Sum
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from quickcare_app.importer import CatalogImport, read_rows
+from quickcare_app.models import Medicine, Pharmacy, InventoryMovement, LowStockEntry
+from quickcare_app.search import search_backend
+
+User = get_user_model()
+
+CSV = """name,usage,price,stock
+Paratsetamol,painkiller,1500.00,40
+Amoksitsillin,antibiotic,,12
+Ibuprofen,nomalum,2000,5
+Sitramon,,abc,3
+Aspirin,,,
+"""
+
+
+def run_import(text, fmt="csv", **kwargs):
+    job = CatalogImport(**kwargs)
+    errors = list(job.run(read_rows(io.StringIO(text), fmt)))
+    return job, errors
+
+
+class CatalogImportTests(TestCase):
+    def setUp(self):
+        self.existing = Medicine.objects.create(name="Paratsetamol", description="Isitma uchun", price=1000)
+        self.first = Pharmacy.objects.create(medicine=self.existing, stock=10)
+        self.second = Pharmacy.objects.create(medicine=self.existing, stock=7)
+
+    def assertLedgerMatchesStock(self):
+        for pk, stock in Pharmacy.objects.values_list("pk", "stock"):
+            self.assertEqual(InventoryMovement.stock_at(pk), stock)
+
+    def test_csv_upserts_and_reports_bad_rows(self):
+        job, errors = run_import(CSV, batch_size=2)
+
+        self.assertEqual([line for line, _ in errors], [4, 5])
+        self.assertIn("usage", errors[0][1])
+        self.assertIn("price", errors[1][1])
+        self.assertEqual(job.summary()["failed"], 2)
+        self.assertEqual((job.created, job.updated, job.stock_updated), (2, 1, 2))
+
+        self.existing.refresh_from_db()
+        # Berilmagan ustun (description) o'zgarmaydi
+        self.assertEqual((self.existing.price, self.existing.description), (Decimal("1500.00"), "Isitma uchun"))
+        amoxicillin = Medicine.objects.get(name="Amoksitsillin")
+        self.assertEqual(amoxicillin.usage, "antibiotic")
+        self.assertEqual(search_backend().search("amoks"), [amoxicillin.pk])
+        self.assertEqual(Medicine.objects.get(name="Aspirin").pharmacy_set.count(), 0)
+        # Faqat birinchi zaxira qatori o'zgaradi, farq jurnalga tushadi
+        self.assertEqual(
+            sorted(Pharmacy.objects.filter(medicine=self.existing).values_list("stock", flat=True)), [7, 40]
+        )
+        self.assertEqual(Pharmacy.objects.get(medicine__name="Amoksitsillin").stock, 12)
+        self.assertLedgerMatchesStock()
+
+    def test_ndjson_repeated_import_is_idempotent(self):
+        text = "\n".join([
+            json.dumps({"name": "Paratsetamol", "stock": 10, "reorder_level": 8}),
+            "{buzilgan",
+            "",
+            json.dumps(["ro'yxat"]),
+            json.dumps({"name": "Nimesil", "usage": "anti-inflammatory", "stock": 0}),
+        ])
+        job, errors = run_import(text, "ndjson")
+        self.assertEqual([line for line, _ in errors], [2, 4])
+        self.assertEqual((job.created, job.updated, job.stock_updated), (1, 1, 1))
+        # Yangi chegara mavjud qatorlarga ham qo'llanadi, tugagan yangi qator ham to'plamga tushadi
+        self.assertEqual(
+            dict(LowStockEntry.objects.values_list("pharmacy__medicine__name", "state")),
+            {"Paratsetamol": "low", "Nimesil": "out"},
+        )
+
+        movements = InventoryMovement.objects.count()
+        job, _ = run_import(text, "ndjson")
+        self.assertEqual((job.created, job.updated, job.stock_updated), (0, 2, 0))
+        self.assertEqual(InventoryMovement.objects.count(), movements)
+        self.assertLedgerMatchesStock()
+
+    def test_command_streams_file(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False, encoding="utf-8-sig") as f:
+            f.write(CSV)
+        self.addCleanup(os.remove, f.name)
+        out, err = io.StringIO(), io.StringIO()
+
+        call_command("import_medicines", f.name, stdout=out, stderr=err)
+
+        self.assertIn("Yangi: 2", out.getvalue())
+        self.assertIn("4-qator", err.getvalue())
+        self.assertEqual(Pharmacy.objects.aggregate(total=Sum("stock"))["total"], 7 + 40 + 12)
+
+
+class CatalogImportEndpointTests(APITestCase):
+    def upload(self, content, name="katalog.csv"):
+        return self.client.post(
+            reverse("medicine-import-catalog"),
+            {"file": SimpleUploadedFile(name, content.encode("utf-8-sig"))},
+            format="multipart",
+        )
+
+    def test_admin_gets_summary(self):
+        self.client.force_authenticate(user=User.objects.create(username="admin", is_staff=True))
+
+        response = self.upload(CSV)
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data["created"], 3)
+        self.assertEqual([error["line"] for error in response.data["errors"]], [4, 5])
+
+        self.assertEqual(self.upload(CSV, name="katalog.txt").status_code, 400)
+
+    def test_non_admin_is_forbidden(self):
+        self.client.force_authenticate(user=User.objects.create(username="bemor"))
+        self.assertEqual(self.upload(CSV).status_code, 403)
+        self.assertFalse(Medicine.objects.exists())
@@ -0,0 +1,117 @@
+import datetime
+from itertools import count
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase, APIClient
+
+from quickcare_app.models import (
+    Doctor, Patient, Department, Room, Queue, Emergency, Ambulance,
+    Medicine, Pharmacy, PatientMedicine, Notification
+)
+
+User = get_user_model()
+
+
+class ListQueryCountTests(APITestCase):
+    """
+    Ro'yxat endpoint'lari sahifadagi qatorlar soniga bog'liq bo'lmagan sondagi so'rov bajarishi kerak.
+    Har bir qator alohida bog'langan obyektlarga ega, shuning uchun N+1 darhol ko'rinadi.
+    """
+    PAGE_SIZE = 10
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create(username="admin", is_staff=True)
+        self.me = Patient.objects.create(
+            user=self.user, full_name="Admin", phone_number="+998900000000", birth_date=datetime.date(1990, 1, 1)
+        )
+        self.client.force_authenticate(user=self.user)
+        self.seq = count(1)
+
+    def department(self):
+        return Department.objects.create(name=f"Bo'lim {next(self.seq)}", description="")
+
+    def room(self):
+        return Room.objects.create(room_number=next(self.seq), department=self.department())
+
+    def doctor(self):
+        n = next(self.seq)
+        return Doctor.objects.create(
+            user=User.objects.create(username=f"shifokor{n}"), full_name=f"Shifokor {n}",
+            specialization="Terapevt", phone=f"+99891{n:07d}", department=self.department(), room=self.room(),
+        )
+
+    def patient(self):
+        n = next(self.seq)
+        return Patient.objects.create(
+            user=User.objects.create(username=f"bemor{n}"), full_name=f"Bemor {n}",
+            phone_number=f"+99892{n:07d}", birth_date=datetime.date(1990, 1, 1), address="Toshkent",
+        )
+
+    def medicine(self):
+        return Medicine.objects.create(name=f"Dori {next(self.seq)}")
+
+    def assert_constant_queries(self, url_name, make_row):
+        url = reverse(url_name)
+        counts = []
+        for rows in (2, self.PAGE_SIZE - 2):
+            for _ in range(rows):
+                make_row()
+            # user.doctor / user.patient keshlanib qolmasligi uchun har safar yangi obyekt
+            self.client.force_authenticate(user=User.objects.get(pk=self.user.pk))
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.data)
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1], f"{url_name}: {counts}")
+
+    def test_doctors(self):
+        self.assert_constant_queries("doctor-list", self.doctor)
+
+    def test_patients(self):
+        self.assert_constant_queries("patient-list", self.patient)
+
+    def test_rooms(self):
+        self.assert_constant_queries("room-list", self.room)
+
+    def test_departments(self):
+        self.assert_constant_queries("department-list", self.department)
+
+    def test_queue(self):
+        self.assert_constant_queries(
+            "queue-list",
+            lambda: Queue.objects.create(patient=self.patient(), doctor=self.doctor(), position=1),
+        )
+
+    def test_emergency(self):
+        self.assert_constant_queries(
+            "emergency-list",
+            lambda: Emergency.objects.create(patient=self.patient(), doctor=self.doctor(), description="x" * 20),
+        )
+
+    def test_ambulance(self):
+        self.assert_constant_queries(
+            "ambulance-list", lambda: Ambulance.objects.create(plate_number=f"01A{next(self.seq):03d}AA")
+        )
+
+    def test_medicine(self):
+        self.assert_constant_queries("medicine-list", self.medicine)
+
+    def test_pharmacy(self):
+        self.assert_constant_queries(
+            "pharmacy-list", lambda: Pharmacy.objects.create(medicine=self.medicine(), stock=5)
+        )
+
+    def test_patient_medicine(self):
+        self.assert_constant_queries(
+            "patientmedicine-list",
+            lambda: PatientMedicine.objects.create(patient=self.patient(), medicine=self.medicine(), dosage="1x"),
+        )
+
+    def test_notifications(self):
+        self.assert_constant_queries(
+            "notification-list", lambda: Notification.objects.create(recipient=self.me, message="Salom")
+        )
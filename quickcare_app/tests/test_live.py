@@ -0,0 +1,184 @@
+import asyncio
+import datetime
+import json
+import threading
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from quickcare_app.live import broker, live_queue_router
+from quickcare_app.models import Doctor, Patient, Department, Room, Queue
+
+User = get_user_model()
+
+
+class LiveQueueMixin:
+    def setUp(self):
+        department = Department.objects.create(name="Kardiologiya", description="")
+        room = Room.objects.create(room_number=101, department=department)
+        self.doctor = Doctor.objects.create(
+            full_name="Shifokor", specialization="Kardiolog", phone="+998901111111",
+            department=department, room=room,
+        )
+        self.entries = []
+        for i in range(3):
+            patient = Patient.objects.create(
+                full_name=f"Bemor {i}", phone_number=f"+99893000{i:04d}", birth_date=datetime.date(1990, 1, 1)
+            )
+            self.entries.append(Queue.objects.create(patient=patient, doctor=self.doctor, position=i + 1))
+
+        # Obunachilar alohida oqimdagi event loop'da, DB bilan ishlash esa test oqimida
+        self.loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self.loop.call_soon_threadsafe, self.loop.stop)
+
+    def run_async(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout=5)
+
+    def subscribe(self):
+        async def subscribe():
+            return broker.subscribe(self.doctor.pk)
+
+        subscription = self.run_async(subscribe())
+        self.addCleanup(broker.unsubscribe, self.doctor.pk, subscription)
+        return subscription[1]
+
+    def received(self, events, count):
+        async def collect():
+            return [await asyncio.wait_for(events.get(), 1) for _ in range(count)]
+
+        return self.run_async(collect())
+
+
+class LiveQueueTests(LiveQueueMixin, TestCase):
+    def test_queue_changes_are_published_after_commit(self):
+        events = self.subscribe()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.entries[0].cancel_queue()
+        with self.captureOnCommitCallbacks(execute=True):
+            Queue.objects.get(pk=self.entries[1].pk).change_status("in_progress")
+
+        self.assertEqual(self.received(events, 2), [
+            {"event": "cancelled", "id": self.entries[0].pk, "position": 1},
+            {"event": "status", "id": self.entries[1].pk, "position": 1, "status": "in_progress"},
+        ])
+
+    def test_bulk_cancel_events_replay_to_database_positions(self):
+        patient = Patient.objects.create(
+            full_name="Bemor 3", phone_number="+998930000003", birth_date=datetime.date(1990, 1, 1)
+        )
+        self.entries.append(Queue.objects.create(patient=patient, doctor=self.doctor, position=4))
+        events = self.subscribe()
+
+        # So'rov tartibi o'sish bo'yicha
+        with self.captureOnCommitCallbacks(execute=True):
+            Queue.bulk_apply([(self.entries[1], "cancel"), (self.entries[2], "cancel")])
+
+        # Mijoz: id -> o'rin; "cancelled" da o'chiradi va undan keyingilarni bittaga siljitadi
+        board = {entry.pk: entry.position for entry in self.entries}
+        for event in self.received(events, 2):
+            del board[event["id"]]
+            board = {pk: position - (position > event["position"]) for pk, position in board.items()}
+
+        self.assertEqual(
+            board, dict(Queue.objects.filter(status="waiting").values_list("pk", "position"))
+        )
+        self.assertEqual(board[self.entries[3].pk], 2)
+
+    def test_other_paths_go_to_django(self):
+        calls = []
+
+        async def django_application(scope, receive, send):
+            calls.append(scope["path"])
+
+        application = live_queue_router(django_application)
+        self.run_async(application({"type": "http", "method": "GET", "path": "/api/v1/queue/"}, None, None))
+
+        self.assertEqual(calls, ["/api/v1/queue/"])
+
+
+class LiveStreamTests(LiveQueueMixin, TransactionTestCase):
+    """Haqiqiy commit/rollback va oqimning autentifikatsiyasi (boshqa oqimdagi ulanish ma'lumotni ko'radi)"""
+
+    def stream_scope(self, headers=()):
+        return {
+            "type": "http", "method": "GET", "path": f"/api/v1/queue/stream/{self.doctor.pk}/",
+            "headers": list(headers),
+        }
+
+    def test_rolled_back_change_is_not_published(self):
+        events = self.subscribe()
+
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.entries[0].change_status("in_progress")
+            raise RuntimeError
+        Queue.objects.get(pk=self.entries[1].pk).change_status("in_progress")
+
+        # Birinchi kelgan xabar — commit bo'lgan o'zgarish, qaytarilgani yuborilmagan
+        self.assertEqual(self.received(events, 1), [
+            {"event": "status", "id": self.entries[1].pk, "position": 2, "status": "in_progress"},
+        ])
+        self.assertTrue(events.empty())
+
+    def test_stream_requires_authentication(self):
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        async def django_application(scope, receive, send):
+            raise AssertionError("Oqim Django'ga yetib bormasligi kerak")
+
+        application = live_queue_router(django_application)
+        for headers in ([], [(b"authorization", b"Bearer yaroqsiz")]):
+            sent.clear()
+            self.run_async(application(self.stream_scope(headers), None, send))
+
+            self.assertEqual(sent[0]["status"], 401)
+            self.assertNotIn(self.doctor.pk, broker._subscribers)
+
+    def test_stream_sends_events_until_disconnect(self):
+        token = AccessToken.for_user(User.objects.create(username="tablo"))
+        sent = []
+        disconnect = asyncio.Event()
+
+        async def receive():
+            await disconnect.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+
+        async def django_application(scope, receive, send):
+            raise AssertionError("Oqim Django'ga yetib bormasligi kerak")
+
+        application = live_queue_router(django_application)
+        scope = self.stream_scope([(b"authorization", f"Bearer {token}".encode())])
+        stream = asyncio.run_coroutine_threadsafe(application(scope, receive, send), self.loop)
+
+        async def wait_for_subscriber():
+            while not broker._subscribers.get(self.doctor.pk):
+                await asyncio.sleep(0.01)
+
+        self.run_async(wait_for_subscriber())
+        broker.publish(self.doctor.pk, {"event": "added", "id": 5, "position": 4, "status": "waiting"})
+
+        async def wait_for_body():
+            while len(sent) < 2:
+                await asyncio.sleep(0.01)
+            disconnect.set()
+
+        self.run_async(wait_for_body())
+        stream.result(timeout=5)
+
+        self.assertEqual(sent[0]["status"], 200)
+        self.assertEqual(
+            json.loads(sent[1]["body"].decode().removeprefix("data: ")),
+            {"event": "added", "id": 5, "position": 4, "status": "waiting"},
+        )
+        self.assertNotIn(self.doctor.pk, broker._subscribers)
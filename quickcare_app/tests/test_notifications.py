@@ -0,0 +1,347 @@
+import datetime
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from quickcare_app.delivery import FakeTransport
+from quickcare_app.models import misc
+from quickcare_app.models import (
+    Doctor, Patient, Department, Room, Queue, Notification, NotificationDelivery, UnreadNotificationCounter
+)
+
+User = get_user_model()
+
+FAKE_TRANSPORTS = {channel: "quickcare_app.delivery.FakeTransport" for channel in ("sms", "telegram", "email")}
+
+
+@override_settings(NOTIFICATION_TRANSPORTS=FAKE_TRANSPORTS, NOTIFICATION_COALESCE_WINDOWS={})
+class NotificationOutboxTests(TestCase):
+    def setUp(self):
+        FakeTransport.reset()
+        self.addCleanup(FakeTransport.reset)
+        self.patient = Patient.objects.create(
+            full_name="Bemor", phone_number="+998930000001", birth_date=datetime.date(1990, 1, 1)
+        )
+
+    def deliver(self):
+        call_command("deliver_notifications", "--once", stdout=StringIO())
+
+    def test_enabled_channels_are_queued_with_notification(self):
+        notification = Notification.send_notification(self.patient, "Salom", via_telegram=False, via_email=True)
+
+        self.assertEqual(
+            sorted(notification.deliveries.values_list("channel", "status")),
+            [("email", "pending"), ("sms", "pending")],
+        )
+
+    def test_rolled_back_change_leaves_no_outbox_rows(self):
+        department = Department.objects.create(name="Kardiologiya", description="")
+        doctor = Doctor.objects.create(
+            full_name="Shifokor", specialization="Kardiolog", phone="+998901111111",
+            department=department, room=Room.objects.create(room_number=101, department=department),
+        )
+        noon = timezone.now().replace(hour=12, minute=0, second=0)
+        with mock.patch("quickcare_app.models.queue.now", return_value=noon):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                Queue.add_patient_to_queue(self.patient, doctor)
+                raise RuntimeError
+
+        self.assertFalse(Notification.objects.exists())
+        self.assertFalse(NotificationDelivery.objects.exists())
+
+    def test_worker_delivers_each_channel_once(self):
+        Notification.send_notification(self.patient, "Salom")
+
+        self.deliver()
+        self.deliver()
+
+        self.assertEqual(sorted(FakeTransport.sent), [
+            ("sms", self.patient.pk, "Salom"), ("telegram", self.patient.pk, "Salom"),
+        ])
+        self.assertEqual(set(NotificationDelivery.objects.values_list("status", flat=True)), {"sent"})
+
+    def test_failed_delivery_is_retried_with_backoff(self):
+        Notification.send_notification(self.patient, "Salom", via_telegram=False)
+        FakeTransport.fail_next = 1
+
+        with self.assertLogs("quickcare_app.delivery", "WARNING"):
+            self.deliver()
+        delivery = NotificationDelivery.objects.get()
+        self.assertEqual((delivery.status, delivery.attempts), ("pending", 1))
+        self.assertGreater(delivery.next_attempt_at, timezone.now())
+        self.assertEqual(FakeTransport.sent, [])
+
+        # Kutish muddati o'tmaguncha qayta urinilmaydi
+        self.deliver()
+        self.assertEqual(FakeTransport.sent, [])
+
+        NotificationDelivery.objects.update(next_attempt_at=timezone.now())
+        self.deliver()
+        delivery.refresh_from_db()
+        self.assertEqual((delivery.status, delivery.attempts), ("sent", 2))
+
+    def test_delivery_gives_up_after_max_attempts(self):
+        Notification.send_notification(self.patient, "Salom", via_telegram=False)
+        FakeTransport.fail_next = NotificationDelivery.MAX_ATTEMPTS
+
+        with self.assertLogs("quickcare_app.delivery", "WARNING"):
+            for _ in range(NotificationDelivery.MAX_ATTEMPTS):
+                NotificationDelivery.objects.filter(status="pending").update(next_attempt_at=timezone.now())
+                self.deliver()
+
+        delivery = NotificationDelivery.objects.get()
+        self.assertEqual((delivery.status, delivery.attempts), ("failed", NotificationDelivery.MAX_ATTEMPTS))
+        self.assertEqual(delivery.last_error, "Soxta shlyuz xatosi")
+
+    def test_claims_do_not_overlap_and_expired_lease_is_reclaimed(self):
+        for i in range(3):
+            Notification.send_notification(self.patient, f"Xabar {i}", via_telegram=False)
+
+        first = NotificationDelivery.claim(batch_size=2)
+        second = NotificationDelivery.claim(batch_size=2)
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(second), 1)
+        self.assertEqual(NotificationDelivery.claim(), [])
+
+        # Birinchi worker to'xtab qoldi: ijara muddati o'tgach vazifalar qayta olinadi
+        NotificationDelivery.objects.filter(pk__in=[d.pk for d in first]).update(
+            claimed_at=timezone.now() - datetime.timedelta(seconds=NotificationDelivery.LEASE_SECONDS + 1)
+        )
+        reclaimed = NotificationDelivery.claim()
+        self.assertEqual(sorted(d.pk for d in reclaimed), sorted(d.pk for d in first))
+
+        # Eski worker kech qaytsa, yangi egasining natijasini bosib yozmaydi
+        self.assertFalse(first[0].mark_sent())
+
+
+@override_settings(NOTIFICATION_COALESCE_WINDOWS={})
+class UnreadCounterTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="bemor")
+        self.patient = Patient.objects.create(
+            user=self.user, full_name="Bemor", phone_number="+998930000001", birth_date=datetime.date(1990, 1, 1)
+        )
+        self.other = Patient.objects.create(
+            full_name="Boshqa", phone_number="+998930000002", birth_date=datetime.date(1990, 1, 1)
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def unread(self):
+        return self.client.get(reverse("notification-unread-count")).data["unread"]
+
+    def assert_counter_matches_rows(self):
+        for patient in (self.patient, self.other):
+            self.assertEqual(
+                UnreadNotificationCounter.objects.get(recipient=patient).unread,
+                Notification.objects.filter(recipient=patient, is_read=False).count(),
+            )
+
+    def test_counter_follows_create_and_read(self):
+        first = Notification.send_notification(self.patient, "1")
+        Notification.fan_out([(self.patient, "2"), (self.other, "2"), (self.patient, "3")])
+        self.assertEqual(self.unread(), 3)
+
+        self.client.post(reverse("notification-mark-as-read", args=[first.pk]))
+        self.client.post(reverse("notification-mark-as-read", args=[first.pk]))
+        self.assertEqual(self.unread(), 2)
+        self.assert_counter_matches_rows()
+
+    def test_created_notification_goes_to_own_patient_profile(self):
+        # User.pk bemor id si sifatida ishlatilsa xabar shu bemorga tushib qolardi
+        victim = Patient.objects.create(
+            pk=10 ** 6, full_name="Begona", phone_number="+998930000003", birth_date=datetime.date(1990, 1, 1)
+        )
+        requester = User.objects.create(pk=victim.pk, username="so'rovchi")
+        own = Patient.objects.create(
+            user=requester, full_name="O'zi", phone_number="+998930000004", birth_date=datetime.date(1990, 1, 1)
+        )
+        self.client.force_authenticate(user=requester)
+
+        response = self.client.post(reverse("notification-list"), {"message": "Eslatma", "recipient": victim.pk})
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(list(Notification.objects.values_list("recipient_id", flat=True)), [own.pk])
+
+    def test_user_without_patient_profile_cannot_create(self):
+        self.client.force_authenticate(user=User.objects.create(username="xodim"))
+        response = self.client.post(reverse("notification-list"), {"message": "Eslatma", "recipient": self.other.pk})
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Notification.objects.exists())
+
+    def test_recipient_must_be_patient_or_id(self):
+        with self.assertRaises(TypeError):
+            Notification.send_notification(self.user, "Xabar")
+        self.assertFalse(Notification.objects.exists())
+
+    def test_mark_all_read_up_to_id(self):
+        notifications = Notification.fan_out([(self.patient, str(i)) for i in range(4)] + [(self.other, "x")])
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(reverse("notification-mark-all-read"), {"up_to": notifications[1].pk})
+        self.assertEqual(response.data, {"marked": 2, "unread": 2})
+        self.assertLessEqual(len([q for q in ctx.captured_queries if q["sql"].startswith("UPDATE")]), 2)
+
+        self.client.post(reverse("notification-mark-all-read"))
+        self.assertEqual(self.unread(), 0)
+        self.assert_counter_matches_rows()
+
+    def test_existing_rows_are_counted_when_counter_is_created(self):
+        # Hisoblagichdan oldin yozilgan bildirishnomalar
+        Notification.objects.create(recipient=self.patient, message="eski")
+        self.assertEqual(self.unread(), 1)
+
+        Notification.send_notification(self.patient, "yangi")
+        self.assertEqual(UnreadNotificationCounter.objects.get(recipient=self.patient).unread, 2)
+
+    def test_count_endpoint_is_single_query(self):
+        Notification.fan_out([(self.patient, str(i)) for i in range(20)])
+        self.client.force_authenticate(user=User.objects.get(pk=self.user.pk))
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.unread(), 20)
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+
+@override_settings(NOTIFICATION_COALESCE_WINDOWS={"queue_update": 60})
+class NotificationCoalescingTests(TestCase):
+    def setUp(self):
+        self.patients = [
+            Patient.objects.create(
+                full_name=f"Bemor {i}", phone_number=f"+99893000000{i}", birth_date=datetime.date(1990, 1, 1)
+            )
+            for i in range(3)
+        ]
+
+    def test_pending_message_is_replaced_by_latest_state(self):
+        first = Notification.send_notification(self.patients[0], "Navbatingiz 5")
+        Notification.send_notification(self.patients[0], "Navbatingiz 4")
+        Notification.fan_out([(self.patients[0], "Navbatingiz 3"), (self.patients[1], "Navbatingiz 1")])
+
+        self.assertEqual(
+            list(Notification.objects.order_by("recipient_id").values_list("pk", "recipient_id", "message")),
+            [(first.pk, self.patients[0].pk, "Navbatingiz 3"), (mock.ANY, self.patients[1].pk, "Navbatingiz 1")],
+        )
+        self.assertEqual(NotificationDelivery.objects.filter(notification=first).count(), 2)
+        self.assertEqual(UnreadNotificationCounter.objects.get(recipient=self.patients[0]).unread, 1)
+
+    def test_started_delivery_read_or_old_message_is_not_merged(self):
+        patient = self.patients[0]
+        sent = Notification.send_notification(patient, "1")
+        NotificationDelivery.objects.filter(notification=sent, channel="sms").update(status="processing")
+        read = Notification.send_notification(patient, "2")
+        read.mark_as_read()
+        old = Notification.send_notification(patient, "3")
+        Notification.objects.filter(pk=old.pk).update(sent_at=timezone.now() - datetime.timedelta(seconds=61))
+
+        Notification.send_notification(patient, "4")
+        Notification.send_notification(patient, "5", notification_type="emergency_alert")
+        Notification.send_notification(patient, "6", notification_type="emergency_alert")
+
+        self.assertEqual(
+            list(Notification.objects.order_by("pk").values_list("message", flat=True)), ["1", "2", "3", "4", "5", "6"]
+        )
+
+    def test_delivery_claimed_before_update_gets_new_notification(self):
+        first = Notification.send_notification(self.patients[0], "Navbatingiz 5")
+        other = Notification.send_notification(self.patients[1], "Navbatingiz 2")
+        case = misc.Case
+
+        def claim_between_select_and_update(*args, **kwargs):
+            # Worker nomzodlar tanlangandan keyin, UPDATE'dan oldin birinchi bildirishnomani oladi
+            NotificationDelivery.objects.filter(notification=first).update(status="processing")
+            return case(*args, **kwargs)
+
+        with mock.patch.object(misc, "Case", side_effect=claim_between_select_and_update):
+            result = Notification.fan_out([(self.patients[0], "Navbatingiz 4"), (self.patients[1], "Navbatingiz 1")])
+
+        self.assertEqual(Notification.objects.get(pk=first.pk).message, "Navbatingiz 5")
+        self.assertEqual(Notification.objects.get(pk=other.pk).message, "Navbatingiz 1")
+        latest = Notification.objects.filter(recipient=self.patients[0]).latest("id")
+        self.assertEqual((latest.pk != first.pk, latest.message), (True, "Navbatingiz 4"))
+        self.assertEqual(sorted(n.pk for n in result), sorted([other.pk, latest.pk]))
+        self.assertEqual(NotificationDelivery.objects.filter(notification=latest, status="pending").count(), 2)
+
+    @override_settings(NOTIFICATION_TRANSPORTS=FAKE_TRANSPORTS)
+    def test_worker_between_updates_sends_one_sms(self):
+        FakeTransport.reset()
+        self.addCleanup(FakeTransport.reset)
+        patient = self.patients[0]
+
+        start = timezone.now()
+
+        def later(seconds):
+            return mock.patch("django.utils.timezone.now", return_value=start + datetime.timedelta(seconds=seconds))
+
+        def deliver(after_seconds=0):
+            with later(after_seconds):
+                call_command("deliver_notifications", "--once", stdout=StringIO())
+
+        Notification.send_notification(patient, "Navbatingiz 3", via_telegram=False)
+        deliver(after_seconds=5)
+        with later(30):
+            Notification.send_notification(patient, "Navbatingiz 2", via_telegram=False)
+        # Oyna oxirgi yangilanishdan boshlab hisoblanadi: 30 + 60
+        deliver(after_seconds=61)
+        self.assertEqual(FakeTransport.sent, [])
+
+        deliver(after_seconds=91)
+        deliver(after_seconds=200)
+        self.assertEqual(FakeTransport.sent, [("sms", patient.pk, "Navbatingiz 2")])
+
+        # Shoshilinch xabarlar kutmaydi
+        with later(200):
+            Notification.send_notification(
+                patient, "Tez yordam", notification_type="emergency_alert", via_telegram=False
+            )
+        deliver(after_seconds=200)
+        self.assertEqual(FakeTransport.sent[-1], ("sms", patient.pk, "Tez yordam"))
+
+    def test_duplicate_recipients_in_one_call_keep_last_message(self):
+        Notification.fan_out([(self.patients[2], "a"), (self.patients[2], "b")])
+
+        self.assertEqual(list(Notification.objects.values_list("message", flat=True)), ["b"])
+
+
+@override_settings(NOTIFICATION_COALESCE_WINDOWS={}, NOTIFICATION_RETENTION_DAYS={"queue_update": 30})
+class NotificationRetentionTests(TestCase):
+    def setUp(self):
+        self.patient = Patient.objects.create(
+            full_name="Bemor", phone_number="+998930000001", birth_date=datetime.date(1990, 1, 1)
+        )
+
+    def notification(self, days_ago, is_read, notification_type="queue_update"):
+        notification = Notification.send_notification(self.patient, "x", notification_type=notification_type)
+        Notification.objects.filter(pk=notification.pk).update(
+            is_read=is_read, sent_at=timezone.now() - datetime.timedelta(days=days_ago)
+        )
+        return notification.pk
+
+    def test_purges_only_expired_read_notifications_in_batches(self):
+        expired = [self.notification(31, True) for _ in range(5)]
+        kept = [
+            self.notification(31, False),
+            self.notification(29, True),
+            # Ko'rsatilmagan tur: standart 90 kun
+            self.notification(31, True, notification_type="general"),
+        ]
+        out = StringIO()
+
+        call_command("purge_notifications", "--batch-size", "2", stdout=out)
+
+        self.assertEqual(sorted(Notification.objects.values_list("pk", flat=True)), sorted(kept))
+        self.assertFalse(NotificationDelivery.objects.filter(notification_id__in=expired).exists())
+        self.assertIn("queue_update: 4", out.getvalue())
+        self.assertIn("O'chirildi: 5", out.getvalue())
+
+    def test_dry_run_deletes_nothing(self):
+        self.notification(31, True)
+
+        call_command("purge_notifications", "--dry-run", stdout=StringIO())
+
+        self.assertEqual(Notification.objects.count(), 1)
@@ -0,0 +1,106 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from quickcare_app.models import Department, Doctor, Patient, Notification, Queue, Room
+
+User = get_user_model()
+
+
+class NotificationCursorPaginationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="bemor")
+        self.patient = Patient.objects.create(
+            user=self.user, full_name="Bemor", phone_number="+998900000000", birth_date=datetime.date(1990, 1, 1)
+        )
+        self.client.force_authenticate(user=self.user)
+        Notification.objects.bulk_create(
+            Notification(recipient=self.patient, message=f"Xabar {i}") for i in range(25)
+        )
+        # Bir xil vaqtli qatorlar: tartibni faqat id ajratadi
+        sent_at = timezone.now()
+        Notification.objects.filter(pk__in=list(
+            Notification.objects.order_by("pk").values_list("pk", flat=True)[5:17]
+        )).update(sent_at=sent_at)
+        self.expected = list(
+            Notification.objects.order_by("-sent_at", "-id").values_list("pk", flat=True)
+        )
+
+    def walk(self, url, link):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.data)
+            pages.append([item["id"] for item in response.data["results"]])
+            url = response.data[link]
+        return pages
+
+    def test_forward_and_backward_walks_visit_every_row_once(self):
+        forward = self.walk(reverse("notification-list"), "next")
+        self.assertEqual([len(page) for page in forward], [10, 10, 5])
+        self.assertEqual(sum(forward, []), self.expected)
+
+        last_page = self.client.get(reverse("notification-list")).data["next"]
+        last_page = self.client.get(last_page).data["next"]
+        backward = self.walk(last_page, "previous")
+        self.assertEqual(sum(reversed(backward), []), self.expected)
+
+    def test_page_does_not_count_rows(self):
+        url = self.client.get(reverse("notification-list")).data["next"]
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(url)
+        self.assertFalse([q for q in ctx.captured_queries if "COUNT(" in q["sql"].upper()])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse("notification-list"), {"cursor": "cD1ub3QtYS1kYXRlfDE="})
+        self.assertEqual(response.status_code, 404)
+
+
+class QueueCursorPaginationTests(APITestCase):
+    def setUp(self):
+        department = Department.objects.create(name="Kardiologiya", description="")
+        self.doctor_user = User.objects.create(username="shifokor")
+        self.doctor = Doctor.objects.create(
+            user=self.doctor_user, full_name="Shifokor", specialization="Kardiolog", phone="+998901111111",
+            department=department, room=Room.objects.create(room_number=101, department=department),
+        )
+        self.patient = Patient.objects.create(
+            user=User.objects.create(username="bemor"), full_name="Bemor", phone_number="+998900000000",
+            birth_date=datetime.date(1990, 1, 1),
+        )
+        # Yangi yozuvlar kichik raqamlar bilan: yaratilish tartibi navbat tartibiga teskari
+        Queue.objects.bulk_create(
+            Queue(patient=self.patient, doctor=self.doctor, position=position) for position in range(25, 0, -1)
+        )
+        # Bir xil raqam va vaqt: tartibni faqat id ajratadi
+        Queue.objects.filter(position__in=[7, 8]).update(position=7, created_at=timezone.now())
+        self.expected = list(Queue.objects.order_by("position", "created_at", "id").values_list("pk", flat=True))
+        self.client.force_authenticate(user=self.doctor_user)
+
+    def walk(self, url, link):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.data)
+            pages.append([item["id"] for item in response.data["results"]])
+            url = response.data[link]
+        return pages
+
+    def test_list_walks_in_queue_order(self):
+        forward = self.walk(reverse("queue-list"), "next")
+        self.assertEqual([len(page) for page in forward], [10, 10, 5])
+        self.assertEqual(sum(forward, []), self.expected)
+
+        last_page = self.client.get(reverse("queue-list")).data["next"]
+        last_page = self.client.get(last_page).data["next"]
+        backward = self.walk(last_page, "previous")
+        self.assertEqual(sum(reversed(backward), []), self.expected)
+
+    def test_my_queues_in_queue_order(self):
+        forward = self.walk(reverse("queue-list-my-queues"), "next")
+        self.assertEqual(sum(forward, []), self.expected)
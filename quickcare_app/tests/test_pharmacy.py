@@ -0,0 +1,241 @@
+import datetime
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
+
+from quickcare_app.models import (
+    Medicine, Pharmacy, PatientMedicine, Patient, StockReservation, InventoryMovement, InventorySnapshot,
+    LowStockEntry, StockAlert,
+)
+from quickcare_app.views import PatientMedicineViewSet
+
+User = get_user_model()
+
+
+class StockReservationTests(TestCase):
+    def setUp(self):
+        self.patient = Patient.objects.create(
+            full_name="Bemor", phone_number="+998930000001", birth_date=datetime.date(1990, 1, 1)
+        )
+        self.medicine = Medicine.objects.create(name="Paratsetamol")
+        self.small = Pharmacy.objects.create(medicine=self.medicine, stock=2)
+        self.large = Pharmacy.objects.create(medicine=self.medicine, stock=5)
+
+    def stock(self):
+        return sorted(Pharmacy.objects.values_list("pk", "stock"))
+
+    def test_prescription_takes_from_row_with_enough_stock(self):
+        prescription = PatientMedicine.prescribe(self.patient, self.medicine, "1x3", quantity=4)
+
+        self.assertEqual(self.stock(), [(self.small.pk, 2), (self.large.pk, 1)])
+        self.assertEqual(prescription.reservation.status, "committed")
+        with self.assertRaisesMessage(ValueError, "yetarli qolmagan"):
+            PatientMedicine.prescribe(self.patient, self.medicine, "1x3", quantity=3)
+        self.assertEqual(PatientMedicine.objects.count(), 1)
+
+    def test_failed_insert_releases_reservation(self):
+        with mock.patch.object(PatientMedicine.objects, "create", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                PatientMedicine.prescribe(self.patient, self.medicine, "1x3", quantity=5)
+
+        self.assertEqual(self.stock(), [(self.small.pk, 2), (self.large.pk, 5)])
+        self.assertEqual(StockReservation.objects.get().status, "released")
+
+    def test_expired_holds_are_returned_once(self):
+        reservation = StockReservation.reserve(self.medicine, 2, hold_seconds=1)
+        later = timezone.now() + datetime.timedelta(seconds=2)
+
+        self.assertEqual(StockReservation.release_expired(current=later), 1)
+        self.assertEqual(StockReservation.release_expired(current=later), 0)
+        self.assertEqual(self.stock(), [(self.small.pk, 2), (self.large.pk, 5)])
+        # Kech qolgan retsept bandni qayta ishlata olmaydi
+        with self.assertRaises(ValueError):
+            reservation.commit(PatientMedicine.objects.create(patient=self.patient, medicine=self.medicine))
+
+    def test_unstocked_medicine_is_prescribed_without_reservation(self):
+        other = Medicine.objects.create(name="Vitamin C")
+
+        PatientMedicine.prescribe(self.patient, other, "1x1")
+
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_release_command(self):
+        StockReservation.reserve(self.medicine, 1)
+        StockReservation.objects.update(expires_at=timezone.now())
+
+        call_command("release_stock_reservations", stdout=mock.Mock())
+
+        self.assertEqual(self.stock(), [(self.small.pk, 2), (self.large.pk, 5)])
+
+
+class InventoryLedgerTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(user=User.objects.create(username="admin", is_staff=True))
+        self.patient = Patient.objects.create(
+            full_name="Bemor", phone_number="+998930000001", birth_date=datetime.date(1990, 1, 1)
+        )
+        self.medicine = Medicine.objects.create(name="Paratsetamol")
+        self.pharmacy = Pharmacy.objects.create(medicine=self.medicine, stock=10)
+
+    def at(self, days_ago, fn, *args, **kwargs):
+        """Harakatni o'tmishdagi vaqt bilan yozish"""
+        moment = timezone.now() - datetime.timedelta(days=days_ago)
+        fn(*args, **kwargs)
+        InventoryMovement.objects.filter(pk=InventoryMovement.objects.latest("id").pk).update(created_at=moment)
+        return moment
+
+    def assert_ledger_matches_stock(self):
+        self.pharmacy.refresh_from_db()
+        self.assertEqual(InventoryMovement.stock_at(self.pharmacy.pk), self.pharmacy.stock)
+
+    def test_every_change_is_recorded(self):
+        PatientMedicine.prescribe(self.patient, self.medicine, "1x1", quantity=3)
+        with mock.patch.object(PatientMedicine.objects, "create", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                PatientMedicine.prescribe(self.patient, self.medicine, "1x1", quantity=2)
+        self.client.post(reverse("pharmacy-update-stock", args=[self.pharmacy.pk]), {"quantity": 5})
+        self.client.patch(reverse("pharmacy-detail", args=[self.pharmacy.pk]), {"stock": 11})
+
+        self.assertEqual(
+            list(self.pharmacy.movements.order_by("id").values_list("kind", "delta")),
+            [("receipt", 10), ("dispense", -3), ("dispense", -2), ("release", 2), ("receipt", 5), ("adjustment", -1)],
+        )
+        self.assert_ledger_matches_stock()
+        self.assertEqual(self.pharmacy.stock, 11)
+
+    def test_saved_stock_change_is_recorded(self):
+        Pharmacy.take(self.pharmacy.pk, 4)
+        # self.pharmacy.stock eskirgan (10): farq bazadagi qoldiqdan hisoblanadi
+        self.pharmacy.stock = 8
+        self.pharmacy.save()
+        Pharmacy.objects.get(pk=self.pharmacy.pk).save(update_fields=["medicine"])
+
+        self.assertEqual(list(self.pharmacy.movements.order_by("id").values_list("kind", "delta")),
+                         [("receipt", 10), ("dispense", -4), ("adjustment", 2)])
+        self.assert_ledger_matches_stock()
+        self.assertEqual(self.pharmacy.stock, 8)
+
+    def test_historical_stock_survives_compaction(self):
+        InventoryMovement.objects.filter(pharmacy=self.pharmacy).update(
+            created_at=timezone.now() - datetime.timedelta(days=200)
+        )
+        before_dispense = timezone.now() - datetime.timedelta(days=150)
+        dispensed = self.at(100, Pharmacy.take, self.pharmacy.pk, 4)
+        self.at(10, Pharmacy.restock, self.pharmacy.pk, 7)
+
+        self.assertEqual(InventoryMovement.stock_at(self.pharmacy.pk, before_dispense), 10)
+        self.assertEqual(InventoryMovement.stock_at(self.pharmacy.pk, dispensed), 6)
+
+        call_command("compact_inventory", "--keep-days", "30", stdout=mock.Mock())
+
+        self.assertEqual(InventorySnapshot.objects.get().stock, 6)
+        self.assertEqual(list(self.pharmacy.movements.values_list("delta", flat=True)), [7])
+        self.assert_ledger_matches_stock()
+        response = self.client.get(
+            reverse("pharmacy-stock-at", args=[self.pharmacy.pk]),
+            {"at": (timezone.now() - datetime.timedelta(days=20)).isoformat()},
+        )
+        self.assertEqual(response.data["stock"], 6)
+
+        # Qayta compact qilish natijani o'zgartirmaydi
+        call_command("compact_inventory", "--keep-days", "30", stdout=mock.Mock())
+        self.assert_ledger_matches_stock()
+
+
+class LowStockWatchlistTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(user=User.objects.create(username="admin", is_staff=True))
+        self.medicine = Medicine.objects.create(name="Paratsetamol", reorder_level=5)
+        self.pharmacy = Pharmacy.objects.create(medicine=self.medicine, stock=6)
+        self.other = Pharmacy.objects.create(medicine=Medicine.objects.create(name="Insulin", reorder_level=50), stock=30)
+
+    def listed(self, name):
+        response = self.client.get(reverse(f"pharmacy-{name}"))
+        self.assertEqual(response.status_code, 200)
+        return [item["id"] for item in response.data]
+
+    def alerts(self, after=0):
+        return [(alert["pharmacy"], alert["kind"], alert["stock"])
+                for alert in self.client.get(reverse("pharmacy-alerts"), {"after": after}).data]
+
+    def test_thresholds_are_per_medicine(self):
+        self.assertEqual(self.listed("low-stock"), [self.other.pk])
+        self.assertEqual(self.listed("out-of-stock"), [])
+        self.assertEqual(self.alerts(), [(self.other.pk, "low", 30)])
+
+    def test_each_crossing_alerts_once(self):
+        Pharmacy.take(self.pharmacy.pk, 2)
+        Pharmacy.take(self.pharmacy.pk, 1)
+        for _ in range(3):
+            self.assertEqual(self.listed("low-stock"), [self.pharmacy.pk, self.other.pk])
+        Pharmacy.take(self.pharmacy.pk, 3)
+        self.assertEqual(self.listed("out-of-stock"), [self.pharmacy.pk])
+        # Qisman to'ldirish (out -> low) ogohlantirmaydi, chegaradan yuqorisi esa ro'yxatdan chiqaradi
+        Pharmacy.restock(self.pharmacy.pk, 2)
+        Pharmacy.adjust(self.pharmacy.pk, 9)
+        self.assertEqual(self.listed("low-stock"), [self.other.pk])
+        Pharmacy.take(self.pharmacy.pk, 5)
+
+        self.assertEqual(
+            [alert for alert in self.alerts() if alert[0] == self.pharmacy.pk],
+            [(self.pharmacy.pk, "low", 4), (self.pharmacy.pk, "out", 0), (self.pharmacy.pk, "low", 4)],
+        )
+        last = StockAlert.objects.latest("id").pk
+        self.assertEqual(self.alerts(after=last), [])
+
+    def test_changing_threshold_refreshes_set(self):
+        self.client.patch(reverse("medicine-detail", args=[self.medicine.pk]), {"reorder_level": 10})
+        self.assertEqual(self.listed("low-stock"), [self.pharmacy.pk, self.other.pk])
+
+        self.client.patch(reverse("pharmacy-detail", args=[self.other.pk]), {"stock": 0})
+        self.assertEqual(self.listed("out-of-stock"), [self.other.pk])
+        self.assertEqual(LowStockEntry.objects.get(pk=self.other.pk).state, "out")
+
+
+class StockConcurrencyTests(TransactionTestCase):
+    REQUESTS = 60
+
+    def setUp(self):
+        self.user = User.objects.create(username="shifokor", is_staff=True)
+        self.patient = Patient.objects.create(
+            full_name="Bemor", phone_number="+998930000001", birth_date=datetime.date(1990, 1, 1)
+        )
+        self.medicine = Medicine.objects.create(name="Paratsetamol")
+        Pharmacy.objects.create(medicine=self.medicine, stock=20)
+        Pharmacy.objects.create(medicine=self.medicine, stock=5)
+
+    def prescribe(self, _):
+        view = PatientMedicineViewSet.as_view({"post": "create"})
+        request = APIRequestFactory().post(
+            "/", {"patient": self.patient.pk, "medicine": self.medicine.pk, "dosage": "1x1"}, format="json"
+        )
+        force_authenticate(request, user=self.user)
+        try:
+            return view(request).status_code
+        finally:
+            connection.close()
+
+    def test_parallel_prescriptions_never_oversell(self):
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            statuses = Counter(pool.map(self.prescribe, range(self.REQUESTS)))
+
+        self.assertEqual(statuses, {201: 25, 400: self.REQUESTS - 25})
+        self.assertEqual(list(Pharmacy.objects.values_list("stock", flat=True)), [0, 0])
+        self.assertEqual(PatientMedicine.objects.count(), 25)
+        self.assertEqual(
+            dict(Counter(StockReservation.objects.values_list("status", flat=True))), {"committed": 25}
+        )
+        for pharmacy in Pharmacy.objects.all():
+            self.assertEqual(InventoryMovement.stock_at(pharmacy.pk), pharmacy.stock)
+        # Har bir qator chegaradan bir martadan o'tdi: "low" va "out" bittadan
+        self.assertEqual(
+            sorted(Counter(StockAlert.objects.values_list("pharmacy_id", "kind")).values()), [1, 1, 1, 1]
+        )
@@ -0,0 +1,114 @@
+import datetime
+import unittest
+from contextlib import contextmanager
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from quickcare_app.models import Doctor, Patient, Department, Room, Queue
+from quickcare_app.serializers import QueueSerializer
+from quickcare_app.views import QueueViewSet
+
+User = get_user_model()
+
+# Navbat bilan bog'liq jadvallar: ular bo'yicha to'liq skan bo'lmasligi kerak
+QUEUE_TABLES = ("quickcare_app_queue", "quickcare_app_dailyqueuecounter")
+
+
+@unittest.skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN faqat SQLite uchun")
+class QueueQueryPlanTests(TestCase):
+    """Navbatning asosiy so'rovlari indeks bilan bajarilishini tekshiradi"""
+
+    def setUp(self):
+        department = Department.objects.create(name="Kardiologiya", description="")
+        room = Room.objects.create(room_number=101, department=department)
+        self.doctor_user = User.objects.create(username="shifokor")
+        self.doctor = Doctor.objects.create(
+            user=self.doctor_user, full_name="Shifokor", specialization="Kardiolog",
+            phone="+998901111111", department=department, room=room,
+        )
+        self.patients = [
+            Patient.objects.create(
+                user=User.objects.create(username=f"bemor{i}"),
+                full_name=f"Bemor {i}", phone_number=f"+99893000{i:04d}", birth_date=datetime.date(1990, 1, 1)
+            )
+            for i in range(5)
+        ]
+        noon = timezone.now().replace(hour=12, minute=0, second=0)
+        patcher = mock.patch("quickcare_app.models.queue.now", return_value=noon)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.entries = [Queue.add_patient_to_queue(patient, self.doctor) for patient in self.patients[:4]]
+
+    @contextmanager
+    def assert_no_table_scans(self):
+        """Blok ichidagi har bir navbat so'rovini EXPLAIN QUERY PLAN orqali tekshiradi"""
+        executed = []
+
+        def collect(execute, sql, params, many, context):
+            executed.append((sql, params))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(collect):
+            yield
+
+        checked = 0
+        for sql, params in executed:
+            if not any(table in sql for table in QUEUE_TABLES) or sql.lstrip().upper().startswith("INSERT"):
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+                plan = [row[-1] for row in cursor.fetchall()]
+            checked += 1
+            for detail in plan:
+                for table in QUEUE_TABLES:
+                    self.assertFalse(
+                        detail.startswith(f"SCAN {table}"),
+                        f"To'liq skan: {detail}\n{sql}",
+                    )
+        self.assertTrue(checked, "Tekshiriladigan so'rov topilmadi")
+
+    def call_view(self, action, user):
+        view = QueueViewSet.as_view({"get": action})
+        request = APIRequestFactory().get(f"/api/v1/queue/{action}/")
+        force_authenticate(request, user=user)
+        return view(request)
+
+    def test_next_patient(self):
+        with self.assert_no_table_scans():
+            response = self.call_view("next_patient", self.doctor_user)
+        self.assertEqual(response.status_code, 200)
+
+    def test_doctor_statistics(self):
+        with self.assert_no_table_scans():
+            response = self.call_view("doctor_statistics", self.doctor_user)
+        self.assertEqual(response.data["waiting_count"], 4)
+
+    def test_serializer_validate(self):
+        serializer = QueueSerializer(data={"patient_id": self.patients[4].pk, "doctor_id": self.doctor.pk})
+        with self.assert_no_table_scans():
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+
+    def test_cancel_queue(self):
+        with self.assert_no_table_scans():
+            self.entries[0].cancel_queue()
+
+    def test_add_patient_to_queue(self):
+        with self.assert_no_table_scans():
+            Queue.add_patient_to_queue(self.patients[4], self.doctor)
+
+    def test_list_cursor_page(self):
+        view = QueueViewSet.as_view({"get": "list"})
+        with mock.patch("quickcare_app.pagination.QueuePagination.page_size", 2):
+            request = APIRequestFactory().get("/api/v1/queue/")
+            force_authenticate(request, user=self.doctor_user)
+            next_url = view(request).data["next"]
+            request = APIRequestFactory().get(next_url)
+            force_authenticate(request, user=self.doctor_user)
+            with self.assert_no_table_scans():
+                response = view(request)
+        self.assertEqual(len(response.data["results"]), 2)
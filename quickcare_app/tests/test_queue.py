@@ -0,0 +1,465 @@
+import datetime
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from quickcare_app.models import (
+    Doctor, Patient, Department, Room, Queue, Notification, DailyQueueCounter, QueueArchive, ConsultationEstimate
+)
+from quickcare_app.serializers import QueueListSerializer
+from quickcare_app.views import QueueViewSet
+
+User = get_user_model()
+
+
+class QueueCancelTests(TestCase):
+    def setUp(self):
+        self.department = Department.objects.create(name="Kardiologiya", description="")
+        self.room = Room.objects.create(room_number=101, department=self.department)
+        self.doctor = self.make_doctor("+998901111111")
+        self.other_doctor = self.make_doctor("+998902222222")
+
+    def make_doctor(self, phone):
+        return Doctor.objects.create(
+            full_name="Shifokor " + phone,
+            specialization="Kardiolog",
+            phone=phone,
+            department=self.department,
+            room=self.room,
+        )
+
+    def make_queue(self, doctor, size):
+        entries = []
+        for position in range(1, size + 1):
+            patient = Patient.objects.create(
+                full_name=f"Bemor {doctor.pk}-{position}",
+                phone_number=f"+99893{doctor.pk:03d}{position:04d}",
+                birth_date=datetime.date(1990, 1, 1),
+            )
+            entries.append(Queue.objects.create(patient=patient, doctor=doctor, position=position))
+        return entries
+
+    def positions(self, doctor):
+        return list(
+            Queue.objects.filter(doctor=doctor, status="waiting").order_by("position").values_list("position", flat=True)
+        )
+
+    def test_cancel_shifts_only_same_doctor(self):
+        entries = self.make_queue(self.doctor, 5)
+        self.make_queue(self.other_doctor, 5)
+
+        self.assertTrue(entries[1].cancel_queue())
+
+        self.assertEqual(self.positions(self.doctor), [1, 2, 3, 4])
+        self.assertEqual(self.positions(self.other_doctor), [1, 2, 3, 4, 5])
+        entries[2].refresh_from_db()
+        self.assertEqual(entries[2].position, 2)
+        self.assertEqual(
+            Notification.objects.filter(recipient=entries[2].patient).count(), 1
+        )
+
+    def test_cancel_does_not_touch_previous_days(self):
+        entries = self.make_queue(self.doctor, 3)
+        yesterday = timezone.now() - datetime.timedelta(days=1)
+        Queue.objects.filter(pk=entries[2].pk).update(created_at=yesterday)
+
+        entries[0].cancel_queue()
+
+        entries[2].refresh_from_db()
+        self.assertEqual(entries[2].position, 3)
+
+    def test_cancel_twice_is_noop(self):
+        entries = self.make_queue(self.doctor, 3)
+        stale = Queue.objects.get(pk=entries[0].pk)
+
+        self.assertTrue(entries[0].cancel_queue())
+        self.assertFalse(stale.cancel_queue())
+        self.assertEqual(self.positions(self.doctor), [1, 2])
+
+    def test_cancel_notifies_every_shifted_patient(self):
+        entries = self.make_queue(self.doctor, 4)
+
+        entries[1].cancel_queue()
+
+        self.assertEqual(
+            sorted(Notification.objects.values_list("recipient_id", "message")),
+            sorted([
+                (entries[1].patient_id, "❌ Sizning navbatingiz bekor qilindi."),
+                (entries[2].patient_id, "📢 Hurmatli Bemor 1-3, navbatingiz oldinga siljidi. Yangi raqamingiz: 2."),
+                (entries[3].patient_id, "📢 Hurmatli Bemor 1-4, navbatingiz oldinga siljidi. Yangi raqamingiz: 3."),
+            ]),
+        )
+
+    def test_cancel_query_count_is_flat(self):
+        counts = []
+        # Bildirishnomalar bitta bulk_create partiyasiga sig'adigan o'lchamlar (SQLite parametr chegarasi)
+        for size, doctor in ((5, self.doctor), (40, self.other_doctor)):
+            first = self.make_queue(doctor, size)[0]
+            with CaptureQueriesContext(connection) as ctx:
+                first.cancel_queue()
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+
+class QueuePositionTests(TestCase):
+    def setUp(self):
+        self.department = Department.objects.create(name="Nevrologiya", description="")
+        self.room = Room.objects.create(room_number=102, department=self.department)
+        self.doctor = Doctor.objects.create(
+            full_name="Shifokor", specialization="Nevrolog", phone="+998903333333",
+            department=self.department, room=self.room,
+        )
+        self.noon = timezone.now().replace(hour=12, minute=0, second=0)
+        patcher = mock.patch("quickcare_app.models.queue.now", return_value=self.noon)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_patient(self, i):
+        return Patient.objects.create(
+            full_name=f"Bemor {i}", phone_number=f"+9989400{i:05d}", birth_date=datetime.date(1990, 1, 1)
+        )
+
+    def test_positions_are_per_doctor(self):
+        other = Doctor.objects.create(
+            full_name="Boshqa", specialization="Nevrolog", phone="+998904444444",
+            department=self.department, room=self.room,
+        )
+        first = Queue.add_patient_to_queue(self.make_patient(1), self.doctor)
+        second = Queue.add_patient_to_queue(self.make_patient(2), other)
+        third = Queue.add_patient_to_queue(self.make_patient(3), self.doctor)
+
+        self.assertEqual((first.position, second.position, third.position), (1, 1, 2))
+
+    def test_cancel_keeps_sequence_gap_free(self):
+        entries = [Queue.add_patient_to_queue(self.make_patient(i), self.doctor) for i in range(3)]
+        entries[0].cancel_queue()
+
+        new = Queue.add_patient_to_queue(self.make_patient(9), self.doctor)
+
+        self.assertEqual(new.position, 3)
+        self.assertEqual(
+            DailyQueueCounter.objects.get(doctor=self.doctor, day=self.noon.date()).last_position, 3
+        )
+
+    def test_outside_working_hours(self):
+        with mock.patch("quickcare_app.models.queue.now", return_value=self.noon.replace(hour=22)):
+            self.assertIsNone(Queue.add_patient_to_queue(self.make_patient(1), self.doctor))
+        self.assertFalse(DailyQueueCounter.objects.exists())
+
+
+class QueueCreateConcurrencyTests(TransactionTestCase):
+    DOCTORS = 10
+    PATIENTS_PER_DOCTOR = 20
+
+    def setUp(self):
+        department = Department.objects.create(name="Terapiya", description="")
+        room = Room.objects.create(room_number=103, department=department)
+        self.doctors = [
+            Doctor.objects.create(
+                full_name=f"Shifokor {i}", specialization="Terapevt", phone=f"+99890500{i:04d}",
+                department=department, room=room,
+            )
+            for i in range(self.DOCTORS)
+        ]
+        self.requests = []
+        for i in range(self.DOCTORS * self.PATIENTS_PER_DOCTOR):
+            user = User.objects.create(username=f"bemor{i}")
+            patient = Patient.objects.create(
+                user=user, full_name=f"Bemor {i}", phone_number=f"+9989500{i:05d}",
+                birth_date=datetime.date(1990, 1, 1),
+            )
+            self.requests.append((user, patient, self.doctors[i % self.DOCTORS]))
+
+        noon = timezone.now().replace(hour=12, minute=0, second=0)
+        patcher = mock.patch("quickcare_app.models.queue.now", return_value=noon)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def enqueue(self, args):
+        user, patient, doctor = args
+        view = QueueViewSet.as_view({"post": "create"})
+        request = APIRequestFactory().post(
+            "/api/v1/queue/", {"patient_id": patient.pk, "doctor_id": doctor.pk}, format="json"
+        )
+        force_authenticate(request, user=user)
+        try:
+            return view(request).status_code
+        finally:
+            connection.close()
+
+    def test_parallel_create_positions_unique_and_gap_free(self):
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            statuses = list(pool.map(self.enqueue, self.requests))
+
+        self.assertEqual(set(statuses), {201})
+        positions = defaultdict(list)
+        for doctor_id, position in Queue.objects.values_list("doctor_id", "position"):
+            positions[doctor_id].append(position)
+        for doctor in self.doctors:
+            self.assertEqual(sorted(positions[doctor.pk]), list(range(1, self.PATIENTS_PER_DOCTOR + 1)))
+
+
+class QueueArchiveTests(TestCase):
+    def setUp(self):
+        department = Department.objects.create(name="Pediatriya", description="")
+        room = Room.objects.create(room_number=104, department=department)
+        self.doctor = Doctor.objects.create(
+            full_name="Shifokor", specialization="Pediatr", phone="+998906666666",
+            department=department, room=room,
+        )
+        yesterday = timezone.now() - datetime.timedelta(days=1)
+        for i in range(7):
+            patient = Patient.objects.create(
+                full_name=f"Bemor {i}", phone_number=f"+9989600{i:05d}", birth_date=datetime.date(1990, 1, 1)
+            )
+            entry = Queue.objects.create(patient=patient, doctor=self.doctor, position=i + 1, status="completed")
+            if i < 5:
+                Queue.objects.filter(pk=entry.pk).update(created_at=yesterday)
+        DailyQueueCounter.objects.create(doctor=self.doctor, day=yesterday.date(), last_position=5)
+
+    def test_command_moves_previous_days_in_batches(self):
+        out = StringIO()
+        call_command("archive_queue", batch_size=2, stdout=out)
+
+        self.assertEqual(Queue.objects.count(), 2)
+        self.assertEqual(QueueArchive.objects.count(), 5)
+        self.assertFalse(DailyQueueCounter.objects.exists())
+        self.assertIn("5/5", out.getvalue())
+        archived = QueueArchive.objects.order_by("original_id").first()
+        self.assertEqual((archived.doctor_id, archived.position, archived.status), (self.doctor.pk, 1, "completed"))
+
+    def test_interrupted_run_resumes(self):
+        today_start = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        batches = QueueArchive.archive_before(today_start, batch_size=2)
+        next(batches)
+        batches.close()
+        self.assertEqual(QueueArchive.objects.count(), 2)
+
+        self.assertEqual(Queue.reset_daily_queue(), 3)
+        self.assertEqual(QueueArchive.objects.count(), 5)
+        self.assertEqual(Queue.reset_daily_queue(), 0)
+
+
+class QueueStatsTests(TestCase):
+    def setUp(self):
+        department = Department.objects.create(name="Jarrohlik", description="")
+        room = Room.objects.create(room_number=105, department=department)
+        self.user = User.objects.create(username="jarroh")
+        self.doctor = Doctor.objects.create(
+            user=self.user, full_name="Shifokor", specialization="Jarroh", phone="+998907777777",
+            department=department, room=room,
+        )
+        self.today = timezone.now().replace(hour=12, minute=0, second=0)
+        patcher = mock.patch("quickcare_app.models.queue.now", return_value=self.today)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.entries = []
+        for i in range(4):
+            patient = Patient.objects.create(
+                full_name=f"Bemor {i}", phone_number=f"+9989700{i:05d}", birth_date=datetime.date(1990, 1, 1)
+            )
+            self.entries.append(Queue.add_patient_to_queue(patient, self.doctor))
+
+    def stats(self):
+        return DailyQueueCounter.stats(self.doctor, self.today.date())
+
+    def test_counters_follow_status_transitions(self):
+        self.entries[0].change_status("in_progress")
+        self.entries[0].change_status("completed")
+        self.entries[1].change_status("in_progress")
+        self.entries[3].cancel_queue()
+
+        self.assertEqual(self.stats(), {
+            "last_position": 3, "waiting_count": 1, "in_progress_count": 1, "completed_count": 1,
+        })
+
+    def test_stale_transition_is_not_counted_twice(self):
+        stale = Queue.objects.get(pk=self.entries[0].pk)
+        self.assertTrue(self.entries[0].change_status("in_progress"))
+        self.assertFalse(stale.change_status("in_progress"))
+
+        self.assertEqual(self.stats()["in_progress_count"], 1)
+
+    def test_doctor_statistics_reads_counter_row(self):
+        self.entries[0].change_status("in_progress")
+        view = QueueViewSet.as_view({"get": "doctor_statistics"})
+        request = APIRequestFactory().get("/api/v1/queue/doctor_statistics/")
+        force_authenticate(request, user=self.user)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = view(request)
+
+        self.assertEqual(response.data, {
+            "waiting_count": 3, "in_progress_count": 1, "completed_today": 0, "total_active": 4,
+        })
+        self.assertEqual(
+            [q["sql"] for q in ctx.captured_queries if "quickcare_app_queue" in q["sql"]], []
+        )
+
+    def test_reconcile_reports_and_fixes_drift(self):
+        DailyQueueCounter.objects.update(waiting_count=10)
+
+        out = StringIO()
+        call_command("reconcile_queue_stats", stdout=out)
+        self.assertIn("Farqlar: 1", out.getvalue())
+
+        call_command("reconcile_queue_stats", fix=True, stdout=StringIO())
+        self.assertEqual(self.stats()["waiting_count"], 4)
+        out = StringIO()
+        call_command("reconcile_queue_stats", stdout=out)
+        self.assertIn("to'g'ri", out.getvalue())
+
+
+class ConsultationEstimateTests(TestCase):
+    def setUp(self):
+        department = Department.objects.create(name="Terapiya", description="")
+        room = Room.objects.create(room_number=106, department=department)
+        self.doctor = Doctor.objects.create(
+            user=User.objects.create(username="terapevt"), full_name="Shifokor", specialization="Terapevt",
+            phone="+998908888888", department=department, room=room,
+        )
+        self.clock = timezone.now().replace(hour=9, minute=0, second=0, microsecond=0)
+        patcher = mock.patch("quickcare_app.models.queue.now", side_effect=lambda: self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.entries = []
+        for i in range(4):
+            patient = Patient.objects.create(
+                user=User.objects.create(username=f"bemor{i}"), full_name=f"Bemor {i}",
+                phone_number=f"+9989800{i:05d}", birth_date=datetime.date(1990, 1, 1),
+            )
+            self.entries.append(Queue.add_patient_to_queue(patient, self.doctor))
+
+    def consult(self, entry, minutes):
+        entry.change_status("in_progress")
+        self.clock += datetime.timedelta(minutes=minutes)
+        entry.change_status("completed")
+
+    def test_completion_updates_moving_average(self):
+        self.consult(self.entries[0], 10)
+        self.consult(self.entries[1], 20)
+
+        estimate = ConsultationEstimate.objects.get(doctor=self.doctor)
+        self.assertEqual(estimate.samples, 2)
+        self.assertAlmostEqual(estimate.mean_minutes, 12.0)
+        self.assertAlmostEqual(estimate.variance, 16.0)
+        entry = Queue.objects.get(pk=self.entries[1].pk)
+        self.assertEqual(entry.completed_at - entry.started_at, datetime.timedelta(minutes=20))
+
+    def test_list_exposes_estimated_start_with_constant_queries(self):
+        self.consult(self.entries[0], 10)
+        self.entries[1].change_status("in_progress")
+
+        queues = list(Queue.objects.select_related("patient__user", "doctor__user").order_by("position"))
+        with CaptureQueriesContext(connection) as ctx:
+            data = QueueListSerializer(queues, many=True).data
+
+        self.assertEqual(len(ctx.captured_queries), 2)
+        self.assertEqual([row["estimated_start"] for row in data[:2]], [None, None])
+        self.assertEqual(data[2]["estimated_start"], self.clock + datetime.timedelta(minutes=10))
+        self.assertEqual(data[3]["estimated_start"], self.clock + datetime.timedelta(minutes=20))
+
+
+class QueueBulkActionTests(TestCase):
+    def setUp(self):
+        department = Department.objects.create(name="Travmatologiya", description="")
+        room = Room.objects.create(room_number=107, department=department)
+        self.user = User.objects.create(username="travmatolog")
+        self.doctor = Doctor.objects.create(
+            user=self.user, full_name="Shifokor", specialization="Travmatolog", phone="+998909999999",
+            department=department, room=room,
+        )
+        self.today = timezone.now().replace(hour=12, minute=0, second=0)
+        patcher = mock.patch("quickcare_app.models.queue.now", return_value=self.today)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.entries = []
+        for i in range(5):
+            patient = Patient.objects.create(
+                full_name=f"Bemor {i}", phone_number=f"+9989900{i:05d}", birth_date=datetime.date(1990, 1, 1)
+            )
+            self.entries.append(Queue.add_patient_to_queue(patient, self.doctor))
+
+    def post(self, actions, user=None):
+        view = QueueViewSet.as_view({"post": "bulk_action"})
+        request = APIRequestFactory().post("/api/v1/queue/bulk_action/", {"actions": actions}, format="json")
+        force_authenticate(request, user=user or self.user)
+        return view(request)
+
+    def test_valid_items_are_applied_and_invalid_reported(self):
+        e = self.entries
+        response = self.post([
+            {"id": e[0].pk, "action": "start"},
+            {"id": e[1].pk, "action": "cancel"},
+            {"id": e[3].pk, "action": "cancel"},
+            {"id": e[4].pk, "action": "complete"},
+            {"id": 999999, "action": "cancel"},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r["success"] for r in response.data["results"]], [True, True, True, False, False])
+        self.assertEqual(
+            list(Queue.objects.filter(status="waiting").order_by("position").values_list("pk", "position")),
+            [(e[2].pk, 2), (e[4].pk, 3)],
+        )
+        self.assertEqual(DailyQueueCounter.stats(self.doctor, self.today.date()), {
+            "last_position": 3, "waiting_count": 2, "in_progress_count": 1, "completed_count": 0,
+        })
+        self.assertEqual(Notification.objects.filter(message__startswith="❌").count(), 2)
+        self.assertEqual(
+            list(Notification.objects.filter(message__contains="siljidi").order_by("recipient_id")
+                 .values_list("recipient_id", flat=True)),
+            [e[2].patient_id, e[4].patient_id],
+        )
+        # 5 -> 3: ikki o'rin oldinga, xabarda haqiqiy yangi raqam
+        self.assertEqual(
+            Notification.objects.get(recipient_id=e[4].patient_id, message__contains="siljidi").message,
+            "📢 Hurmatli Bemor 4, navbatingiz oldinga siljidi. Yangi raqamingiz: 3.",
+        )
+
+    def perform(self, queue, action):
+        view = QueueViewSet.as_view({"post": "perform_action"})
+        request = APIRequestFactory().post(
+            f"/api/v1/queue/{queue.pk}/perform_action/", {"action": action}, format="json"
+        )
+        force_authenticate(request, user=self.user)
+        return view(request, pk=queue.pk)
+
+    def test_perform_action_reports_conflict_when_status_changed(self):
+        entry = self.entries[0]
+        self.assertEqual(self.perform(entry, "start").status_code, 200)
+
+        # Parallel so'rov: ikkalasi ham navbatni "waiting" holatida o'qigan, birinchisi allaqachon boshlagan
+        stale = Queue.objects.get(pk=self.entries[1].pk)
+        self.assertTrue(Queue.objects.get(pk=stale.pk).change_status("in_progress"))
+        with mock.patch.object(QueueViewSet, "get_object", return_value=stale):
+            response = self.perform(stale, "start")
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data["detail"], "Navbat holati parallel so'rov tomonidan o'zgartirildi")
+        self.assertEqual(DailyQueueCounter.objects.get(doctor=self.doctor).in_progress_count, 2)
+
+    def test_patient_cannot_act_on_other_queues(self):
+        stranger = User.objects.create(username="begona")
+
+        response = self.post([{"id": self.entries[0].pk, "action": "cancel"}], user=stranger)
+
+        self.assertFalse(response.data["results"][0]["success"])
+        self.assertEqual(Queue.objects.filter(status="cancelled").count(), 0)
+
+    def test_query_count_does_not_grow_with_batch(self):
+        counts = []
+        for entries in (self.entries[:2], self.entries[2:]):
+            with CaptureQueriesContext(connection) as ctx:
+                self.post([{"id": q.pk, "action": "cancel"} for q in entries])
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
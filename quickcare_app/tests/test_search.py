@@ -0,0 +1,90 @@
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from quickcare_app.models import Medicine
+from quickcare_app.search import FTS5Search, fts5_search, search_backend, tokenize, trigram_search
+
+User = get_user_model()
+
+CATALOG = [
+    ("Paratsetamol", "Isitma va og'riq uchun"),
+    ("Paratsetamol Forte", "Kuchaytirilgan doza"),
+    ("Ibuprofen", "Yallig'lanishga qarshi, paratsetamol bilan birga ichilmaydi"),
+    ("Amoksitsillin", "Antibiotik"),
+    ("Nimesil", "Og'riq qoldiruvchi"),
+]
+
+
+class SearchBackendMixin:
+    def setUp(self):
+        trigram_search.reset()
+        self.addCleanup(trigram_search.reset)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.medicines = {name: Medicine.objects.create(name=name, description=text) for name, text in CATALOG}
+
+    def search(self, query, limit=20):
+        return [Medicine.objects.get(pk=pk).name for pk in self.backend.search(query, limit)]
+
+    def test_prefix_ranks_name_matches_first(self):
+        self.assertEqual(self.search("parat"), ["Paratsetamol", "Paratsetamol Forte", "Ibuprofen"])
+        self.assertEqual(self.search("paratsetamol forte"), ["Paratsetamol Forte"])
+        self.assertEqual(self.search("OG'RIQ"), ["Nimesil", "Paratsetamol"])
+
+    def test_typos_fall_back_to_trigram_similarity(self):
+        self.assertEqual(self.search("ibuprofn")[:1], ["Ibuprofen"])
+        self.assertEqual(self.search("amoksitsilin"), ["Amoksitsillin"])
+        self.assertEqual(self.search("paratsetmol forte"), ["Paratsetamol Forte"])
+        self.assertEqual(self.search("xyzzy"), [])
+        # Aniq moslik topilsa xatoli qidiruvga o'tilmaydi
+        self.assertEqual(self.search("nimesil"), ["Nimesil"])
+        self.assertEqual(self.search("parat", limit=1), ["Paratsetamol"])
+
+    def test_index_follows_save_and_delete(self):
+        medicine = self.medicines["Nimesil"]
+        with self.captureOnCommitCallbacks(execute=True):
+            medicine.name = "Nimesulid"
+            medicine.save()
+            self.medicines["Amoksitsillin"].delete()
+
+        self.assertEqual(self.search("nimesulid"), ["Nimesulid"])
+        self.assertEqual(self.search("amoks"), [])
+
+
+class FTS5SearchTests(SearchBackendMixin, TestCase):
+    backend = fts5_search
+
+    def test_rebuild_command_restores_rows_missed_by_bulk_update(self):
+        Medicine.objects.filter(name="Nimesil").update(name="Ketonal")
+        self.assertEqual(self.search("ketonal"), [])
+
+        call_command("rebuild_search_index", stdout=open("/dev/null", "w"))
+        self.assertEqual(self.search("ketonal"), ["Ketonal"])
+
+
+@override_settings(MEDICINE_SEARCH_BACKEND="trigram")
+class TrigramSearchTests(SearchBackendMixin, TestCase):
+    backend = trigram_search
+
+    def test_tokenize_strips_diacritics(self):
+        self.assertEqual(tokenize("Ko‘k  Çay-2"), ["ko", "k", "cay", "2"])
+
+
+class MedicineSearchEndpointTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(user=User.objects.create(username="farmatsevt"))
+        for name, text in CATALOG:
+            Medicine.objects.create(name=name, description=text, is_available=name != "Paratsetamol Forte")
+
+    def test_returns_ranked_medicines(self):
+        self.assertIsInstance(search_backend(), FTS5Search)
+        response = self.client.get(reverse("medicine-search"), {"q": "parat", "is_available": "true"})
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual([item["name"] for item in response.data], ["Paratsetamol", "Ibuprofen"])
+
+    def test_requires_query(self):
+        self.assertEqual(self.client.get(reverse("medicine-search")).status_code, 400)
+        self.assertEqual(self.client.get(reverse("medicine-search"), {"q": "a", "limit": 0}).status_code, 400)
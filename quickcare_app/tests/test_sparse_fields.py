@@ -0,0 +1,136 @@
+import datetime
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from quickcare_app.models import Doctor, Patient, Department, Room, Queue, Emergency
+
+User = get_user_model()
+
+
+class SparseFieldsetTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="dispetcher", is_staff=True)
+        self.client.force_authenticate(user=self.user)
+        department = Department.objects.create(name="Kardiologiya", description="")
+        self.doctor = Doctor.objects.create(
+            user=User.objects.create(username="shifokor"), full_name="Shifokor", specialization="Kardiolog",
+            phone="+998901111111", department=department,
+            room=Room.objects.create(room_number=101, department=department),
+        )
+        self.patients = [
+            Patient.objects.create(
+                user=User.objects.create(username=f"bemor{i}"), full_name=f"Bemor {i}",
+                phone_number=f"+99893000000{i}", birth_date=datetime.date(1990, 1, 1),
+                medical_history="Uzun kasallik tarixi " * 50,
+            )
+            for i in range(8)
+        ]
+        for patient in self.patients[:2]:
+            Emergency.objects.create(
+                patient=patient, doctor=self.doctor, description="Favqulodda chaqiruv", ambulance_requested=False
+            )
+
+    def get(self, url_name, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse(url_name), params)
+        self.assertEqual(response.status_code, 200, response.data)
+        sql = [q["sql"] for q in ctx.captured_queries if "quickcare_app_emergency" in q["sql"]]
+        return response.data["results"], sql
+
+    def test_unexpanded_relations_become_ids_and_columns_are_skipped(self):
+        rows, sql = self.get("emergency-list", fields="id,status_display,patient,can_request_ambulance")
+
+        self.assertEqual(set(rows[0]), {"id", "status_display", "patient", "can_request_ambulance"})
+        self.assertIn(rows[0]["patient"], {p.pk for p in self.patients})
+        self.assertNotIn("quickcare_app_patient", sql[-1])
+        self.assertNotIn('"description"', sql[-1])
+
+    def test_nested_fields_select_only_needed_columns(self):
+        rows, sql = self.get("emergency-list", fields="id,patient.full_name,patient.age")
+
+        self.assertEqual(rows[0]["patient"], {"full_name": mock.ANY, "age": mock.ANY})
+        self.assertIn("quickcare_app_patient", sql[-1])
+        self.assertNotIn("medical_history", sql[-1])
+        self.assertNotIn("quickcare_app_doctor", sql[-1])
+
+    def test_expand_keeps_full_nested_object(self):
+        rows, _ = self.get("emergency-list", expand="doctor")
+
+        self.assertEqual(rows[0]["doctor"]["department_name"], "Kardiologiya")
+        self.assertIsInstance(rows[0]["patient"], int)
+        self.assertIn("description", rows[0])
+
+    def test_without_parameters_response_is_unchanged(self):
+        rows, _ = self.get("emergency-list")
+
+        self.assertEqual(rows[0]["patient"]["medical_history"], self.patients[1].medical_history)
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get(reverse("emergency-list"), {"fields": "id,parol", "expand": "patient"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("fields", response.data)
+
+    def test_write_requests_ignore_fieldset(self):
+        response = self.client.post(
+            reverse("emergency-list") + "?fields=id",
+            {"patient_id": self.patients[5].pk, "description": "Yangi favqulodda chaqiruv", "ambulance_requested": False},
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertIn("patient", response.data)
+
+    def test_sparse_queue_list_has_no_per_row_queries(self):
+        noon = timezone.now().replace(hour=12, minute=0, second=0)
+        counts = []
+        with mock.patch("quickcare_app.models.queue.now", return_value=noon):
+            for patients in (self.patients[:2], self.patients[2:8]):
+                for patient in patients:
+                    Queue.add_patient_to_queue(patient, self.doctor)
+                with CaptureQueriesContext(connection) as ctx:
+                    response = self.client.get(reverse("queue-list"), {"fields": "id,patient_name,position"})
+                counts.append(len(ctx.captured_queries))
+
+        self.assertEqual(set(response.data["results"][0]), {"id", "patient_name", "position"})
+        self.assertEqual(counts[0], counts[1])
+
+    def test_queue_estimated_start_fieldset(self):
+        noon = timezone.now().replace(hour=12, minute=0, second=0)
+        with mock.patch("quickcare_app.models.queue.now", return_value=noon):
+            queue = Queue.add_patient_to_queue(self.patients[0], self.doctor)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("queue-list"), {"fields": "id,estimated_start"})
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data["results"], [{"id": queue.pk, "estimated_start": mock.ANY}])
+        self.assertIsNotNone(response.data["results"][0]["estimated_start"])
+        sql = [q["sql"] for q in ctx.captured_queries if 'FROM "quickcare_app_queue"' in q["sql"]]
+        self.assertNotIn('"started_at"', sql[-1])
+
+    def test_queue_detail_expand(self):
+        noon = timezone.now().replace(hour=12, minute=0, second=0)
+        with mock.patch("quickcare_app.models.queue.now", return_value=noon):
+            queue = Queue.add_patient_to_queue(self.patients[0], self.doctor)
+
+        response = self.client.get(reverse("queue-detail", args=[queue.pk]), {"expand": "doctor"})
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data["doctor"]["full_name"], "Shifokor")
+        self.assertEqual(response.data["patient"], self.patients[0].pk)
+        self.assertIsNotNone(response.data["estimated_start"])
+
+    def test_every_list_endpoint_accepts_fieldset(self):
+        for url_name in (
+            "doctor-list", "patient-list", "emergency-list", "ambulance-list", "medicine-list", "pharmacy-list",
+            "patientmedicine-list", "queue-list", "notification-list", "comment-list", "review-list",
+            "reply-list", "department-list", "room-list",
+        ):
+            with self.subTest(url_name):
+                response = self.client.get(reverse(url_name), {"fields": "id"})
+                self.assertEqual(response.status_code, 200, response.data)
+                data = response.data.get("results", response.data) if isinstance(response.data, dict) else response.data
+                for row in data:
+                    self.assertEqual(set(row), {"id"})
@@ -0,0 +1,136 @@
+import datetime
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from quickcare_app.dispatch import ambulance_index
+from quickcare_app.models import Ambulance, AmbulancePosition
+from quickcare_app import telemetry
+from quickcare_app.telemetry import telemetry_buffer
+
+User = get_user_model()
+
+
+@override_settings(TELEMETRY_FLUSH_SIZE=10, TELEMETRY_FLUSH_SECONDS=3600, TELEMETRY_RECENT_FIXES=5)
+class TelemetryTests(APITestCase):
+    def setUp(self):
+        telemetry_buffer.reset()
+        ambulance_index.reset()
+        self.addCleanup(telemetry_buffer.reset)
+        self.addCleanup(ambulance_index.reset)
+        self.client.force_authenticate(user=User.objects.create(username="dispetcher", is_staff=True))
+        self.first = Ambulance.objects.create(plate_number="01A001AA", latitude=41.3, longitude=69.2)
+        self.second = Ambulance.objects.create(plate_number="01A002AA")
+        ambulance_index.ensure_loaded()
+        self.start = timezone.now() - datetime.timedelta(minutes=1)
+
+    def fixes(self, ambulance, count, offset=0):
+        return [
+            {
+                "ambulance_id": ambulance.pk,
+                "latitude": 41.3 + (offset + i) * 0.001,
+                "longitude": 69.2,
+                "recorded_at": (self.start + datetime.timedelta(seconds=offset + i)).isoformat(),
+            }
+            for i in range(count)
+        ]
+
+    def send(self, fixes):
+        return self.client.post(reverse("ambulance-telemetry"), {"fixes": fixes}, format="json")
+
+    def position(self, ambulance, **params):
+        return self.client.get(reverse("ambulance-position", args=[ambulance.pk]), params).data
+
+    def test_fixes_are_buffered_until_batch_is_full(self):
+        response = self.send(self.fixes(self.first, 4) + [dict(self.fixes(self.first, 1)[0], ambulance_id=999)])
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data, {"accepted": 4, "unknown": [999]})
+        self.assertFalse(AmbulancePosition.objects.exists())
+
+        with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as ctx:
+            self.send(self.fixes(self.first, 4, offset=4) + self.fixes(self.second, 2))
+        self.assertEqual(AmbulancePosition.objects.count(), 10)
+        writes = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith(("INSERT", "UPDATE"))]
+        self.assertEqual(len(writes), 2)
+
+        self.first.refresh_from_db()
+        self.assertAlmostEqual(self.first.latitude, 41.307)
+        self.assertEqual([pk for _, pk in ambulance_index.nearest(41.307, 69.2, 1)], [self.first.pk])
+
+    def test_live_position_comes_from_buffer(self):
+        self.send(self.fixes(self.first, 8))
+        # Kechikib kelgan eski nuqta jonli joylashuvni o'zgartirmaydi
+        self.send(self.fixes(self.first, 1))
+
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.position(self.first, limit=3)
+        self.assertFalse([q for q in ctx.captured_queries if "ambulanceposition" in q["sql"]])
+        self.assertAlmostEqual(data["latitude"], 41.307)
+        self.assertEqual(len(data["track"]), 3)
+
+        # Buferda nuqta bo'lmasa — Ambulance dagi oxirgi koordinata
+        self.assertEqual(self.position(self.second)["latitude"], None)
+
+    def test_ring_buffer_keeps_recent_fixes_only(self):
+        self.send(self.fixes(self.first, 8))
+
+        self.assertEqual(len(telemetry_buffer.recent(self.first.pk)), 5)
+        self.assertEqual(telemetry_buffer.pending_count(), 8)
+
+    def test_rejects_invalid_fix(self):
+        response = self.send([dict(self.fixes(self.first, 1)[0], latitude=120)])
+        self.assertEqual(response.status_code, 400)
+
+    def test_failed_flush_is_logged_and_retried(self):
+        self.send(self.fixes(self.first, 4))
+        with mock.patch.object(AmbulancePosition.objects, "bulk_create", side_effect=RuntimeError("disk")), \
+                self.assertLogs(telemetry.logger, "ERROR"):
+            # Xato ingest so'roviga ko'tarilmaydi
+            response = self.send(self.fixes(self.first, 6, offset=4))
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(telemetry_buffer.pending_count(), 10)
+
+        self.assertEqual(telemetry_buffer.flush(), 10)
+        self.assertEqual(AmbulancePosition.objects.count(), 10)
+
+    def test_fixes_of_deleted_ambulance_are_dropped(self):
+        self.send(self.fixes(self.first, 3) + self.fixes(self.second, 2))
+        # Tekshiruvdan o'tgan, lekin yozilishidan oldin o'chirilgan mashina
+        Ambulance.objects.filter(pk=self.second.pk).delete()
+
+        with self.assertLogs(telemetry.logger, "WARNING"):
+            self.assertEqual(telemetry_buffer.flush(), 3)
+        self.assertEqual(set(AmbulancePosition.objects.values_list("ambulance_id", flat=True)), {self.first.pk})
+        self.assertEqual(telemetry_buffer.pending_count(), 0)
+        self.assertIsNone(telemetry_buffer.latest(self.second.pk))
+
+    @override_settings(TELEMETRY_FLUSH_RETRIES=2, TELEMETRY_MAX_PENDING=6)
+    def test_failing_batch_is_capped_and_dropped_after_retries(self):
+        self.send(self.fixes(self.first, 8))
+        with mock.patch.object(AmbulancePosition.objects, "bulk_create", side_effect=RuntimeError("disk")), \
+                self.assertLogs(telemetry.logger, "ERROR"):
+            telemetry_buffer.flush()
+            # Navbat chegarasi: eng eski 2 ta nuqta tashlandi
+            self.assertEqual(telemetry_buffer.pending_count(), 6)
+            telemetry_buffer.flush()
+        self.assertEqual(telemetry_buffer.pending_count(), 0)
+
+        # Keyingi nuqtalar odatdagidek yoziladi
+        self.send(self.fixes(self.first, 2, offset=8))
+        self.assertEqual(telemetry_buffer.flush(), 2)
+
+    def test_stop_writes_remaining_fixes(self):
+        self.send(self.fixes(self.first, 3))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            telemetry_buffer.stop()
+        self.addCleanup(telemetry_buffer._stopped.clear)
+        self.assertEqual(AmbulancePosition.objects.count(), 3)
+        self.first.refresh_from_db()
+        self.assertAlmostEqual(self.first.latitude, 41.302)
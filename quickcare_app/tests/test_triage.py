@@ -0,0 +1,78 @@
+import datetime
+import unittest
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from quickcare_app.models import Emergency, Patient
+
+User = get_user_model()
+
+
+class TriageQueueTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(user=User.objects.create(username="dispetcher", is_staff=True))
+        self.patient = Patient.objects.create(
+            full_name="Bemor", phone_number="+998930000001", birth_date=datetime.date(1990, 1, 1)
+        )
+
+    def emergency(self, severity, **kwargs):
+        return Emergency.objects.create(
+            patient=self.patient, description="Favqulodda chaqiruv", ambulance_requested=False,
+            severity=severity, **kwargs
+        )
+
+    def next_emergency(self):
+        response = self.client.post(reverse("emergency-next-emergency"))
+        return response.data["id"] if response.status_code == 200 else None
+
+    def test_serves_highest_severity_then_longest_waiting(self):
+        standard_old = self.emergency(Emergency.Severity.STANDARD)
+        critical = self.emergency(Emergency.Severity.CRITICAL)
+        standard_new = self.emergency(Emergency.Severity.STANDARD)
+        urgent = self.emergency(Emergency.Severity.URGENT)
+
+        order = [self.next_emergency() for _ in range(5)]
+
+        self.assertEqual(order, [critical.pk, urgent.pk, standard_old.pk, standard_new.pk, None])
+        self.assertEqual(Emergency.objects.get(pk=critical.pk).status, "in_progress")
+
+    def test_severity_change_and_closed_cases_change_the_order(self):
+        first = self.emergency(Emergency.Severity.URGENT)
+        second = self.emergency(Emergency.Severity.MINOR)
+        closed = self.emergency(Emergency.Severity.CRITICAL)
+
+        second.severity = Emergency.Severity.CRITICAL
+        second.save()
+        closed.resolve()
+
+        self.assertEqual([self.next_emergency() for _ in range(3)], [second.pk, first.pk, None])
+
+    def test_case_claimed_elsewhere_is_skipped(self):
+        taken = self.emergency(Emergency.Severity.CRITICAL)
+        waiting = self.emergency(Emergency.Severity.MINOR)
+        # Boshqa dispetcher holatni olib ulgurdi
+        Emergency.objects.filter(pk=taken.pk).update(status=Emergency.Status.IN_PROGRESS)
+
+        self.assertEqual(self.next_emergency(), waiting.pk)
+
+    def test_triage_list_orders_pending_cases(self):
+        minor = self.emergency(Emergency.Severity.MINOR)
+        critical = self.emergency(Emergency.Severity.CRITICAL)
+        self.emergency(Emergency.Severity.CRITICAL, status=Emergency.Status.RESOLVED)
+
+        response = self.client.get(reverse("emergency-triage"))
+
+        self.assertEqual([item["id"] for item in response.data], [critical.pk, minor.pk])
+
+    @unittest.skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN faqat SQLite uchun")
+    def test_triage_order_uses_partial_index(self):
+        sql, params = Emergency.triage_order()[:1].query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            plan = " ".join(str(row[-1]) for row in cursor.fetchall())
+
+        self.assertIn("emergency_triage_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
@@ -4,6 +4,7 @@ from rest_framework.decorators import action
 from django_filters.rest_framework import DjangoFilterBackend
 from quickcare_app.models import Patient, Doctor
 from quickcare_app.serializers import DoctorSerializer, PatientSerializer
+from quickcare_app.views.mixins import EagerLoadingMixin
 from quickcare_app.permissions import (
     IsAdminUser,
     IsAuthenticated,
@@ -12,12 +13,12 @@ from quickcare_app.permissions import (
 )
 
 
-class DoctorViewSet(viewsets.ModelViewSet):
+class DoctorViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     """Shifokorlar uchun viewset"""
     queryset = Doctor.objects.all()
     serializer_class = DoctorSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['full_name', 'specialization', 'department_name']
+    filterset_fields = ['full_name', 'specialization', 'department__name']
     search_fields = ['full_name', 'specialization']
     ordering_fields = ['full_name', 'specialization']
 
@@ -57,7 +58,7 @@ class DoctorViewSet(viewsets.ModelViewSet):
 
 
 
-class PatientViewSet(viewsets.ModelViewSet):
+class PatientViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     """Bemorlar uchun viewset"""
     queryset = Patient.objects.all().order_by('created_at')
     serializer_class = PatientSerializer
@@ -78,7 +79,7 @@ class PatientViewSet(viewsets.ModelViewSet):
         elif self.action in ['update', 'partial_update', 'destroy']:
             return [IsOwnerOrDoctor()]
         elif self.action in ['list', 'retrieve']:
-            return [IsAuthenticated(), IsDoctorOrStaff]
+            return [IsAuthenticated(), IsDoctorOrStaff()]
         return [IsAuthenticated()]
 
     def create(self, request, *args, **kwargs):
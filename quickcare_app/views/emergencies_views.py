@@ -11,10 +11,16 @@ from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
 from quickcare_app.models import Emergency, Ambulance
-from quickcare_app.serializers import EmergencySerializer, AmbulanceSerializer
+from quickcare_app.serializers import (
+    EmergencySerializer, AmbulanceSerializer, CoordinatesSerializer, NearestAmbulanceQuerySerializer,
+    TelemetryBatchSerializer
+)
+from quickcare_app.telemetry import Fix, telemetry_buffer
+from quickcare_app.views.mixins import EagerLoadingMixin
+from quickcare_app.pagination import EmergencyPagination
 
 
-class AmbulanceViewSet(viewsets.ModelViewSet):
+class AmbulanceViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     queryset = Ambulance.objects.all()
     serializer_class = AmbulanceSerializer
     permission_classes = [IsAuthenticated]
@@ -38,12 +44,6 @@ class AmbulanceViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def send_ambulance(self, request, pk=None):
         ambulance = self.get_object()
-        if ambulance.status != 'available':
-            return Response(
-                {'detail': "Tez yordam jo'natish uchun mavjud emas!"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
         location = request.data.get('location')
         if not location:
             return Response(
@@ -51,16 +51,16 @@ class AmbulanceViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        # Holatni oldindan o'qib tekshirmaymiz: band qilish shartli UPDATE bilan, raqobatda yutqazgan 409 oladi
         emergency_id = request.data.get('emergency_id')
-        if emergency_id:
-            emergency = get_object_or_404(Emergency, id=emergency_id)
-            emergency.ambulance = ambulance
-            emergency.status = 'in_progress'
-            emergency.save()
-
-        ambulance.status = 'on_duty'
-        ambulance.current_location = location
-        ambulance.save()
+        try:
+            if emergency_id:
+                emergency = get_object_or_404(Emergency.objects.select_related('patient'), id=emergency_id)
+                Ambulance.allocate(emergency, ambulance, location=location)
+            elif not ambulance.claim(location):
+                raise ValueError("Tez yordam jo'natish uchun mavjud emas!")
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_409_CONFLICT)
 
         return Response(self.get_serializer(ambulance).data)
 
@@ -68,16 +68,14 @@ class AmbulanceViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def mark_available(self, request, pk=None):
         ambulance = self.get_object()
-        ambulance.status = 'available'
-        ambulance.save()
+        ambulance.mark_available()
         return Response(self.get_serializer(ambulance).data)
 
     @swagger_auto_schema(responses={200: AmbulanceSerializer})
     @action(detail=True, methods=['post'])
     def mark_unavailable(self, request, pk=None):
         ambulance = self.get_object()
-        ambulance.status = "unavailable"
-        ambulance.save()
+        ambulance.mark_unavailable()
         return Response(self.get_serializer(ambulance).data)
 
     @swagger_auto_schema(
@@ -85,8 +83,9 @@ class AmbulanceViewSet(viewsets.ModelViewSet):
             type=openapi.TYPE_OBJECT,
             properties={
                 'location': openapi.Schema(type=openapi.TYPE_STRING, description='Yangi manzil'),
+                'latitude': openapi.Schema(type=openapi.TYPE_NUMBER, description='Kenglik'),
+                'longitude': openapi.Schema(type=openapi.TYPE_NUMBER, description='Uzunlik'),
             },
-            required=['location']
         ),
         responses={200: AmbulanceSerializer}
     )
@@ -94,25 +93,99 @@ class AmbulanceViewSet(viewsets.ModelViewSet):
     def update_location(self, request, pk=None):
         ambulance = self.get_object()
         location = request.data.get('location')
-        if not location:
+        coordinates = CoordinatesSerializer(data=request.data)
+        coordinates.is_valid(raise_exception=True)
+        if not location and not coordinates.validated_data:
             return Response(
                 {"detail": "Manzil kiritilishi kerak!"},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        ambulance.current_location = location
-        ambulance.save()
+        ambulance.move_to(location=location, **coordinates.validated_data)
         return Response(self.get_serializer(ambulance).data)
 
+    @swagger_auto_schema(query_serializer=NearestAmbulanceQuerySerializer)
+    @action(detail=False, methods=['get'])
+    def nearest(self, request):
+        """k ta eng yaqin bo'sh mashina (xotiradagi fazoviy indeks orqali), masofasi bilan"""
+        query = NearestAmbulanceQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        data = query.validated_data
+        found = Ambulance.nearest_available(data['latitude'], data['longitude'], k=data['k'])
+        return Response([
+            {**self.get_serializer(ambulance).data, 'distance_km': round(distance, 3)}
+            for ambulance, distance in found
+        ])
+
+    @swagger_auto_schema(request_body=TelemetryBatchSerializer)
+    @action(detail=False, methods=['post'])
+    def telemetry(self, request):
+        """
+        Ko'p GPS nuqtasini bitta so'rovda qabul qilish. Nuqtalar xotiradagi buferga tushadi va tarix
+        jadvaliga to'plab yoziladi; noma'lum mashinalarning nuqtalari tashlab yuboriladi.
+        """
+        batch = TelemetryBatchSerializer(data=request.data)
+        batch.is_valid(raise_exception=True)
+        fixes = batch.validated_data['fixes']
+        known = set(
+            Ambulance.objects.filter(pk__in={fix['ambulance_id'] for fix in fixes}).values_list('pk', flat=True)
+        )
+        accepted = [
+            (fix['ambulance_id'], Fix(fix['latitude'], fix['longitude'], fix['recorded_at'], fix['speed']))
+            for fix in fixes if fix['ambulance_id'] in known
+        ]
+        telemetry_buffer.record(accepted)
+        return Response(
+            {
+                'accepted': len(accepted),
+                'unknown': sorted({fix['ambulance_id'] for fix in fixes} - known),
+            },
+            status=status.HTTP_202_ACCEPTED
+        )
+
+    @swagger_auto_schema(manual_parameters=[
+        openapi.Parameter('limit', openapi.IN_QUERY, description="So'nggi trek nuqtalari soni", type=openapi.TYPE_INTEGER)
+    ])
+    @action(detail=True, methods=['get'])
+    def position(self, request, pk=None):
+        """Jonli joylashuv va so'nggi trek: xotiradagi buferdan, bo'lmasa Ambulance dagi oxirgi koordinatadan"""
+        try:
+            limit = int(request.query_params.get('limit', 20))
+            if limit < 1:
+                raise ValueError
+        except ValueError:
+            raise ValidationError({"limit": "Musbat butun son kiriting."})
+
+        track = telemetry_buffer.recent(int(pk), limit) if pk.isdigit() else []
+        if track:
+            latest = track[-1]
+            return Response({
+                'id': int(pk),
+                'latitude': latest.latitude,
+                'longitude': latest.longitude,
+                'recorded_at': latest.recorded_at,
+                'track': [fix._asdict() for fix in track],
+            })
+
+        ambulance = self.get_object()
+        return Response({
+            'id': ambulance.pk,
+            'latitude': ambulance.latitude,
+            'longitude': ambulance.longitude,
+            'recorded_at': None,
+            'track': [],
+        })
+
 
-class EmergencyViewSet(viewsets.ModelViewSet):
+class EmergencyViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     queryset = Emergency.objects.all()
     serializer_class = EmergencySerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = EmergencyPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
 
-    filterset_fields = ['status', 'ambulance_requested', 'created_at']
+    filterset_fields = ['status', 'severity', 'ambulance_requested', 'created_at']
     search_fields = ['description', 'patient__full_name', 'doctor__full_name']
-    ordering_fields = ['created_at', 'status']
+    ordering_fields = ['created_at', 'status', 'severity']
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -138,6 +211,32 @@ class EmergencyViewSet(viewsets.ModelViewSet):
 
         return queryset
 
+    @swagger_auto_schema(manual_parameters=[
+        openapi.Parameter('limit', openapi.IN_QUERY, description="Holatlar soni (ko'pi bilan 100)", type=openapi.TYPE_INTEGER)
+    ])
+    @action(detail=False, methods=['get'])
+    def triage(self, request):
+        """Kutilayotgan holatlar triaj tartibida: avval og'irligi, keyin kutish vaqti bo'yicha"""
+        try:
+            limit = min(int(request.query_params.get('limit', 20)), 100)
+            if limit < 1:
+                raise ValueError
+        except ValueError:
+            raise ValidationError({"limit": "Musbat butun son kiriting."})
+
+        queryset = self.filter_queryset(self.get_queryset()).filter(status=Emergency.Status.PENDING)
+        emergencies = queryset.order_by('severity', 'created_at', 'id')[:limit]
+        return Response(self.get_serializer(emergencies, many=True).data)
+
+    @swagger_auto_schema(responses={200: EmergencySerializer, 204: 'Kutilayotgan holat yo\'q'})
+    @action(detail=False, methods=['post'])
+    def next_emergency(self, request):
+        """Eng ustuvor kutilayotgan holatni olish: u "in_progress" ga o'tadi va boshqa dispetcherga berilmaydi"""
+        emergency = Emergency.next_pending()
+        if emergency is None:
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        return Response(self.get_serializer(emergency).data)
+
     @swagger_auto_schema(responses={200: EmergencySerializer})
     @action(detail=True, methods=['post'])
     def request_ambulance(self, request, pk=None):
@@ -155,7 +254,33 @@ class EmergencyViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        emergency.request_ambulance()
+        try:
+            emergency.request_ambulance()
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_409_CONFLICT)
+        return Response(self.get_serializer(emergency).data)
+
+    @swagger_auto_schema(
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'ambulance_id': openapi.Schema(
+                    type=openapi.TYPE_INTEGER, description="Mashina IDsi (kiritilmasa — eng yaqin bo'sh mashina)"
+                ),
+            },
+        ),
+        responses={200: EmergencySerializer}
+    )
+    @action(detail=True, methods=['post'])
+    def dispatch_ambulance(self, request, pk=None):
+        """Holatga mashina biriktirish: mashina va holat bitta tranzaksiyada shartli UPDATE bilan band qilinadi"""
+        emergency = self.get_object()
+        ambulance_id = request.data.get('ambulance_id')
+        ambulance = get_object_or_404(Ambulance, id=ambulance_id) if ambulance_id else None
+        try:
+            Ambulance.allocate(emergency, ambulance)
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_409_CONFLICT)
         return Response(self.get_serializer(emergency).data)
 
     @swagger_auto_schema(responses={200: EmergencySerializer})
@@ -163,17 +288,10 @@ class EmergencyViewSet(viewsets.ModelViewSet):
     def resolve(self, request, pk=None):
         emergency = self.get_object()
 
-        if emergency.status == 'resolved':
+        if not emergency.resolve():
             return Response(
                 {'detail': 'Bu holat allaqachon hal qilingan'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        emergency.status = 'resolved'
-        emergency.save()
-
-        if hasattr(emergency, 'ambulance') and emergency.ambulance:
-            emergency.ambulance.status = 'available'
-            emergency.ambulance.save()
-
-        return Response(self.get_serializer(emergency).data)
\ No newline at end of file
+        return Response(self.get_serializer(emergency).data)
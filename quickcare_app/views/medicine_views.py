@@ -1,23 +1,39 @@
+import io
 from datetime import datetime, timedelta
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.parsers import MultiPartParser
 from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
-
-from quickcare_app.models import Medicine, Pharmacy, PatientMedicine, Patient
-from quickcare_app.serializers import MedicineSerializer, PharmacySerializer, PatientMedicineSerializer
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import is_naive, make_aware
+from rest_framework.exceptions import ValidationError
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+
+from quickcare_app.models import (
+    Medicine, Pharmacy, PatientMedicine, Patient, InventoryMovement, LowStockEntry, StockAlert
+)
+from quickcare_app.serializers import (
+    MedicineSerializer, PharmacySerializer, PatientMedicineSerializer, StockQuantitySerializer,
+    InventoryMovementSerializer, MedicineImportUploadSerializer, StockAlertSerializer
+)
+from quickcare_app.importer import CatalogImport, detect_format, read_rows
+from quickcare_app.search import search_backend
 from quickcare_app.permissions import IsAuthenticated, IsAdminUser, IsAdminUserOrReadOnly
+from quickcare_app.views.mixins import EagerLoadingMixin
+from quickcare_app.pagination import PrescriptionPagination
 
 
-class MedicineViewSet(viewsets.ModelViewSet):
+class MedicineViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     queryset = Medicine.objects.all()
     serializer_class = MedicineSerializer
     permission_classes = [IsAuthenticated]
 
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
 
-    filterset_fields = ['usage', 'is_avaliable']
+    filterset_fields = ['usage', 'is_available']
     search_fields = ['name', 'description']
     ordering_fields = ['name', 'price']
 
@@ -28,6 +44,54 @@ class MedicineViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(available_medicine, many=True)
         return Response(serializer.data)
 
+    @swagger_auto_schema(manual_parameters=[
+        openapi.Parameter('q', openapi.IN_QUERY, description="Qidiruv so'zlari (nom yoki tavsif)",
+                          type=openapi.TYPE_STRING, required=True),
+        openapi.Parameter('limit', openapi.IN_QUERY, description="Natijalar soni (ko'pi bilan 100)",
+                          type=openapi.TYPE_INTEGER),
+    ])
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Dorilarni qidirish: eng mosi birinchi. So'zlar prefiks sifatida qidiriladi ("ibu" -> Ibuprofen),
+        hech narsa topilmasa xatoli yozilgan nomlar qidiriladi ("paratsetmol" -> Paratsetamol).
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({"q": "Qidiruv so'zini kiriting."})
+        try:
+            limit = min(int(request.query_params.get('limit', 20)), 100)
+            if limit < 1:
+                raise ValueError
+        except ValueError:
+            raise ValidationError({"limit": "Musbat butun son kiriting."})
+
+        ranked = search_backend().search(query, limit)
+        medicines = self.filter_queryset(self.get_queryset()).in_bulk(ranked)
+        return Response(self.get_serializer([medicines[pk] for pk in ranked if pk in medicines], many=True).data)
+
+    @swagger_auto_schema(request_body=MedicineImportUploadSerializer)
+    @action(
+        detail=False, methods=['post'], permission_classes=[IsAdminUser],
+        parser_classes=[MultiPartParser], url_path='import'
+    )
+    def import_catalog(self, request):
+        """
+        Katalogni CSV yoki NDJSON fayldan yuklash (faqat admin). Fayl oqim sifatida partiyalab o'qiladi;
+        javobda yaratilgan/yangilangan dorilar soni va xato qatorlar hisoboti.
+        """
+        upload = MedicineImportUploadSerializer(data=request.data)
+        upload.is_valid(raise_exception=True)
+        file = upload.validated_data['file']
+        fmt = upload.validated_data.get('format') or detect_format(file.name)
+        if fmt is None:
+            raise ValidationError({'format': "Formatni kiriting yoki .csv / .ndjson fayl yuklang."})
+
+        job = CatalogImport()
+        for _ in job.run(read_rows(io.TextIOWrapper(file, encoding='utf-8-sig'), fmt)):
+            pass
+        return Response(job.summary())
+
     @action(detail=True, methods=['get'])
     def stock_info(self, request, pk=None):
         """Ma'lum bir dorini zaxirada mavjudligi haqida ma'lumot olish uchun """
@@ -37,7 +101,7 @@ class MedicineViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class PharmacyViewSet(viewsets.ModelViewSet):
+class PharmacyViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     """Farmasevtika modeli uchun viewset"""
     queryset = Pharmacy.objects.all()
     serializer_class = PharmacySerializer
@@ -49,76 +113,94 @@ class PharmacyViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def low_stock(self, request):
-        """Zaxirada 10tadan kam qolgan dorilarni chiqarish uchun """
-        low_stock = self.get_queryset().filter(stock__lt=10)
+        """Zaxirada dorining buyurtma chegarasidan (reorder_level) kam qolganlari, tugaganlari ham"""
+        low_stock = self.get_queryset().filter(pk__in=LowStockEntry.objects.values('pharmacy'))
         serializer = self.get_serializer(low_stock, many=True)
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
     def out_of_stock(self, request):
         """ Zaxirada qolmagan dorilar uchun"""
-        out_of_stock = self.get_queryset().filter(stock=0)
+        out_of_stock = self.get_queryset().filter(pk__in=LowStockEntry.objects.filter(state='out').values('pharmacy'))
         serializer = self.get_serializer(out_of_stock, many=True)
         return Response(serializer.data)
 
+    @swagger_auto_schema(manual_parameters=[
+        openapi.Parameter('after', openapi.IN_QUERY, description="Shu ID dan keyingi ogohlantirishlar",
+                          type=openapi.TYPE_INTEGER),
+        openapi.Parameter('limit', openapi.IN_QUERY, description="Ogohlantirishlar soni (ko'pi bilan 100)",
+                          type=openapi.TYPE_INTEGER),
+    ], responses={200: StockAlertSerializer(many=True)})
     @action(detail=False, methods=['get'])
+    def alerts(self, request):
+        """
+        Zaxira chegaradan o'tgani haqidagi ogohlantirishlar, eskisidan boshlab. Har bir o'tish uchun bitta;
+        so'rovchi oxirgi olgan ID ni ?after= bilan yuboradi va faqat yangilarini oladi.
+        """
+        try:
+            after = int(request.query_params.get('after', 0))
+        except ValueError:
+            raise ValidationError({"after": "Butun son kiriting."})
+        try:
+            limit = min(int(request.query_params.get('limit', 20)), 100)
+            if limit < 1:
+                raise ValueError
+        except ValueError:
+            raise ValidationError({"limit": "Musbat butun son kiriting."})
+
+        alerts = StockAlert.objects.filter(pk__gt=after).select_related('pharmacy').order_by('pk')[:limit]
+        return Response(StockAlertSerializer(alerts, many=True).data)
+
+    @swagger_auto_schema(request_body=StockQuantitySerializer, responses={200: PharmacySerializer})
+    @action(detail=True, methods=['post'])
     def update_stock(self, request, pk=None):
         """Yangi dorilarni zaxiraga joylash"""
         pharmacy_item = self.get_object()
-        quantity = request.data.get('quantity', 0)
-
-        if not quantity:
-            return Response(
-                {"error" "Zaxirada mavjud emas!"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        pharmacy_item.stock += int(quantity)
-        pharmacy_item.save()
-        serializer = self.get_serializer(pharmacy_item)
-        return Response(serializer.data)
+        serializer = StockQuantitySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
 
+        # Parallel retseptlar bilan to'qnashmasligi uchun o'qib-yozish emas, F() bilan
+        Pharmacy.restock(pharmacy_item.pk, serializer.validated_data['quantity'])
+        pharmacy_item.refresh_from_db(fields=['stock'])
+        return Response(self.get_serializer(pharmacy_item).data)
 
-
-class PatientMedicineViewSet(viewsets.ModelViewSet):
+    @swagger_auto_schema(manual_parameters=[
+        openapi.Parameter('at', openapi.IN_QUERY, description="Vaqt (ISO 8601); kiritilmasa — hozir", type=openapi.TYPE_STRING)
+    ])
+    @action(detail=True, methods=['get'])
+    def stock_at(self, request, pk=None):
+        """Qoldiq berilgan vaqtda (snapshot + harakatlar) va shu vaqtgacha oxirgi harakatlar"""
+        pharmacy_item = self.get_object()
+        at = request.query_params.get('at')
+        when = parse_datetime(at) if at else None
+        if at and when is None:
+            raise ValidationError({"at": "Noto'g'ri vaqt formati. ISO 8601 formatida kiriting."})
+        if when is not None and is_naive(when):
+            when = make_aware(when)
+
+        movements = pharmacy_item.movements.order_by('-created_at', '-id')
+        if when is not None:
+            movements = movements.filter(created_at__lte=when)
+        return Response({
+            'pharmacy': pharmacy_item.pk,
+            'at': when,
+            'stock': InventoryMovement.stock_at(pharmacy_item.pk, when),
+            'movements': InventoryMovementSerializer(movements[:20], many=True).data,
+        })
+
+
+class PatientMedicineViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     """Bemor retseptlarini boshqarish uchun viewset"""
     queryset = PatientMedicine.objects.all()
     serializer_class = PatientMedicineSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = PrescriptionPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
 
     filterset_fields = ['patient', 'medicine']
     search_fields = ['dosage', 'patient', 'medicine']
     ordering_fields = ['prescribed_at']  # Bu yerda prescribed_at maydoni
 
-    def get_queryset(self):
-        return super().get_queryset().select_related('patient', 'medicine')
-
-    def create(self, request, *args, **kwargs):
-        """Dori-darmon mavjudligini tekshirish va omborni yangilash uchun create metodini qayta yozish."""
-        medicine_id = request.data.get('medicine')
-        try:
-            medicine = Medicine.objects.get(id=medicine_id, is_available=True)
-        except Medicine.DoesNotExist:
-            return Response(
-                {"error": "Dori mavjud emas yoki tugagan!"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        """Zaxirada dori bor yoki yo'qligini tekshirish"""
-        try:
-            pharmacy_item = Pharmacy.objects.get(medicine=medicine)
-            if pharmacy_item.stock <= 0:
-                return Response(
-                    {'error': 'Zaxirada bu doridan qolmagan'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            pharmacy_item.stock -= 1  # Bu yerda xato bor edi, stock maydonini kamaytirish kerak
-            pharmacy_item.save()
-        except Pharmacy.DoesNotExist:
-            pass
-
-        return super().create(request, *args, **kwargs)
-
     @action(detail=False, methods=['get'])
     def patient_history(self, request):
         """Ma'lum bir bemorni kasallik tarixini bilish"""
@@ -1,25 +1,40 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 
-from quickcare_app.models import Notification, Comment, Reply, Review
+from quickcare_app.models import Notification, UnreadNotificationCounter, Comment, Reply, Review
 from quickcare_app.serializers import NotificationSerializer, CommentSerializer, ReplySerializer, ReviewSerializer
+from quickcare_app.views.mixins import EagerLoadingMixin
+from quickcare_app.pagination import NotificationPagination
 
 
-class NotificationViewSet(viewsets.ModelViewSet):
+class NotificationViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
-    queryset = Notification.objects.none()
+    pagination_class = NotificationPagination
+    queryset = Notification.objects.all()
 
     def get_queryset(self):
         if getattr(self, 'swagger_fake_view', False):
             return Notification.objects.none()
 
-        return Notification.objects.filter(recipient=self.request.user).order_by('-sent_at')
+        return super().get_queryset().filter(recipient__user=self.request.user)
 
     def perform_create(self, serializer):
-        serializer.save(recipient=self.request.user)
+        # recipient — Patient: foydalanuvchining o'z bemor profili
+        patient = getattr(self.request.user, 'patient', None)
+        if patient is None:
+            raise PermissionDenied("Bildirishnoma faqat bemor profili bor foydalanuvchi uchun yaratiladi")
+        serializer.save(recipient=patient)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            if not instance.is_read:
+                UnreadNotificationCounter.apply({instance.recipient_id: -1})
 
     @action(detail=False, methods=['get'])
     def unread(self, request):
@@ -31,15 +46,38 @@ class NotificationViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'])
+    def unread_count(self, request):
+        """Ilova belgisi (badge) uchun faqat son: ro'yxat o'qilmaydi va serializatsiya qilinmaydi"""
+        return Response({'unread': UnreadNotificationCounter.for_user(request.user)})
+
     @action(detail=True, methods=['post'])
     def mark_as_read(self, request, pk=None):
-        notification = get_object_or_404(Notification, pk=pk, recipient=request.user)
-        notification.is_read = True
-        notification.save()
+        notification = get_object_or_404(Notification, pk=pk, recipient__user=request.user)
+        notification.mark_as_read()
         return Response({'status': 'marked as read'}, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=['post'])
+    def mark_all_read(self, request):
+        """
+        Barcha o'qilmagan bildirishnomalarni bitta UPDATE bilan o'qilgan qiladi.
+        up_to berilsa, faqat shu id gacha bo'lganlari (ilova ko'rsatgan oxirgi bildirishnoma).
+        """
+        up_to = request.data.get('up_to')
+        if up_to is not None:
+            try:
+                up_to = int(up_to)
+            except (TypeError, ValueError):
+                return Response({'up_to': "Butun son bo'lishi kerak"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not hasattr(request.user, 'patient'):
+            return Response({'detail': "Foydalanuvchi bemor emas"}, status=status.HTTP_403_FORBIDDEN)
+
+        updated = Notification.mark_all_read(request.user.patient, up_to=up_to)
+        return Response({'marked': updated, 'unread': UnreadNotificationCounter.for_user(request.user)})
+
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     queryset = Comment.objects.all().order_by('-created_at')
@@ -63,7 +101,7 @@ class CommentViewSet(viewsets.ModelViewSet):
         serializer.save(author=self.request.user.patient)
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     queryset = Review.objects.all().order_by('-created_at')
@@ -99,7 +137,7 @@ class ReviewViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class ReplyViewSet(viewsets.ModelViewSet):
+class ReplyViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     serializer_class = ReplySerializer
     permission_classes = [permissions.IsAuthenticated]
     queryset = Reply.objects.all().order_by('-created_at')
@@ -0,0 +1,54 @@
+from rest_framework.permissions import SAFE_METHODS
+
+from quickcare_app.serializers.eager import eager_loading
+from quickcare_app.serializers.sparse import apply_sparse_fields, only_fields, parse_field_list, sparse_loading
+
+
+class EagerLoadingMixin:
+    """
+    Serializer o'qiydigan bog'lanishlarni (select_related / prefetch_related) queryset'ga qo'llaydi,
+    shuning uchun ro'yxatdagi har bir qator uchun qo'shimcha so'rov (N+1) bo'lmaydi.
+
+    GET so'rovlarida ?fields= / ?expand= (serializers/sparse.py) qo'llab-quvvatlanadi: javobda faqat
+    so'ralgan maydonlar, bazadan esa faqat ular uchun kerakli ustunlar (only()) va bog'lanishlar olinadi.
+    """
+
+    def sparse_fieldset(self):
+        """(fields, expand) daraxtlari yoki None — so'rovda siyrak maydonlar so'ralmagan"""
+        request = getattr(self, 'request', None)
+        if request is None or request.method not in SAFE_METHODS:
+            return None
+        params = request.query_params
+        if 'fields' not in params and 'expand' not in params:
+            return None
+        return parse_field_list(params.get('fields')) or None, parse_field_list(params.get('expand'))
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        sparse = self.sparse_fieldset()
+        if sparse is not None:
+            apply_sparse_fields(serializer, *sparse)
+        return serializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        sparse = self.sparse_fieldset()
+        if sparse is None:
+            select, prefetch = eager_loading(self.get_serializer_class())
+        else:
+            serializer = apply_sparse_fields(
+                self.get_serializer_class()(context=self.get_serializer_context()), *sparse
+            )
+            select, prefetch = sparse_loading(serializer)
+            columns = only_fields(serializer, select)
+            if columns is not None:
+                # Kursor sahifalash oxirgi qatorning tartib maydonini o'qiydi
+                ordering = getattr(self.paginator, 'ordering', None) or ()
+                if isinstance(ordering, str):
+                    ordering = (ordering,)
+                queryset = queryset.only(*columns, *(field.lstrip('-') for field in ordering))
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
@@ -1,14 +1,19 @@
+from django.db import transaction
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 
-from quickcare_app.models import Queue
+from quickcare_app.models import Queue, DailyQueueCounter
+from quickcare_app.models.queue import STATUS_CONFLICT_MESSAGE
 from quickcare_app.serializers.queue_serializer import (
     QueueSerializer,
     QueueListSerializer,
-    QueueActionSerializer
+    QueueActionSerializer,
+    QueueBulkActionSerializer
 )
+from quickcare_app.views.mixins import EagerLoadingMixin
+from quickcare_app.pagination import QueuePagination
 from quickcare_app.permissions import (
     IsDoctor,
     IsPatient,
@@ -18,22 +23,23 @@ from quickcare_app.permissions import (
 )
 
 
-class QueueViewSet(viewsets.ModelViewSet):
+class QueueViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing patient queues.
 
     Provides CRUD operations and additional actions for queue management:
     - list_my_queues: Get queues for the current user (patient or doctor)
     - perform_action: Execute actions on a queue (cancel, start, complete)
+    - bulk_action: Execute many queue actions in one transaction
     - next_patient: Get the next patient in the queue for a doctor
     """
     queryset = Queue.objects.all()
     serializer_class = QueueSerializer
+    pagination_class = QueuePagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['status', 'doctor', 'patient', 'room']
     search_fields = ['patient__full_name', 'doctor__full_name']
     ordering_fields = ['position', 'created_at']
-    ordering = ['position', 'created_at']
 
     def get_serializer_class(self):
         """Return appropriate serializer based on action."""
@@ -41,6 +47,8 @@ class QueueViewSet(viewsets.ModelViewSet):
             return QueueListSerializer
         elif self.action == 'perform_action':
             return QueueActionSerializer
+        elif self.action == 'bulk_action':
+            return QueueBulkActionSerializer
         return QueueSerializer
 
     def get_permissions(self):
@@ -122,30 +130,89 @@ class QueueViewSet(viewsets.ModelViewSet):
 
             if action == 'cancel':
                 if hasattr(request.user, 'patient') and request.user.patient == queue.patient:
-                    queue.status = 'cancelled'
-                    queue.cancel_queue()
+                    if not queue.cancel_queue():
+                        return Response({'detail': STATUS_CONFLICT_MESSAGE}, status=status.HTTP_409_CONFLICT)
                     return Response({'detail': 'Navbat bekor qilindi.'}, status=status.HTTP_200_OK)
                 return Response({'detail': 'Faqat bemor o\'z navbatini bekor qilishi mumkin.'},
                                 status=status.HTTP_403_FORBIDDEN)
 
             elif action == 'start':
                 if hasattr(request.user, 'doctor') and request.user.doctor == queue.doctor:
-                    queue.status = 'in_progress'
-                    queue.save()
+                    if not queue.change_status('in_progress'):
+                        return Response({'detail': STATUS_CONFLICT_MESSAGE}, status=status.HTTP_409_CONFLICT)
                     return Response({'detail': 'Qabul boshlandi.'}, status=status.HTTP_200_OK)
                 return Response({'detail': 'Faqat shifokor qabulni boshlashi mumkin.'},
                                 status=status.HTTP_403_FORBIDDEN)
 
             elif action == 'complete':
                 if hasattr(request.user, 'doctor') and request.user.doctor == queue.doctor:
-                    queue.status = 'completed'
-                    queue.save()
+                    if not queue.change_status('completed'):
+                        return Response({'detail': STATUS_CONFLICT_MESSAGE}, status=status.HTTP_409_CONFLICT)
                     return Response({'detail': 'Qabul yakunlandi.'}, status=status.HTTP_200_OK)
                 return Response({'detail': 'Faqat shifokor qabulni yakunlashi mumkin.'},
                                 status=status.HTTP_403_FORBIDDEN)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @staticmethod
+    def can_bulk_act(user, queue, action):
+        """
+        Ommaviy amallar uchun ruxsat:
+        - xodim (staff): istalgan navbat
+        - shifokor: o'ziga biriktirilgan navbatlar (kelmagan bemorlarni bekor qilish ham)
+        - bemor: faqat o'z navbatini bekor qilish
+        """
+        if user.is_staff:
+            return True
+        if queue.doctor.user_id == user.pk:
+            return True
+        return action == 'cancel' and queue.patient.user_id == user.pk
+
+    @action(detail=False, methods=['post'])
+    def bulk_action(self, request):
+        """
+        Bir nechta navbat ustida amallar: {"actions": [{"id": 1, "action": "cancel"}, ...]}.
+        Har bir element QueueActionSerializer qoidalari bo'yicha tekshiriladi; to'g'ri kelganlari
+        bitta tranzaksiyada bajariladi, natija har bir element uchun alohida qaytariladi.
+        """
+        serializer = QueueBulkActionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data['actions']
+
+        results = []
+        accepted = []
+        with transaction.atomic():
+            queues = Queue.objects.select_for_update().select_related('doctor', 'patient').in_bulk(
+                [item['id'] for item in items]
+            )
+            seen = set()
+            for item in items:
+                result = {'id': item['id'], 'action': item['action'], 'success': False}
+                results.append(result)
+                queue = queues.get(item['id'])
+
+                if queue is None:
+                    result['detail'] = 'Navbat topilmadi!'
+                elif item['id'] in seen:
+                    result['detail'] = 'Bitta navbat uchun faqat bitta amal yuborish mumkin.'
+                elif not self.can_bulk_act(request.user, queue, item['action']):
+                    result['detail'] = 'Bu amalni bajarishga ruxsat yo\'q.'
+                else:
+                    check = QueueActionSerializer(data={'action': item['action']}, context={'queue': queue})
+                    if check.is_valid():
+                        result['success'] = True
+                        accepted.append((queue, item['action']))
+                    else:
+                        result['detail'] = check.errors['non_field_errors'][0]
+                seen.add(item['id'])
+
+            try:
+                Queue.bulk_apply(accepted)
+            except ValueError as e:
+                return Response({'detail': str(e)}, status=status.HTTP_409_CONFLICT)
+
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
     @action(detail=False, methods=['get'])
     def next_patient(self, request):
         """
@@ -178,22 +245,12 @@ class QueueViewSet(viewsets.ModelViewSet):
             return Response({'detail': 'Faqat shifokorlar uchun.'}, status=status.HTTP_403_FORBIDDEN)
 
         from django.utils import timezone
-        import datetime
 
         doctor = request.user.doctor
-        today = timezone.now().date()
-        tomorrow = today + datetime.timedelta(days=1)
-        today_start = datetime.datetime.combine(today, datetime.time.min, tzinfo=timezone.get_current_timezone())
-        today_end = datetime.datetime.combine(tomorrow, datetime.time.min, tzinfo=timezone.get_current_timezone())
-
-        waiting_count = Queue.objects.filter(doctor=doctor, status='waiting').count()
-        in_progress_count = Queue.objects.filter(doctor=doctor, status='in_progress').count()
-        completed_today = Queue.objects.filter(
-            doctor=doctor,
-            status='completed',
-            created_at__gte=today_start,
-            created_at__lt=today_end
-        ).count()
+        stats = DailyQueueCounter.stats(doctor, timezone.now().date())
+        waiting_count = stats['waiting_count']
+        in_progress_count = stats['in_progress_count']
+        completed_today = stats['completed_count']
 
         return Response({
             'waiting_count': waiting_count,